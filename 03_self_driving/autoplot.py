@@ -64,6 +64,7 @@ Modified: 2025-11-25
    - SPACE: 일시정지
    - 'l': LED 토글
    - 'b': 부저 테스트
+   - 't': 프레임 지연 추적 저장 (CSV + Chrome trace, 종료 시 자동 저장)
 """
 
 import sys
@@ -77,6 +78,7 @@ import numpy as np
 import random
 import time
 from Raspbot_Lib import Raspbot
+from autoplot_modules.trace import FrameTracer
 
 # ============================
 # 사용자 설정 영역 (여기를 수정하세요!)
@@ -117,6 +119,12 @@ USE_BEEP = True  # 부저 사용 여부
 BEEP_ON_START = True  # 시작 시 부저 울리기
 BEEP_ON_TURN = False  # 회전 시 부저 울리기
 
+# 프레임 지연 추적 (autoplot_modules/trace.py, 프레임당 수 마이크로초)
+TRACE_ENABLED = True  # 단계별 시각 기록 여부
+TRACE_CAPACITY = 2048  # 보관할 최근 프레임 수
+TRACE_DEADLINE_MS = 100  # 프레임 마감 시간 (약 10Hz 루프)
+TRACE_PREFIX = "autoplot_trace"  # 저장 파일 이름 (.csv, .json)
+
 # ============================
 # 시스템 초기화
 # ============================
@@ -711,6 +719,7 @@ def control_car(direction, up_speed, down_speed):
     if direction == "UP":
         # 직진: 속도 부스트 적용
         boosted_speed = min(up_speed + SPEED_BOOST, 255)
+        tracer.stamp("enqueue")  # 첫 I2C 쓰기 직전
         car_run(boosted_speed, boosted_speed)
         if DEBUG_MODE:
             print(f"⚡ 직진 - 속도: {boosted_speed}")
@@ -721,6 +730,7 @@ def control_car(direction, up_speed, down_speed):
 
     elif direction == "LEFT":
         # 좌회전: 왼쪽 느리게, 오른쪽 빠르게
+        tracer.stamp("enqueue")
         car_left(down_speed - 10, up_speed + 10)
         if DEBUG_MODE:
             print(f"◀️  좌회전 - 왼쪽:{down_speed-10}, 오른쪽:{up_speed+10}")
@@ -731,6 +741,7 @@ def control_car(direction, up_speed, down_speed):
 
     elif direction == "RIGHT":
         # 우회전: 왼쪽 빠르게, 오른쪽 느리게
+        tracer.stamp("enqueue")
         car_right(up_speed + 10, down_speed - 10)
         if DEBUG_MODE:
             print(f"▶️  우회전 - 왼쪽:{up_speed+10}, 오른쪽:{down_speed-10}")
@@ -763,11 +774,15 @@ print("=" * 50)
 
 frame_count = 0
 start_time = time.time()
+tracer = FrameTracer(TRACE_CAPACITY, TRACE_DEADLINE_MS, enabled=TRACE_ENABLED)
+if TRACE_ENABLED:
+    tracer.dump_on_exit(TRACE_PREFIX)
 led_state = LED_ON_START
 
 try:
     while True:
         frame_count += 1
+        tracer.begin()
 
         # 트랙바 값 읽기
         brightness = cv2.getTrackbarPos("Brightness", "Camera Settings")
@@ -800,6 +815,7 @@ try:
         if not ret:
             print("❌ Failed to read frame from camera.")
             break
+        tracer.stamp("capture")
 
         # 서보 모터 각도 조절
         rotate_servo(1, servo_1_angle)
@@ -809,6 +825,7 @@ try:
         processed_frame = process_frame(
             frame, detect_value, r_weight, g_weight, b_weight, roi_top_y, roi_bottom_y
         )
+        tracer.stamp("process")
         histogram = np.sum(processed_frame, axis=0)
 
         # 방향 결정 및 제어
@@ -826,7 +843,9 @@ try:
             roi_top_y,
             roi_bottom_y,
         )
+        tracer.stamp("decide")
         control_car(direction, motor_up_speed, motor_down_speed)
+        tracer.stamp("i2c_done")
 
         # FPS 계산 (10프레임마다)
         if frame_count % 10 == 0:
@@ -853,6 +872,8 @@ try:
             else:
                 bot.Ctrl_WQ2812_ALL(0, 0)  # OFF
                 print("💡 LED OFF")
+        elif key == ord("t"):  # 지연 추적 저장
+            tracer.dump(TRACE_PREFIX)
         elif key == ord("b"):  # 부저 테스트
             print("🔊 Beep!")
             bot.Ctrl_BEEP_Switch(1)
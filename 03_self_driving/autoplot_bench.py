@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Raspbot v2 골든 프레임 회귀 벤치마크 (판단 결과 + 단계별 지연 예산)
+
+autoplot_golden.json에 정의한 고정 프레임(01_Movies, two_line_auto_plot/image 스크린샷에서 잘라낸
+카메라 화면과 시뮬레이터로 렌더링한 합성 프레임)을 모든 처리 단계에 통과시켜
+기대 결과(방향, 차선 중앙, 빨간색 검출)를 확인하고 단계별 p50/p95 지연을 측정합니다.
+기대 결과와 다르거나 p95가 예산(budgets_ms)을 넘으면 종료 코드 1을 반환합니다.
+
+기대 결과(expect)는 프레임마다 의미 있는 단계만 적습니다 (한 줄 트랙 프레임에 two_line 중앙,
+두 줄 차선 프레임에 autoplot 방향은 적지 않음). 합성 프레임의 "camera"는 렌더링할 파이프라인의
+카메라 설치값 (autoplot/two_line, 기본 autoplot)이고, "note"는 기대 결과를 정한 근거입니다.
+
+═══════════════════════════════════════════════════════════
+단계:
+═══════════════════════════════════════════════════════════
+- autoplot.process : ImageProcessor.process (autoplot.py)
+- autoplot.decide  : DrivingLogic.decide_direction → 방향
+- two_line.process : LaneImageProcessor.process (two_line_lane_center.py)
+- two_line.detect  : LaneCenterLogic.detect_lane_lines → 차선 중앙 (픽셀, 없으면 null)
+- enhanced.0 ~ 2   : EnhancedLaneImageProcessor 개선 수준 0~2 (enhanced_line_detection.py)
+                     → 결과 이진화 이미지의 차선 중앙 (검출 시간은 제외)
+- enhanced.3       : 개선 수준 3 (적응형 임계값), 지연만 측정
+                     (원본 적응형 임계값은 평탄한 바닥도 흰색이라 닫힘 연산 후 전체가 흰색,
+                      차선 중앙이 프레임과 무관하게 항상 250)
+- color.hsv        : ColorDetector.detect (3_color_dection.py) → 빨간색 검출 여부
+
+═══════════════════════════════════════════════════════════
+사용 방법:
+═══════════════════════════════════════════════════════════
+$ python autoplot_bench.py
+$ python autoplot_bench.py --repeat 50 --budget-scale 4     (라즈베리파이처럼 느린 장치)
+$ python autoplot_bench.py --stages autoplot.process two_line.detect --save-frames golden_frames
+$ python autoplot_bench.py --update                          (의도한 변경 후 expect에 있는 단계만 다시 기록,
+                                                              expect가 없는 새 프레임은 모든 단계 기록)
+"""
+
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from autoplot_modules.logic import DrivingLogic, LaneCenterLogic
+from autoplot_modules.pipelines import PIPELINES, make_params
+from autoplot_modules.simulator import make_camera, track_preset
+from autoplot_modules.vision import ColorDetector, EnhancedLaneImageProcessor, ImageProcessor, LaneImageProcessor
+
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "autoplot_golden.json")
+STAGES = (
+    "autoplot.process", "autoplot.decide", "two_line.process", "two_line.detect",
+    "enhanced.0", "enhanced.1", "enhanced.2", "enhanced.3", "color.hsv",
+)
+TIMING_ONLY = ("autoplot.process", "two_line.process", "enhanced.3")  # 비교 값 없이 지연만 측정
+DEPENDS = {"autoplot.decide": "autoplot.process", "two_line.detect": "two_line.process"}  # 이전 단계 결과 사용
+LABELS = {"autoplot.decide": "dir", "two_line.detect": "center", "color.hsv": "red",
+          **{f"enhanced.{i}": f"enh{i}" for i in range(4)}}  # 결과 출력용 짧은 이름
+
+
+def load_frame(entry, root, size):
+    """골든 프레임 항목 → BGR 프레임 (file + crop, 또는 synthetic 시뮬레이터 렌더링)"""
+    if "file" in entry:
+        frame = cv2.imread(os.path.join(root, entry["file"]))
+        if frame is None:
+            raise FileNotFoundError(f"골든 프레임을 읽을 수 없습니다: {entry['file']}")
+        if "crop" in entry:
+            x, y, w, h = entry["crop"]
+            frame = frame[y : y + h, x : x + w]
+        return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+    synthetic = dict(entry["synthetic"])
+    track = track_preset(synthetic.pop("track"))
+    camera = make_camera(PIPELINES[synthetic.pop("camera", "autoplot")], size)
+    return camera.render(track, *track.pose(**synthetic))
+
+
+class Stages:
+    """단계별 실행 함수: run(name, frame, params, ctx) → 비교할 값, 이전 단계 결과는 ctx로 전달"""
+
+    def __init__(self):
+        self.autoplot = ImageProcessor(0, 0)
+        self.lane = LaneImageProcessor(0, 0)
+        self.enhanced = EnhancedLaneImageProcessor(0, 0)
+        self.driving = DrivingLogic()
+        self.lane_logic = LaneCenterLogic()
+        self.color = ColorDetector()
+
+    def lane_center(self, binary, params):
+        center = self.lane_logic.detect_lane_lines(
+            binary, params["min_lane_width"], params["max_lane_width"], params["roi_start_y"], params["roi_height"]
+        )[2]
+        return None if center is None else int(center)
+
+    def run(self, name, frame, params, ctx):
+        ap, tl = params["autoplot"], params["two_line"]
+        if name == "autoplot.process":
+            self.autoplot.height, self.autoplot.width = frame.shape[:2]
+            ctx["autoplot"] = self.autoplot.process(frame, ap)["binary"]
+        elif name == "autoplot.decide":
+            return self.driving.decide_direction(ctx["autoplot"], ap["direction_threshold"], ap["up_threshold"])
+        elif name == "two_line.process":
+            ctx["two_line"] = self.lane.process(frame, tl)["binary"]
+        elif name == "two_line.detect":
+            return self.lane_center(ctx["two_line"], tl)
+        elif name.startswith("enhanced."):
+            ctx[name] = self.enhanced.process(frame, dict(tl, enhancement_level=int(name[-1])))["binary"]
+        elif name == "color.hsv":
+            return self.color.detect(frame)[0]
+        return None
+
+    def value(self, name, params, ctx):
+        """enhanced 단계 비교 값: 이진화 결과의 차선 중앙 (시간 측정 밖에서 계산)"""
+        if not name.startswith("enhanced.") or name in TIMING_ONLY:
+            return None
+        return self.lane_center(ctx[name], params["two_line"])
+
+
+def matches(expected, actual, tol):
+    if isinstance(expected, (int, float)) and not isinstance(expected, bool) and actual is not None:
+        return abs(expected - actual) <= tol
+    return expected == actual
+
+
+def main(opt):
+    with open(opt.golden, encoding="utf-8") as f:
+        golden = json.load(f)
+    root = os.path.dirname(os.path.abspath(opt.golden))
+    size = tuple(golden.get("size", (640, 480)))
+    tol = golden.get("lane_center_tol", 4)
+    budgets = golden.get("budgets_ms", {})
+    stages = opt.stages or list(STAGES)
+    needed = [s for s in STAGES if s in stages or any(DEPENDS.get(t) == s for t in stages)]
+
+    runner = Stages()
+    times = {s: [] for s in needed}
+    failures = []
+    print(f"🎯 골든 프레임 {len(golden['frames'])}개, {size[0]}x{size[1]}, 반복 {opt.repeat}회")
+
+    for entry in golden["frames"]:
+        frame = load_frame(entry, root, size)
+        if opt.save_frames:
+            os.makedirs(opt.save_frames, exist_ok=True)
+            cv2.imwrite(os.path.join(opt.save_frames, f"{entry['name']}.png"), frame)
+        params = {k: make_params(PIPELINES[k], entry.get("params", {}).get(k, {})) for k in PIPELINES}
+
+        results, ctx = {}, {}
+        for s in needed:
+            for i in range(opt.repeat + 1):  # 첫 실행은 워밍업 (측정 제외, 결과 사용)
+                t0 = time.perf_counter()
+                out = runner.run(s, frame, params, ctx)
+                dt = (time.perf_counter() - t0) * 1e3
+                if i:
+                    times[s].append(dt)
+                else:
+                    results[s] = out if out is not None else runner.value(s, params, ctx)
+
+        new = "expect" not in entry
+        expect = entry.setdefault("expect", {})
+        line = []
+        for s in stages:
+            if s in TIMING_ONLY:
+                continue
+            actual = results[s]
+            if opt.update and (new or s in expect):
+                expect[s] = actual
+            elif s in expect and not matches(expect[s], actual, tol):
+                failures.append(f"{entry['name']} {s}: 기대 {expect[s]} → {actual}")
+            line.append(f"{LABELS.get(s, s)}={actual}")
+        print(f"  {entry['name']:<24s} " + " ".join(line))
+
+    print(f"\n{'stage':>18s}{'p50':>9s}{'p95':>9s}{'max':>9s}{'budget':>9s}  (ms)")
+    for s in needed:
+        p50, p95, mx = np.percentile(times[s], [50, 95, 100])
+        budget = budgets.get(s)
+        limit = budget * opt.budget_scale if budget is not None else None
+        mark = "" if limit is None else " ✅" if p95 <= limit else " ❌"
+        print(f"{s:>18s}{p50:9.2f}{p95:9.2f}{mx:9.2f}{limit if limit is not None else '-':>9}{mark}")
+        if limit is not None and p95 > limit:
+            failures.append(f"{s}: p95 {p95:.2f}ms > 예산 {limit:.2f}ms")
+
+    if opt.update:
+        with open(opt.golden, "w", encoding="utf-8") as f:
+            json.dump(golden, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"\n💾 {opt.golden} 기대 결과 갱신")
+        return 0
+    if failures:
+        print(f"\n❌ 실패 {len(failures)}개")
+        for msg in failures:
+            print(f"   {msg}")
+        return 1
+    print("\n✅ 모든 기대 결과와 지연 예산 통과")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="골든 프레임으로 처리 단계별 판단 결과와 지연 예산 검사")
+    parser.add_argument("--golden", default=GOLDEN, help="골든 프레임 정의 JSON")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, help="실행할 단계 (기본: 전체)")
+    parser.add_argument("--repeat", type=int, default=20, help="프레임당 단계별 측정 반복 횟수")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="지연 예산 배율 (느린 장치용)")
+    parser.add_argument("--save-frames", help="골든 프레임 이미지를 저장할 폴더 (확인용)")
+    parser.add_argument("--update", action="store_true", help="현재 결과를 기대 결과로 기록 (expect에 있는 단계만)")
+    raise SystemExit(main(parser.parse_args()))
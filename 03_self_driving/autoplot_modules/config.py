@@ -34,3 +34,18 @@ USE_BEEP = True
 # ROI 기본 좌표 (트랙바 초기값)
 ROI_TOP_DEFAULT = 0
 ROI_BOTTOM_DEFAULT = 130
+
+# 두 라인 중앙 유지 설정 (two_line_auto_plot/two_line_lane_center.py, 640x480 기준)
+TWO_LINE_BASE_SPEED = 30  # 기본 전진 속도
+TWO_LINE_SPEED_BOOST = 10  # 직진 시 추가 속도
+TWO_LINE_MIN_LANE_WIDTH = 100  # 최소 라인 간격 (픽셀)
+TWO_LINE_MAX_LANE_WIDTH = 600  # 최대 라인 간격 (픽셀)
+TWO_LINE_ROI_START_Y = 280  # 히스토그램 계산 ROI 시작 Y 위치
+TWO_LINE_ROI_HEIGHT = 200  # 히스토그램 계산 ROI 높이
+TWO_LINE_BIAS_THRESHOLD = 10  # 편차 임계값 (픽셀)
+TWO_LINE_P_GAIN = 0.5  # 비례 제어 게인
+TWO_LINE_ROI_TOP_Y = 200  # 원근 변환 상단 Y 위치 (0~1000)
+TWO_LINE_ROI_BOTTOM_Y = 800  # 원근 변환 하단 Y 위치 (0~1000)
+TWO_LINE_R_WEIGHT = 30  # RGB 가중치 (autoplot의 DEFAULT_*_WEIGHT와 별도로 튜닝)
+TWO_LINE_G_WEIGHT = 40
+TWO_LINE_B_WEIGHT = 60
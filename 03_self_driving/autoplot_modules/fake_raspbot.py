@@ -0,0 +1,449 @@
+# -*- coding: utf-8 -*-
+"""
+가짜 Raspbot / smbus 백엔드 (하드웨어 없는 제어 루프 벤치마크용)
+
+- RaspbotDevice : 0x2B 확장 보드 레지스터 모델 (모터, 서보, LED, 부저, 초음파, 라인 센서)
+- FakeSMBus     : smbus.SMBus 대체, 지연/실패 모델과 트랜잭션 로그
+- FakeRaspbot   : Raspbot_Lib.Raspbot 대체 (같은 레지스터 인코딩과 except 처리)
+- BusRecorder   : 실제 SMBus를 감싸 같은 형식의 로그를 기록 (실차 측정 → LatencyModel.fit)
+- install()     : sys.modules에 smbus (및 Raspbot_Lib) 주입, 기존 스크립트를 수정 없이 실행
+
+사용 예:
+    from autoplot_modules import fake_raspbot
+    bus = fake_raspbot.install(fake_raspbot.LatencyModel(failure_rate=0.01))
+    from Raspbot_Lib import Raspbot  # 가짜 smbus 위에서 동작
+    ...
+    bus.print_stats()
+"""
+
+import csv
+import random
+import sys
+import threading
+import time
+import types
+from collections import Counter, deque, namedtuple
+
+import numpy as np
+
+RASPBOT_ADDR = 0x2B
+
+# 트랜잭션 로그 항목: 시작 시각(perf_counter), 동작, 주소, 레지스터, 데이터, 소요 시간(s), 에러 (없으면 "")
+Transaction = namedtuple("Transaction", "t op addr reg data duration error")
+
+# 동작별 버스 전송 바이트 수 (주소 바이트 포함, n = 데이터 길이)
+OP_BYTES = {
+    "write_byte": lambda n: 2,
+    "write_byte_data": lambda n: 3,
+    "write_i2c_block_data": lambda n: 2 + n,
+    "read_byte": lambda n: 2,
+    "read_byte_data": lambda n: 4,
+    "read_i2c_block_data": lambda n: 3 + n,  # 쓰기(주소+레지스터) 후 재시작 읽기(주소+데이터)
+}
+
+
+class LatencyModel:
+    """
+    I2C 트랜잭션 지연/실패 모델: 지연 = overhead + per_byte x 바이트 수 + 가우시안 지터
+
+    기본값은 라즈베리파이 기본 클럭 100kHz 기준 (바이트당 9비트 = 90us, ioctl 오버헤드 약 60us).
+    실차에서 BusRecorder로 기록한 로그가 있으면 LatencyModel.fit(log)으로 측정값을 사용
+    """
+
+    def __init__(self, overhead_us=60.0, per_byte_us=90.0, jitter_us=10.0, failure_rate=0.0, seed=0):
+        self.overhead_us = overhead_us
+        self.per_byte_us = per_byte_us
+        self.jitter_us = jitter_us
+        self.failure_rate = failure_rate  # 트랜잭션당 실패 확률 (OSError 121 Remote I/O error)
+        self.random = random.Random(seed)
+
+    def __repr__(self):
+        return (
+            f"LatencyModel(overhead {self.overhead_us:.1f}us, {self.per_byte_us:.1f}us/byte, "
+            f"jitter {self.jitter_us:.1f}us, failure {self.failure_rate:.2%})"
+        )
+
+    def duration(self, nbytes):
+        """트랜잭션 소요 시간 (s)"""
+        us = self.overhead_us + self.per_byte_us * nbytes + self.random.gauss(0, self.jitter_us)
+        return max(us, 0.0) / 1e6
+
+    def fails(self):
+        return self.failure_rate > 0 and self.random.random() < self.failure_rate
+
+    @classmethod
+    def fit(cls, log, seed=0):
+        """
+        트랜잭션 로그(Transaction 목록 또는 save_log CSV 경로)에서 모델 추정
+        성공한 트랜잭션의 소요 시간을 바이트 수에 최소제곱 회귀, 실패율은 에러 비율
+        """
+        if isinstance(log, str):
+            log = load_log(log)
+        ok = [x for x in log if not x.error]
+        n = np.array([OP_BYTES[x.op](len(x.data)) for x in ok], dtype=float)
+        us = np.array([x.duration for x in ok]) * 1e6
+        if len(set(n)) > 1:
+            per_byte, overhead = np.polyfit(n, us, 1)
+        else:  # 바이트 수가 하나뿐이면 기울기 추정 불가, 기본 클럭 사용
+            per_byte = cls().per_byte_us
+            overhead = us.mean() - per_byte * n.mean()
+        jitter = float(np.std(us - (overhead + per_byte * n)))
+        return cls(max(overhead, 0.0), max(per_byte, 0.0), jitter, (len(log) - len(ok)) / max(len(log), 1), seed)
+
+
+class RaspbotDevice:
+    """
+    Raspbot v2 확장 보드(0x2B) 레지스터 모델
+
+    쓰기: 0x01 모터 [id, dir, speed], 0x02 서보 [id, angle], 0x03 LED 전체 [state, color],
+          0x04 LED 개별 [n, state, color], 0x05 IR 스위치, 0x06 부저, 0x07 초음파 스위치,
+          0x08 LED 밝기 전체 [R, G, B], 0x09 LED 밝기 개별 [n, R, G, B]
+    읽기: 0x0a 라인 센서 (4비트, x1이 bit3), 0x1a/0x1b 초음파 거리 하위/상위 바이트 (mm),
+          0x0c IR 리모컨 값, 0x0d 키 상태
+    센서 값(line, distance_mm, ir_code, key)은 시뮬레이터나 테스트에서 직접 설정
+    """
+
+    def __init__(self):
+        self.motors = [[0, 0] for _ in range(4)]  # [dir, speed], dir 1 = 후진
+        self.servos = {1: 90, 2: 25}
+        self.led_all = [0, 0]  # [state, color]
+        self.leds = [[0, 0] for _ in range(14)]  # 개별 LED [state, color]
+        self.brightness = [0, 0, 0]
+        self.ir_switch = 0
+        self.beep = 0
+        self.ultrasonic_switch = 0
+
+        # 센서 값
+        self.line = 0b0000
+        self.distance_mm = 1000
+        self.ir_code = 0xFF
+        self.key = 0
+
+    def motor_speeds(self):
+        """모터별 부호 있는 속도 [M1, M2, M3, M4] (-255 ~ 255)"""
+        return [-s if d == 1 else s for d, s in self.motors]
+
+    def write(self, reg, data):
+        if reg == 0x01 and len(data) >= 3 and 0 <= data[0] < 4:
+            self.motors[data[0]] = [data[1], data[2]]
+        elif reg == 0x02 and len(data) >= 2:
+            self.servos[data[0]] = data[1]
+        elif reg == 0x03 and len(data) >= 2:
+            self.led_all = list(data[:2])
+            for led in self.leds:
+                led[:] = self.led_all
+        elif reg == 0x04 and len(data) >= 3 and 0 <= data[0] < 14:
+            self.leds[data[0]] = list(data[1:3])
+        elif reg == 0x05 and data:
+            self.ir_switch = data[0]
+        elif reg == 0x06 and data:
+            self.beep = data[0]
+        elif reg == 0x07 and data:
+            self.ultrasonic_switch = data[0]
+        elif reg == 0x08 and len(data) >= 3:
+            self.brightness = list(data[:3])
+
+    def read(self, reg, length):
+        distance = self.distance_mm if self.ultrasonic_switch else 0  # 측정 스위치가 꺼져 있으면 갱신 안 됨
+        value = {
+            0x0A: self.line & 0x0F,
+            0x1A: distance & 0xFF,
+            0x1B: (distance >> 8) & 0xFF,
+            0x0C: self.ir_code if self.ir_switch else 0xFF,
+            0x0D: self.key,
+        }.get(reg, 0)
+        return [value] + [0] * (length - 1)
+
+
+class FakeSMBus:
+    """
+    smbus.SMBus 대체: 0x2B에 RaspbotDevice를 연결하고 모든 트랜잭션을 기록
+
+    model: LatencyModel (None이면 지연/실패 없음)
+    sleep: True면 모델 지연만큼 실제로 대기 (벽시계 시간 측정용), False면 bus_time에 누적만 함
+    """
+
+    def __init__(self, bus=1, model=None, device=None, sleep=True, max_log=100000):
+        self.bus = bus
+        self.model = model
+        self.device = device or RaspbotDevice()
+        self.sleep = sleep
+        self.log = deque(maxlen=max_log)  # 최근 Transaction
+        self.counts = Counter()  # (동작, 레지스터): 횟수
+        self.errors = Counter()  # (동작, 레지스터): 실패 횟수
+        self.bus_time = 0.0  # 모델 지연 합계 (s)
+        self.lock = threading.Lock()  # 실제 /dev/i2c-1처럼 트랜잭션 직렬화
+        self.fail_next = 0  # 다음 n개 트랜잭션을 강제로 실패 (에러 처리 경로 재현용)
+
+    def _transfer(self, op, addr, reg, data, fn):
+        with self.lock:
+            t = time.perf_counter()
+            duration = self.model.duration(OP_BYTES[op](len(data))) if self.model else 0.0
+            error = ""
+            if addr != RASPBOT_ADDR:
+                error = "OSError 121 no device"  # 응답 없는 주소는 NACK
+            elif self.fail_next > 0 or (self.model and self.model.fails()):
+                self.fail_next = max(self.fail_next - 1, 0)
+                error = "OSError 121 Remote I/O error"
+
+            if self.sleep and duration > 0:
+                wait(duration)
+            self.bus_time += duration
+            result = None if error else fn()
+
+            self.log.append(Transaction(t, op, addr, reg, tuple(data if result is None else result), duration, error))
+            self.counts[op, reg] += 1
+            if error:
+                self.errors[op, reg] += 1
+                raise OSError(121, error)
+            return result
+
+    # 쓰기
+    def write_byte(self, addr, value):
+        return self._transfer("write_byte", addr, value, (), lambda: None)
+
+    def write_byte_data(self, addr, reg, value):
+        return self._transfer("write_byte_data", addr, reg, (value,), lambda: self.device.write(reg, [value]))
+
+    def write_i2c_block_data(self, addr, reg, data):
+        data = list(data)
+        return self._transfer("write_i2c_block_data", addr, reg, data, lambda: self.device.write(reg, data))
+
+    # 읽기
+    def read_byte(self, addr):
+        return self._transfer("read_byte", addr, 0, (0,), lambda: [0])[0]
+
+    def read_byte_data(self, addr, reg):
+        return self._transfer("read_byte_data", addr, reg, (0,), lambda: self.device.read(reg, 1))[0]
+
+    def read_i2c_block_data(self, addr, reg, length):
+        return self._transfer("read_i2c_block_data", addr, reg, [0] * length, lambda: self.device.read(reg, length))
+
+    def close(self):
+        pass
+
+    def stats(self):
+        """레지스터별 트랜잭션 수, 실패 수, 모델 버스 시간 요약 문자열"""
+        n = sum(self.counts.values())
+        s = [f"I2C {n} 트랜잭션, 버스 시간 {self.bus_time * 1e3:.1f}ms, 실패 {sum(self.errors.values())}"]
+        for (op, reg), c in sorted(self.counts.items(), key=lambda x: -x[1]):
+            s.append(f"  0x{reg:02x} {op:<22s}{c:8d}  실패 {self.errors[op, reg]}")
+        return "\n".join(s)
+
+    def print_stats(self):
+        print(self.stats())
+
+    def save_log(self, path):
+        save_log(path, self.log)
+
+
+class BusRecorder:
+    """
+    실제 smbus.SMBus를 감싸 FakeSMBus와 같은 형식으로 트랜잭션을 기록 (실차 지연 측정용)
+    예: bot._device = BusRecorder(bot._device) 후 주행, save_log() → LatencyModel.fit(csv)
+    """
+
+    def __init__(self, bus, max_log=100000):
+        self.bus = bus
+        self.log = deque(maxlen=max_log)
+
+    def _call(self, op, addr, reg, data, *args):
+        t = time.perf_counter()
+        try:
+            result = getattr(self.bus, op)(addr, *args)
+        except OSError as e:
+            self.log.append(Transaction(t, op, addr, reg, tuple(data), time.perf_counter() - t, f"OSError {e.errno}"))
+            raise
+        self.log.append(Transaction(t, op, addr, reg, tuple(data), time.perf_counter() - t, ""))
+        return result
+
+    def write_byte(self, addr, value):
+        return self._call("write_byte", addr, value, (), value)
+
+    def write_byte_data(self, addr, reg, value):
+        return self._call("write_byte_data", addr, reg, (value,), reg, value)
+
+    def write_i2c_block_data(self, addr, reg, data):
+        return self._call("write_i2c_block_data", addr, reg, data, reg, data)
+
+    def read_byte(self, addr):
+        return self._call("read_byte", addr, 0, (0,))
+
+    def read_byte_data(self, addr, reg):
+        return self._call("read_byte_data", addr, reg, (0,), reg)
+
+    def read_i2c_block_data(self, addr, reg, length):
+        return self._call("read_i2c_block_data", addr, reg, [0] * length, reg, length)
+
+    def save_log(self, path):
+        save_log(path, self.log)
+
+
+class FakeRaspbot:
+    """
+    Raspbot_Lib.Raspbot 대체: 같은 메서드, 같은 레지스터 인코딩, 같은 except: print(...) 처리
+    (클램프 전에 data를 만드는 Ctrl_Servo 등 원본 동작도 그대로 유지)
+    """
+
+    def __init__(self, bus=None):
+        self._addr = RASPBOT_ADDR
+        self._device = bus if bus is not None else FakeSMBus(1)
+
+    def get_i2c_device(self, address, i2c_bus):
+        self._addr = address
+        return FakeSMBus(1 if i2c_bus is None else i2c_bus)
+
+    # 데이터 쓰기/읽기
+    def write_u8(self, reg, data):
+        try:
+            self._device.write_byte_data(self._addr, reg, data)
+        except:
+            print("write_u8 I2C error")
+
+    def write_reg(self, reg):
+        try:
+            self._device.write_byte(self._addr, reg)
+        except:
+            print("write_u8 I2C error")
+
+    def write_array(self, reg, data):
+        try:
+            self._device.write_i2c_block_data(self._addr, reg, data)
+        except:
+            print("write_array I2C error")
+
+    def read_data_byte(self):
+        try:
+            return self._device.write_byte(self._addr)
+        except:
+            print("read_u8 I2C error")
+
+    def read_data_array(self, reg, len):
+        try:
+            return self._device.read_i2c_block_data(self._addr, reg, len)
+        except:
+            print("read_u8 I2C error")
+
+    # 모터
+    def Ctrl_Car(self, motor_id, motor_dir, motor_speed):
+        try:
+            if motor_dir != 1 and motor_dir != 0:
+                motor_dir = 0
+            motor_speed = max(0, min(motor_speed, 255))
+            self.write_array(0x01, [motor_id, motor_dir, motor_speed])
+        except:
+            print("Ctrl_Car I2C error")
+
+    def Ctrl_Muto(self, motor_id, motor_speed):
+        try:
+            motor_speed = max(-255, min(motor_speed, 255))
+            motor_dir = 1 if motor_speed < 0 else 0
+            self.write_array(0x01, [motor_id, motor_dir, abs(motor_speed)])
+        except:
+            print("Ctrl_Car I2C error")
+
+    # 서보 (원본과 같이 클램프 전 각도를 전송)
+    def Ctrl_Servo(self, id, angle):
+        try:
+            self.write_array(0x02, [id, angle])
+        except:
+            print("Ctrl_Servo I2C error")
+
+    # LED
+    def Ctrl_WQ2812_ALL(self, state, color):
+        try:
+            self.write_array(0x03, [state, color])
+        except:
+            print("Ctrl_WQ2812 I2C error")
+
+    def Ctrl_WQ2812_Alone(self, number, state, color):
+        try:
+            self.write_array(0x04, [number, state, color])
+        except:
+            print("Ctrl_WQ2812_Alone I2C error")
+
+    def Ctrl_WQ2812_brightness_ALL(self, R, G, B):
+        try:
+            self.write_array(0x08, [R, G, B])
+        except:
+            print("Ctrl_WQ2812 I2C error")
+
+    def Ctrl_WQ2812_brightness_Alone(self, number, R, G, B):
+        try:
+            self.write_array(0x09, [number, R, G, B])
+        except:
+            print("Ctrl_WQ2812_Alone I2C error")
+
+    # 스위치
+    def Ctrl_IR_Switch(self, state):
+        try:
+            self.write_array(0x05, [state])
+        except:
+            print("Ctrl_IR_Switch I2C error")
+
+    def Ctrl_BEEP_Switch(self, state):
+        try:
+            self.write_array(0x06, [state])
+        except:
+            print("Ctrl_BEEP_Switch I2C error")
+
+    def Ctrl_Ulatist_Switch(self, state):
+        try:
+            self.write_array(0x07, [state])
+        except:
+            print("Ctrl_getDis_Switch I2C error")
+
+
+def wait(seconds):
+    """짧은 지연은 time.sleep 해상도(~0.1ms)보다 정확하도록 마지막 1ms를 바쁜 대기"""
+    end = time.perf_counter() + seconds
+    if seconds > 2e-3:
+        time.sleep(seconds - 1e-3)
+    while time.perf_counter() < end:
+        pass
+
+
+def save_log(path, log):
+    """트랜잭션 로그를 CSV로 저장 (t는 첫 트랜잭션 기준 초)"""
+    log = list(log)
+    t0 = log[0].t if log else 0.0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(Transaction._fields)
+        for x in log:
+            data = " ".join(str(v) for v in x.data)
+            writer.writerow([f"{x.t - t0:.6f}", x.op, x.addr, x.reg, data, f"{x.duration:.7f}", x.error])
+
+
+def load_log(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            Transaction(
+                float(r["t"]), r["op"], int(r["addr"]), int(r["reg"]),
+                tuple(int(v) for v in r["data"].split()), float(r["duration"]), r["error"],
+            )
+            for r in csv.DictReader(f)
+        ]
+
+
+def install(model=None, sleep=True, raspbot=True):
+    """
+    sys.modules["smbus"]에 가짜 모듈을 주입하고, 이후 생성되는 모든 SMBus가 공유할 FakeSMBus 반환
+    raspbot=True이고 Raspbot_Lib를 import할 수 없으면 sys.modules["Raspbot_Lib"]에 FakeRaspbot도 주입
+    반드시 Raspbot_Lib import 전에 호출
+    """
+    bus = FakeSMBus(1, model, sleep=sleep)
+    module = types.ModuleType("smbus")
+    module.SMBus = lambda *args, **kwargs: bus
+    module.fake_bus = bus
+    sys.modules["smbus"] = module
+
+    if raspbot and "Raspbot_Lib" not in sys.modules:
+        try:
+            import Raspbot_Lib  # noqa: F401, 실제 라이브러리가 가짜 smbus를 사용
+        except ImportError:
+            lib = types.ModuleType("Raspbot_Lib")
+            lib.Raspbot = lambda: FakeRaspbot(bus)
+            lib.PI5Car_I2CADDR = RASPBOT_ADDR
+            sys.modules["Raspbot_Lib"] = lib
+    return bus
@@ -21,9 +21,10 @@ class RobotController:
     로봇 하드웨어 제어 클래스 (모터, 서보, LED, 부저)
     """
 
-    def __init__(self):
+    def __init__(self, bot=None):
+        """bot: Raspbot 호환 객체 (None이면 Raspbot 생성, 테스트 시 fake_raspbot.FakeRaspbot 등)"""
         try:
-            self.bot = Raspbot()
+            self.bot = bot if bot is not None else Raspbot()
             self.stop()
             print("✅ 로봇 하드웨어 초기화 완료")
         except Exception as e:
@@ -85,3 +86,46 @@ class RobotController:
         self.stop()
         self.set_led(0)
         self.bot.Ctrl_BEEP_Switch(0)
+
+
+class RecordingRobot:
+    """
+    하드웨어 없이 RobotController 호출을 기록하는 가짜 로봇 (리플레이/테스트용)
+    """
+
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+        self.frame = 0  # 현재 프레임 번호 (호출 기록에 함께 저장)
+        self.calls = []  # (frame, 메서드 이름, 인자)
+        self.left_speed = 0
+        self.right_speed = 0
+        self.servo = {1: 90, 2: 25}
+        self.led = 0
+
+    def _record(self, name, *args):
+        self.calls.append((self.frame, name, args))
+        if self.verbose:
+            print(f"🤖 [{self.frame}] {name}{args}")
+
+    def set_motor(self, left_speed, right_speed):
+        """좌우 모터 속도 기록 (-255 ~ 255)"""
+        self.left_speed, self.right_speed = left_speed, right_speed
+        self._record("set_motor", left_speed, right_speed)
+
+    def stop(self):
+        self.left_speed = self.right_speed = 0
+        self._record("stop")
+
+    def set_servo(self, servo_id, angle):
+        if servo_id == 2 and angle > 110:
+            angle = 110
+        self.servo[servo_id] = angle
+        self._record("set_servo", servo_id, angle)
+
+    def set_led(self, mode):
+        self.led = mode
+        self._record("set_led", mode)
+
+    def beep(self, duration=0.1):
+        """부저 기록 (대기 없음)"""
+        self._record("beep", duration)
@@ -2,6 +2,8 @@
 import numpy as np
 import random
 
+from .config import SPEED_BOOST, TWO_LINE_SPEED_BOOST
+
 
 class DrivingLogic:
     """자율주행 판단 로직 클래스"""
@@ -38,6 +40,22 @@ class DrivingLogic:
 
         return "UP"
 
+    def motor_speeds(self, direction, up_speed, down_speed, boost=SPEED_BOOST):
+        """
+        방향에 따른 좌우 모터 속도 계산 (autoplot.py control_car와 동일)
+        반환: (left_speed, right_speed), 회전은 제자리 회전이므로 한쪽이 음수
+        """
+        if direction == "UP":
+            boosted_speed = min(up_speed + boost, 255)
+            return boosted_speed, boosted_speed
+        if direction == "LEFT":
+            return -(down_speed - 10), up_speed + 10
+        if direction == "RIGHT":
+            return up_speed + 10, -(down_speed - 10)
+
+        # BLOCKED 등: 정지 후 대체 경로 탐색
+        return 0, 0
+
     def analyze_alternative_path(self, binary_image):
         """
         막다른 길에서 180도 회전 후(또는 주변 탐색 후) 경로 분석
@@ -65,3 +83,96 @@ class DrivingLogic:
             return "RIGHT"
 
         return "LEFT"
+
+
+class LaneCenterLogic:
+    """두 라인 중앙 유지 판단 로직 클래스 (two_line_lane_center.py)"""
+
+    def calculate_histogram(self, binary_frame, roi_start_y=140, roi_height=100):
+        """
+        각 열마다 ROI 영역(roi_start_y부터 roi_height 행)의 픽셀 합계 계산
+        """
+        h = binary_frame.shape[0]
+        roi_start_y = max(0, min(roi_start_y, h - 1))
+        roi_end_y = min(roi_start_y + roi_height, h)
+
+        # 열 단위 반복 대신 한 번에 합산 (결과 동일)
+        return binary_frame[roi_start_y:roi_end_y].sum(axis=0, dtype=np.int32)
+
+    def detect_lane_lines(
+        self, binary_frame, min_lane_width=50, max_lane_width=300, roi_start_y=140, roi_height=100
+    ):
+        """
+        히스토그램으로 좌우 라인 위치 검출
+        반환: (left_lane_pos, right_lane_pos, lane_center), 검출 실패 시 None
+        """
+        w = binary_frame.shape[1]
+        histogram = self.calculate_histogram(binary_frame, roi_start_y, roi_height)
+
+        # 320x240 기준: 왼쪽 0~150, 오른쪽 250~320 / 640x480은 2배
+        if w >= 600:
+            left_search_end, right_search_start, threshold = min(300, w), 500, 2000
+        else:
+            left_search_end, right_search_start, threshold = min(150, w), 250, 1000
+
+        left_lane_pos = None
+        left_region = histogram[:left_search_end]
+        if len(left_region) > 0 and left_region.max() > threshold:
+            left_lane_pos = int(np.argmax(left_region))
+
+        right_lane_pos = None
+        right_region = histogram[right_search_start:]
+        if len(right_region) > 0 and right_region.max() > threshold:
+            right_lane_pos = right_search_start + int(np.argmax(right_region))
+
+        # 두 라인 모두 검출되고 간격이 유효한 경우
+        if left_lane_pos is not None and right_lane_pos is not None:
+            if min_lane_width <= right_lane_pos - left_lane_pos <= max_lane_width:
+                lane_center = (right_lane_pos - left_lane_pos) // 2 + left_lane_pos
+                return left_lane_pos, right_lane_pos, lane_center
+
+        # 한쪽 라인만 검출된 경우 반대쪽 라인 추정
+        if left_lane_pos is not None:
+            estimated_right = left_lane_pos + (w // 3)
+            if estimated_right < w:
+                return left_lane_pos, estimated_right, (left_lane_pos + estimated_right) // 2
+
+        if right_lane_pos is not None:
+            estimated_left = right_lane_pos - (w // 3)
+            if estimated_left >= 0:
+                return estimated_left, right_lane_pos, (estimated_left + right_lane_pos) // 2
+
+        return None, None, None
+
+    def frame_center(self, width):
+        """프레임 중앙 X 위치 (640x480: 320, 320x240: 160)"""
+        if width >= 600:
+            return 320
+        if width >= 300:
+            return 160
+        return width // 2
+
+    def calculate_bias(self, lane_center, frame_center):
+        """
+        편차 = 라인 중앙 - 프레임 중앙 (양수: 오른쪽으로 조정 필요), 라인 없으면 None
+        """
+        if lane_center is None:
+            return None
+        return lane_center - frame_center
+
+    def speeds_by_bias(self, bias, base_speed, p_gain, bias_threshold, boost=TWO_LINE_SPEED_BOOST):
+        """
+        편차 기반 비례 제어 (two_line_lane_center.py control_car_by_bias와 동일)
+        반환: (left_speed, right_speed, direction)
+        """
+        if bias is None:
+            return 0, 0, "STOP"
+
+        if abs(bias) <= bias_threshold:
+            boosted_speed = min(base_speed + boost, 255)
+            return boosted_speed, boosted_speed, "UP"
+
+        speed_diff = abs(max(-base_speed, min(base_speed, int(bias * p_gain))))
+        if bias > 0:
+            return max(0, base_speed - speed_diff), min(255, base_speed + speed_diff), "RIGHT"
+        return min(255, base_speed + speed_diff), max(0, base_speed - speed_diff), "LEFT"
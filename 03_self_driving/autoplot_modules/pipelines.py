@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+하드웨어 없는 실행용 파이프라인 (리플레이 실행기, 시뮬레이터 공용)
+
+각 파이프라인은 process(frame) → binary, decide(binary) → 판단 dict,
+control(판단, robot, tracer) → (left_speed, right_speed) 단계로 나뉘며 params 기본값과
+시뮬레이터 카메라 설치값(camera, simulator.CameraModel 인자)을 가집니다.
+"""
+
+from . import config
+from .logic import DrivingLogic, LaneCenterLogic
+from .vision import ImageProcessor, LaneImageProcessor
+
+
+class AutoplotPipeline:
+    """autoplot.py 파이프라인: 6구역 히스토그램 방향 결정"""
+
+    fields = ("direction",)
+    params = {
+        "roi_top": config.ROI_TOP_DEFAULT,
+        "roi_bottom": config.ROI_BOTTOM_DEFAULT,
+        "r_weight": config.DEFAULT_R_WEIGHT,
+        "g_weight": config.DEFAULT_G_WEIGHT,
+        "b_weight": config.DEFAULT_B_WEIGHT,
+        "detect_value": config.DEFAULT_DETECT_VALUE,
+        "direction_threshold": config.DEFAULT_DIRECTION_THRESHOLD,
+        "up_threshold": config.DEFAULT_UP_THRESHOLD,
+        "up_speed": config.DEFAULT_SPEED_UP,
+        "down_speed": config.DEFAULT_SPEED_DOWN,
+        "speed_boost": config.SPEED_BOOST,
+    }
+    # params 키 → config.py 상수 이름 (튜너 내보내기용)
+    config_names = {
+        "roi_top": "ROI_TOP_DEFAULT",
+        "roi_bottom": "ROI_BOTTOM_DEFAULT",
+        "r_weight": "DEFAULT_R_WEIGHT",
+        "g_weight": "DEFAULT_G_WEIGHT",
+        "b_weight": "DEFAULT_B_WEIGHT",
+        "detect_value": "DEFAULT_DETECT_VALUE",
+        "direction_threshold": "DEFAULT_DIRECTION_THRESHOLD",
+        "up_threshold": "DEFAULT_UP_THRESHOLD",
+        "up_speed": "DEFAULT_SPEED_UP",
+        "down_speed": "DEFAULT_SPEED_DOWN",
+        "speed_boost": "SPEED_BOOST",
+    }
+    # Raspbot v2 전면 카메라 (기울기는 config.DEFAULT_SERVO_2), ROI_TOP/BOTTOM_DEFAULT가 차량 앞 바닥을 보는 높이
+    camera = {"cam_height": 120.0}
+
+    def __init__(self):
+        self.processor = ImageProcessor(0, 0)
+        self.logic = DrivingLogic()
+
+    def process(self, frame, params):
+        self.processor.height, self.processor.width = frame.shape[:2]
+        return self.processor.process(frame, params)["binary"]
+
+    def decide(self, binary, params):
+        direction = self.logic.decide_direction(
+            binary, params["direction_threshold"], params["up_threshold"]
+        )
+        return {"direction": direction}
+
+    def alternative(self, frame, params):
+        """BLOCKED 시 서보를 돌려 찍은 프레임으로 대체 방향 결정 (autoplot.py rotate_servo_and_check_direction)"""
+        return self.logic.analyze_alternative_path(self.process(frame, params))
+
+    def control(self, decision, robot, params, tracer=None):
+        direction = decision["direction"]
+        speeds = self.logic.motor_speeds(
+            direction, params["up_speed"], params["down_speed"], params["speed_boost"]
+        )
+        if tracer is not None:
+            tracer.stamp("enqueue")  # 첫 I2C 쓰기 직전
+        robot.set_motor(*speeds)
+        if config.USE_LED_EFFECTS:
+            robot.set_led(1 if direction == "UP" else 3 if direction in ("LEFT", "RIGHT") else 2)
+        return speeds
+
+
+class TwoLinePipeline:
+    """two_line_lane_center.py 파이프라인: 두 라인 중앙 유지 비례 제어"""
+
+    fields = ("left_lane", "right_lane", "lane_center", "bias", "direction")
+    params = {
+        "roi_top_y": config.TWO_LINE_ROI_TOP_Y,
+        "roi_bottom_y": config.TWO_LINE_ROI_BOTTOM_Y,
+        "r_weight": config.TWO_LINE_R_WEIGHT,
+        "g_weight": config.TWO_LINE_G_WEIGHT,
+        "b_weight": config.TWO_LINE_B_WEIGHT,
+        "min_lane_width": config.TWO_LINE_MIN_LANE_WIDTH,
+        "max_lane_width": config.TWO_LINE_MAX_LANE_WIDTH,
+        "roi_start_y": config.TWO_LINE_ROI_START_Y,
+        "roi_height": config.TWO_LINE_ROI_HEIGHT,
+        "base_speed": config.TWO_LINE_BASE_SPEED,
+        "p_gain": config.TWO_LINE_P_GAIN,
+        "bias_threshold": config.TWO_LINE_BIAS_THRESHOLD,
+        "speed_boost": config.TWO_LINE_SPEED_BOOST,
+    }
+    config_names = {
+        "roi_top_y": "TWO_LINE_ROI_TOP_Y",
+        "roi_bottom_y": "TWO_LINE_ROI_BOTTOM_Y",
+        "r_weight": "TWO_LINE_R_WEIGHT",
+        "g_weight": "TWO_LINE_G_WEIGHT",
+        "b_weight": "TWO_LINE_B_WEIGHT",
+        "min_lane_width": "TWO_LINE_MIN_LANE_WIDTH",
+        "max_lane_width": "TWO_LINE_MAX_LANE_WIDTH",
+        "roi_start_y": "TWO_LINE_ROI_START_Y",
+        "roi_height": "TWO_LINE_ROI_HEIGHT",
+        "base_speed": "TWO_LINE_BASE_SPEED",
+        "p_gain": "TWO_LINE_P_GAIN",
+        "bias_threshold": "TWO_LINE_BIAS_THRESHOLD",
+        "speed_boost": "TWO_LINE_SPEED_BOOST",
+    }
+    # two_line_auto_plot/image 사진의 높은 카메라 마스트, 히스토그램 ROI에 양쪽 라인이 모두 들어오는 높이
+    camera = {"cam_height": 200.0}
+
+    def __init__(self):
+        self.processor = LaneImageProcessor(0, 0)
+        self.logic = LaneCenterLogic()
+
+    def process(self, frame, params):
+        return self.processor.process(frame, params)["binary"]
+
+    def decide(self, binary, params):
+        left, right, center = self.logic.detect_lane_lines(
+            binary,
+            params["min_lane_width"],
+            params["max_lane_width"],
+            params["roi_start_y"],
+            params["roi_height"],
+        )
+        bias = self.logic.calculate_bias(center, self.logic.frame_center(binary.shape[1]))
+        speeds = self.logic.speeds_by_bias(
+            bias, params["base_speed"], params["p_gain"], params["bias_threshold"], params["speed_boost"]
+        )
+        return {
+            "left_lane": left,
+            "right_lane": right,
+            "lane_center": center,
+            "bias": bias,
+            "direction": speeds[2],
+            "speeds": speeds[:2],
+        }
+
+    def control(self, decision, robot, params, tracer=None):
+        if tracer is not None:
+            tracer.stamp("enqueue")
+        if decision["direction"] == "STOP":
+            robot.stop()
+        else:
+            robot.set_motor(*decision["speeds"])
+        return decision["speeds"]
+
+
+PIPELINES = {"autoplot": AutoplotPipeline, "two_line": TwoLinePipeline}
+
+
+def parse_value(v):
+    """KEY=VALUE 값 변환 (int → float → 문자열 순)"""
+    for t in (int, float):
+        try:
+            return t(v)
+        except ValueError:
+            pass
+    return v
+
+
+def make_params(pipeline, overrides=()):
+    """
+    pipeline 기본 params에 "KEY=VALUE" 문자열 목록 또는 dict를 적용한 새 dict
+    """
+    params = dict(pipeline.params)
+    items = overrides.items() if isinstance(overrides, dict) else (kv.split("=", 1) for kv in overrides)
+    for k, v in items:
+        if k not in params:
+            raise KeyError(f"알 수 없는 파라미터: {k} (가능: {', '.join(params)})")
+        params[k] = parse_value(v) if isinstance(v, str) else v
+    return params
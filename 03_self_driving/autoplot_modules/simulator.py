@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+"""
+폐루프 합성 트랙 시뮬레이터 (하드웨어 없는 라인 주행 튜닝용)
+
+- TrackMap      : 위에서 본 2D 트랙 지도 (어두운 바닥 + 밝은 라인), 중심선 기준 진행 거리/횡방향 오차 계산
+- CameraModel   : 차량에 고정된 핀홀 카메라, 바닥 평면 호모그래피로 지도에서 카메라 프레임 렌더링
+- DiffDriveModel: 좌우 모터 명령(-255 ~ 255)으로 움직이는 차동 구동 기구학 모델
+- Simulator     : 렌더링 → 파이프라인(pipelines.py, 실제 ImageProcessor/DrivingLogic 코드) → 모터 명령 → 기구학 반복
+
+좌표: 지도 픽셀 좌표계(x 오른쪽, y 아래)를 mm 단위로 사용, heading 0 = +x, 시계 방향(+y 쪽)이 양수
+"""
+
+import math
+import time
+
+import cv2
+import numpy as np
+
+from . import config
+
+FLOOR_COLOR = (49, 44, 54)  # BGR, 실차 캡처의 어두운 바닥
+LINE_COLOR = (190, 192, 188)  # BGR, 밝은 라인 (레일 윗면)
+WALL_COLOR = (30, 28, 32)  # 지평선 위 (벽/배경)
+
+
+class TrackMap:
+    """
+    중심선 폴리라인(mm)으로 정의한 트랙 지도
+
+    kind: "two_line" (차선 양쪽 라인) 또는 "single_line" (중심선 하나)
+    closed: True면 순환 트랙 (랩 타임 측정), False면 끝이 막힌 트랙 (two_line은 끝에 가로 라인 = 막다른 길)
+    """
+
+    def __init__(self, waypoints, kind="two_line", closed=True, lane_width=300, line_width=40, scale=5.0,
+                 margin=400, noise=6, seed=0):
+        self.kind = kind
+        self.closed = closed
+        self.lane_width = lane_width  # 라인 안쪽 간격 (mm)
+        self.line_width = line_width
+        self.scale = scale  # mm / 픽셀
+
+        pts = np.array(waypoints, dtype=np.float64)
+        pts = pts - pts.min(0) + margin  # 지도 안쪽으로 이동
+        self.size = tuple(int(v) for v in np.ceil((pts.max(0) + margin) / scale))  # (w, h) 픽셀
+
+        # 그리기: two_line은 (차선 + 라인) 두께의 띠를 그리고 안쪽을 바닥색으로 다시 칠해 양쪽 라인을 만듦
+        image = np.full((self.size[1], self.size[0], 3), FLOOR_COLOR, dtype=np.uint8)
+        poly = [np.round(pts / scale * 16).astype(np.int32)]  # 4비트 소수점 좌표
+        px = lambda mm: max(int(round(mm / scale)), 1)
+        if kind == "two_line":
+            cv2.polylines(image, poly, closed, LINE_COLOR, px(lane_width + 2 * line_width), cv2.LINE_AA, 4)
+            cv2.polylines(image, poly, closed, FLOOR_COLOR, px(lane_width), cv2.LINE_AA, 4)
+        else:
+            cv2.polylines(image, poly, closed, LINE_COLOR, px(line_width), cv2.LINE_AA, 4)
+        if noise:  # 바닥 질감
+            rng = np.random.default_rng(seed)
+            image = cv2.add(image, rng.integers(0, noise, image.shape, dtype=np.uint8))
+        self.image = image
+
+        # 중심선을 scale 간격으로 다시 샘플링 (진행 거리 s, 횡방향 오차 계산용)
+        if closed:
+            pts = np.vstack((pts, pts[:1]))
+        seg = np.diff(pts, axis=0)
+        seg_len = np.hypot(*seg.T)
+        s = np.concatenate(([0.0], np.cumsum(seg_len)))
+        self.length = s[-1]  # 중심선 길이 (mm)
+        self.s = np.arange(0.0, self.length, scale)
+        i = np.clip(np.searchsorted(s, self.s, side="right") - 1, 0, len(seg) - 1)
+        t = ((self.s - s[i]) / seg_len[i])[:, None]
+        self.centerline = pts[i] + seg[i] * t
+        self.heading = np.arctan2(seg[i, 1], seg[i, 0])
+
+    def start_pose(self):
+        """중심선 시작점, 진행 방향 (x, y, heading)"""
+        return self.centerline[0, 0], self.centerline[0, 1], self.heading[0]
+
+    def pose(self, distance, offset=0.0, yaw=0.0):
+        """중심선 distance(mm) 지점에서 왼쪽으로 offset(mm), 진행 방향에서 yaw(도) 돌린 자세 (x, y, heading)"""
+        j = min(int(distance / self.scale), len(self.s) - 1)
+        h = self.heading[j]
+        x, y = self.centerline[j]
+        return x + offset * math.sin(h), y - offset * math.cos(h), h + math.radians(yaw)
+
+    def locate(self, x, y, hint=None, window=400):
+        """
+        (x, y)에서 가장 가까운 중심선 샘플 번호와 부호 있는 횡방향 오차(mm, 진행 방향 왼쪽이 +)
+        hint: 이전 샘플 번호, 주변 window 샘플만 검색 (교차/근접 구간에서 다른 구간으로 튀는 것 방지)
+        """
+        n = len(self.s)
+        if hint is None or 2 * window >= n:
+            idx = np.arange(n)
+        else:
+            idx = np.arange(hint - window, hint + window)
+            idx = idx % n if self.closed else idx[(idx >= 0) & (idx < n)]
+        d = self.centerline[idx] - (x, y)
+        j = idx[np.argmin(np.einsum("ij,ij->i", d, d))]
+        h = self.heading[j]
+        dx, dy = x - self.centerline[j, 0], y - self.centerline[j, 1]
+        return int(j), dx * math.sin(h) - dy * math.cos(h)
+
+
+def round_corners(waypoints, radius, closed=True, step=10.0):
+    """
+    폴리라인 꼭짓점을 반경 radius(mm) 원호로 바꾼 점 목록 (원호 점 간격 약 step mm)
+    순환 트랙은 첫 꼭짓점 원호가 끝나는 점에서 시작 (원래 첫 구간 방향으로 출발)
+    """
+    pts = np.asarray(waypoints, dtype=np.float64)
+    out, start = [], 0
+    for i, b in enumerate(pts):
+        if not closed and i in (0, len(pts) - 1):
+            out.append(b)
+            continue
+        u, v = pts[i - 1] - b, pts[(i + 1) % len(pts)] - b
+        u, v = u / np.hypot(*u), v / np.hypot(*v)
+        half = math.acos(max(-1.0, min(1.0, float(u @ v)))) / 2  # 꼭짓점 내각의 절반
+        if half > math.pi / 2 - 1e-6:  # 직선 위의 점
+            out.append(b)
+            continue
+        center = b + (u + v) / np.hypot(*(u + v)) * radius / math.sin(half)
+        t0, t1 = (math.atan2(p[1] - center[1], p[0] - center[0]) for p in (b + u * radius / math.tan(half),
+                                                                          b + v * radius / math.tan(half)))
+        sweep = (t1 - t0 + math.pi) % (2 * math.pi) - math.pi
+        t = np.linspace(t0, t0 + sweep, max(int(abs(sweep) * radius / step), 1) + 1)
+        out.extend(center + radius * np.stack((np.cos(t), np.sin(t)), 1))
+        if i == 0:
+            start = len(out) - 1
+    return np.array(out[start:] + out[:start])
+
+
+def track_preset(name, corner_radius=300, **kwargs):
+    """
+    01_Movies/자율주행_테스트_화면_캡쳐 상황을 본뜬 트랙
+      oval     : 둥근 순환 트랙 (완만한 곡선)
+      corners  : 좌/우 90도 코너가 모두 있는 순환 트랙, 코너는 중심선 반경 corner_radius(mm) 원호 (0이면 꺾인 코너)
+      single   : corners와 같은 경로, 중심 라인 하나
+      dead_end : 직선 → 좌회전 → 막다른 길
+    """
+    if name == "oval":
+        a = np.linspace(0, 2 * np.pi, 73)[:-1]
+        waypoints = np.stack((1200 * np.cos(a), 700 * np.sin(a)), 1)
+        return TrackMap(waypoints, "two_line", True, **kwargs)
+    corners = [(0, 0), (2000, 0), (2000, 1000), (1200, 1000), (1200, 1800), (0, 1800)]
+    if corner_radius:
+        corners = round_corners(corners, corner_radius)
+    if name == "corners":
+        return TrackMap(corners, "two_line", True, **kwargs)
+    if name == "single":
+        return TrackMap(corners, "single_line", True, **kwargs)
+    if name == "dead_end":
+        return TrackMap([(0, 0), (1500, 0), (1500, -1000)], "two_line", False, **kwargs)
+    raise KeyError(f"알 수 없는 트랙: {name} (가능: oval, corners, single, dead_end)")
+
+
+def servo_pitch(angle):
+    """서보 2(상하) 각도 → 카메라가 수평에서 아래로 숙인 각도 (도), 서보 2 = 0이 바로 아래"""
+    return 90.0 - angle
+
+
+class CameraModel:
+    """
+    차량 고정 핀홀 카메라 (바닥 평면만 렌더링, 지평선 위는 WALL_COLOR)
+
+    cam_height: 바닥에서 카메라까지 높이 (mm), offset: 차량 중심에서 카메라까지 전방 거리 (mm)
+    pitch: 아래로 숙인 각도 (도, None이면 config.DEFAULT_SERVO_2에서 계산), hfov: 수평 화각 (도)
+    pan: 서보 1 기준 좌우 회전 (도, 왼쪽 +)
+    """
+
+    def __init__(self, width=320, height=240, hfov=90.0, cam_height=120.0, offset=60.0, pitch=None):
+        self.width, self.height = width, height
+        self.f = (width / 2) / math.tan(math.radians(hfov) / 2)
+        self.cx, self.cy = (width - 1) / 2, (height - 1) / 2
+        self.cam_height = cam_height
+        self.offset = offset
+        self.pitch = math.radians(servo_pitch(config.DEFAULT_SERVO_2) if pitch is None else pitch)
+        self.horizon = self.cy - self.f * math.tan(self.pitch)  # 지평선 행 (이보다 위는 바닥이 아님)
+
+    def ground(self, u, v):
+        """이미지 픽셀 (u, v) 광선이 바닥과 만나는 점 (차량 좌표 mm: 전방, 왼쪽)"""
+        xc, yc = (u - self.cx) / self.f, (v - self.cy) / self.f
+        cp, sp = math.cos(self.pitch), math.sin(self.pitch)
+        forward, up = cp - yc * sp, -yc * cp - sp
+        t = self.cam_height / -up
+        return self.offset + t * forward, -t * xc
+
+    def render(self, track, x, y, heading, pan=0.0):
+        """차량 자세 (x, y mm, heading rad)에서 본 BGR 카메라 프레임"""
+        top = max(int(math.ceil(self.horizon)) + 1, 0)
+        if top >= self.height:
+            return np.full((self.height, self.width, 3), WALL_COLOR, dtype=np.uint8)
+
+        # 바닥 영역 네 모서리의 지도 좌표로 호모그래피 계산 (이미지 → 지도)
+        h = heading - math.radians(pan)
+        ch, sh = math.cos(h), math.sin(h)
+        src, dst = [], []
+        for u, v in ((0, top), (self.width - 1, top), (self.width - 1, self.height - 1), (0, self.height - 1)):
+            fwd, left = self.ground(u, v)
+            src.append((u, v))
+            dst.append(((x + fwd * ch + left * sh) / track.scale, (y + fwd * sh - left * ch) / track.scale))
+        m = cv2.getPerspectiveTransform(np.float32(src), np.float32(dst))
+
+        frame = cv2.warpPerspective(
+            track.image, m, (self.width, self.height),
+            flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP,
+            borderMode=cv2.BORDER_CONSTANT, borderValue=FLOOR_COLOR,
+        )
+        frame[:top] = WALL_COLOR
+        return frame
+
+
+def make_camera(pipeline, size=(640, 480), **overrides):
+    """파이프라인 기본 카메라 설치값(pipeline.camera)에 None이 아닌 overrides를 적용한 CameraModel"""
+    kwargs = dict(pipeline.camera, **{k: v for k, v in overrides.items() if v is not None})
+    return CameraModel(*size, **kwargs)
+
+
+class DiffDriveModel:
+    """
+    차동 구동 기구학 모델: 바퀴 속도 = 모터 명령 x mm_per_unit, 1차 지연(tau)으로 명령 추종
+
+    wheel_base: 좌우 바퀴 간격 (mm), mm_per_unit: 모터 명령 1당 바퀴 속도 (mm/s, 실차 측정으로 보정)
+    """
+
+    def __init__(self, x=0.0, y=0.0, heading=0.0, wheel_base=150.0, mm_per_unit=4.0, tau=0.1):
+        self.x, self.y, self.heading = x, y, heading
+        self.wheel_base = wheel_base
+        self.mm_per_unit = mm_per_unit
+        self.tau = tau
+        self.v_left = self.v_right = 0.0  # 현재 바퀴 속도 (mm/s)
+
+    def step(self, left_cmd, right_cmd, dt):
+        a = 1.0 if self.tau <= 0 else 1 - math.exp(-dt / self.tau)
+        self.v_left += (max(-255, min(255, left_cmd)) * self.mm_per_unit - self.v_left) * a
+        self.v_right += (max(-255, min(255, right_cmd)) * self.mm_per_unit - self.v_right) * a
+
+        v = (self.v_left + self.v_right) / 2
+        w = (self.v_left - self.v_right) / self.wheel_base  # 오른쪽 바퀴가 빠르면 왼쪽(반시계, -)으로 회전
+        if abs(w) < 1e-9:
+            self.x += v * dt * math.cos(self.heading)
+            self.y += v * dt * math.sin(self.heading)
+        else:  # 원호 적분
+            r = v / w
+            h2 = self.heading + w * dt
+            self.x += r * (math.sin(h2) - math.sin(self.heading))
+            self.y -= r * (math.cos(h2) - math.cos(self.heading))
+            self.heading = h2
+        return self.x, self.y, self.heading
+
+
+class Simulator:
+    """
+    트랙 + 카메라 + 차량 + 파이프라인 폐루프 실행
+
+    fps: 제어 루프 주기 (autoplot.py는 waitKey(30) + sleep(0.05)로 약 10Hz)
+    scan_time: BLOCKED 시 서보 탐색에 걸리는 정지 시간 (autoplot.py sleep 0.3 + 0.5 + 0.3초)
+    off_track: 중심선에서 이 거리(mm) 이상 벗어나면 이탈로 종료 (None이면 lane_width / 2)
+    stall_time: 이 시간(s) 동안 진행이 없으면 정체로 종료
+    """
+
+    def __init__(self, track, pipeline, params, robot=None, camera=None, car=None, fps=10.0, scan_time=1.1,
+                 off_track=None, stall_time=10.0):
+        self.track = track
+        self.pipeline = pipeline
+        self.params = params
+        self.robot = robot
+        self.camera = camera or make_camera(pipeline)
+        self.car = car or DiffDriveModel(*track.start_pose())
+        self.dt = 1.0 / fps
+        self.scan_time = scan_time
+        self.off_track = off_track or track.lane_width / 2
+        self.stall_time = stall_time
+
+    def run(self, max_time=120.0, laps=1):
+        """
+        시뮬레이션 실행, (steps, result) 반환
+        steps: 스텝별 dict (t, x, y, heading, progress, cte, 판단, 속도, 단계별 시간 ms)
+        result: status (lap / finished / off_track / stalled / timeout), 랩 타임, 횡방향 오차 통계, 루프 지연
+        """
+        track, car = self.track, self.car
+        j, cte = track.locate(car.x, car.y)
+        progress = 0.0  # 누적 진행 거리 (mm, 중심선 기준)
+        best, best_t = 0.0, 0.0  # 정체 판단용 최대 진행 거리와 그 시각
+        lap_times, t, status, steps = [], 0.0, "timeout", []
+
+        while t < max_time:
+            t0 = time.perf_counter()
+            frame = self.camera.render(track, car.x, car.y, car.heading)
+            t1 = time.perf_counter()
+            binary = self.pipeline.process(frame, self.params)
+            t2 = time.perf_counter()
+            decision = self.pipeline.decide(binary, self.params)
+
+            # 막다른 길: 서보를 180도(왼쪽 90도)로 돌려 찍은 프레임으로 대체 방향 결정, 그동안 정지
+            scan = decision.get("direction") == "BLOCKED" and hasattr(self.pipeline, "alternative")
+            if scan:
+                side = self.camera.render(track, car.x, car.y, car.heading, pan=90)
+                decision["direction"] = self.pipeline.alternative(side, self.params)
+            t3 = time.perf_counter()
+            if self.robot is not None:
+                self.robot.frame = len(steps)
+            left, right = self.pipeline.control(decision, self.robot or _NullRobot, self.params)
+            t4 = time.perf_counter()
+
+            if scan:
+                car.step(0, 0, self.scan_time)
+                t += self.scan_time
+            car.step(left, right, self.dt)
+            t += self.dt
+
+            j2, cte = track.locate(car.x, car.y, j)
+            ds = (j2 - j) * track.scale
+            if track.closed:  # 시작점 통과 시 번호가 돌아감
+                period = len(track.s) * track.scale
+                ds = (ds + period / 2) % period - period / 2
+            progress += ds
+            j = j2
+
+            row = {"t": round(t, 3), "x": round(car.x, 1), "y": round(car.y, 1),
+                   "heading": round(math.degrees(car.heading), 1), "progress": round(progress, 1), "cte": round(cte, 1)}
+            row.update((k, decision[k]) for k in self.pipeline.fields)
+            row["left_speed"], row["right_speed"], row["scan"] = left, right, int(scan)
+            for k, a, b in zip(("render", "process", "decide", "control"), (t0, t1, t2, t3), (t1, t2, t3, t4)):
+                row[f"{k}_ms"] = round((b - a) * 1e3, 3)
+            steps.append(row)
+
+            if abs(cte) > self.off_track:
+                status = "off_track"
+                break
+            if track.closed and progress >= track.length * (len(lap_times) + 1):
+                lap_times.append(t)
+                if len(lap_times) >= laps:
+                    status = "lap"
+                    break
+            if not track.closed and j >= len(track.s) - 1 - self.off_track / track.scale:
+                status = "finished"
+                break
+            if progress > best + 10:
+                best, best_t = progress, t
+            elif t - best_t > self.stall_time:
+                status = "stalled"
+                break
+
+        return steps, self.result(steps, status, lap_times)
+
+    def result(self, steps, status, lap_times):
+        cte = np.array([r["cte"] for r in steps])
+        loop = np.array([r["render_ms"] + r["process_ms"] + r["decide_ms"] + r["control_ms"] for r in steps])
+        return {
+            "status": status,
+            "time": steps[-1]["t"] if steps else 0.0,
+            "laps": [round(b - a, 2) for a, b in zip([0.0] + lap_times[:-1], lap_times)],
+            "progress": steps[-1]["progress"] if steps else 0.0,
+            "track_length": self.track.length,
+            "cte_rms": float(np.sqrt(np.mean(cte ** 2))) if len(cte) else 0.0,
+            "cte_max": float(np.abs(cte).max()) if len(cte) else 0.0,
+            "scans": sum(r["scan"] for r in steps),
+            "steps": len(steps),
+            "loop_p50_ms": float(np.percentile(loop, 50)) if len(loop) else 0.0,
+            "loop_p95_ms": float(np.percentile(loop, 95)) if len(loop) else 0.0,
+            "steps_per_s": 1e3 / loop.mean() if len(loop) else 0.0,
+        }
+
+    def draw(self, steps):
+        """지도에 주행 궤적을 그린 BGR 이미지 (초록: 시작, 빨강: 끝)"""
+        image = self.track.image.copy()
+        pts = np.array([(r["x"], r["y"]) for r in steps]) / self.track.scale
+        if len(pts):
+            cv2.polylines(image, [np.round(pts * 16).astype(np.int32)], False, (0, 200, 255), 2, cv2.LINE_AA, 4)
+            cv2.circle(image, tuple(np.round(pts[0]).astype(int)), 6, (0, 255, 0), -1)
+            cv2.circle(image, tuple(np.round(pts[-1]).astype(int)), 6, (0, 0, 255), -1)
+        return image
+
+
+class _NullRobot:
+    """robot 없이 실행할 때 모터 명령을 버리는 대상"""
+
+    @staticmethod
+    def set_motor(left_speed, right_speed):
+        pass
+
+    @staticmethod
+    def stop():
+        pass
+
+    @staticmethod
+    def set_led(mode):
+        pass
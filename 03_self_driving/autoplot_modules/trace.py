@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+프레임별 지연 추적 (운영 주행 중에도 켜 둘 수 있는 가벼운 계측)
+
+주행 루프에서 프레임 시작(begin)과 단계 종료 시각(stamp)을 perf_counter_ns로 기록하고
+고정 크기 링 버퍼에 최근 capacity 프레임만 보관합니다. 기록은 리스트 원소 대입뿐이라
+프레임당 수 마이크로초 이하 (10Hz 루프의 1% = 1ms보다 훨씬 작음)입니다.
+
+단계 (기본 STAGES, 각 시각은 해당 단계가 끝난 시점):
+  capture  : 카메라 프레임 읽기 완료
+  process  : 이미지 처리 (원근 변환, 이진화) 완료
+  decide   : 히스토그램 / 방향 결정 완료 (BLOCKED 서보 탐색 포함)
+  enqueue  : 모터 속도 계산 후 첫 I2C 쓰기 직전 (방향이 없어 모터 명령이 없으면 미기록)
+  i2c_done : 모터/LED I2C 쓰기 완료
+
+저장: dump_csv (프레임별 단계 시간 ms), dump_chrome (chrome://tracing, Perfetto에서 열기)
+"""
+
+import atexit
+import json
+import time
+
+import numpy as np
+
+STAGES = ("capture", "process", "decide", "enqueue", "i2c_done")
+
+
+class FrameTracer:
+    """
+    capacity: 링 버퍼 프레임 수, deadline_ms: 프레임 시작 → 마지막 단계 마감 시간 (초과 시 deadline miss)
+    enabled: False면 begin/stamp가 바로 반환 (계측 끄기)
+    """
+
+    def __init__(self, capacity=2048, deadline_ms=100.0, stages=STAGES, enabled=True):
+        self.stages = tuple(stages)
+        self.index = {s: i + 1 for i, s in enumerate(self.stages)}  # 행의 0번은 프레임 시작 시각
+        self.capacity = capacity
+        self.deadline_ms = deadline_ms
+        self.enabled = enabled
+        self.ring = [[0] * (len(self.stages) + 1) for _ in range(capacity)]
+        self.zeros = [0] * len(self.stages)
+        self.count = 0  # 시작한 전체 프레임 수
+        self.row = None  # 현재 프레임 행
+
+    def begin(self):
+        """프레임 시작 (카메라 읽기 직전)"""
+        if not self.enabled:
+            return
+        row = self.ring[self.count % self.capacity]
+        row[0] = time.perf_counter_ns()
+        row[1:] = self.zeros
+        self.row = row
+        self.count += 1
+
+    def stamp(self, stage):
+        """현재 프레임의 stage 종료 시각 기록"""
+        if self.row is not None:
+            self.row[self.index[stage]] = time.perf_counter_ns()
+
+    def records(self):
+        """
+        링 버퍼의 프레임을 오래된 순서로 반환: (프레임 번호, 시작 ns, [단계 종료 ns 또는 0])
+        기록한 단계가 하나도 없는 프레임(카메라 읽기 실패 등)과 마지막 단계를 기록하지 못한 진행 중 프레임은 제외
+        → 반환하는 모든 프레임에 0이 아닌 단계 시각이 하나 이상 있음 (table, dump_chrome 공통)
+        """
+        n = min(self.count, self.capacity)
+        out = []
+        for frame in range(self.count - n, self.count):
+            row = self.ring[frame % self.capacity]
+            stamps = row[1:]
+            if not any(stamps) or (frame == self.count - 1 and not stamps[-1]):
+                continue
+            out.append((frame, row[0], stamps))
+        return out
+
+    def table(self):
+        """
+        records를 ms 배열로 변환
+        반환: frames, start (첫 프레임 기준 ms), stage (프레임 x 단계, 이전 기록 단계부터의 ms, 미기록은 nan), total
+        """
+        records = self.records()
+        if not records:
+            empty = np.zeros((0, len(self.stages)))
+            return np.zeros(0, int), np.zeros(0), empty, np.zeros(0)
+        frames = np.array([r[0] for r in records])
+        start = np.array([r[1] for r in records], dtype=np.float64)
+        stamps = np.array([r[2] for r in records], dtype=np.float64)
+        stamps[stamps == 0] = np.nan
+
+        # 이전에 기록된 단계(없으면 프레임 시작)부터의 시간
+        prev = np.concatenate((start[:, None], stamps[:, :-1]), 1)
+        prev = _ffill(prev)
+        stage = (stamps - prev) / 1e6
+        total = (np.nanmax(stamps, 1) - start) / 1e6
+        return frames, (start - start[0]) / 1e6, stage, total
+
+    def summary(self):
+        """단계별/전체 p50, p95, p99, max (ms), 프레임 주기, deadline miss 수"""
+        frames, start, stage, total = self.table()
+        stats = {}
+        for k, s in enumerate(self.stages):
+            v = stage[:, k][~np.isnan(stage[:, k])]
+            if len(v):
+                stats[s] = dict(zip(("p50", "p95", "p99", "max"), np.percentile(v, [50, 95, 99, 100])))
+        if len(total):
+            stats["total"] = dict(zip(("p50", "p95", "p99", "max"), np.percentile(total, [50, 95, 99, 100])))
+        period = np.diff(start)
+        return {
+            "frames": len(frames),
+            "stages": stats,
+            "period_ms": float(np.median(period)) if len(period) else 0.0,
+            "deadline_ms": self.deadline_ms,
+            "deadline_miss": int(np.sum(total > self.deadline_ms)),
+        }
+
+    def print_summary(self):
+        s = self.summary()
+        if not s["frames"]:
+            print("⏱️  추적된 프레임이 없습니다")
+            return
+        print(f"\n{'stage':>10s}{'p50':>9s}{'p95':>9s}{'p99':>9s}{'max':>9s}  (ms)")
+        for k, v in s["stages"].items():
+            print(f"{k:>10s}{v['p50']:9.2f}{v['p95']:9.2f}{v['p99']:9.2f}{v['max']:9.2f}")
+        fps = 1e3 / s["period_ms"] if s["period_ms"] else 0.0
+        print(
+            f"⏱️  최근 {s['frames']} 프레임, {fps:.1f} FPS, 마감 {s['deadline_ms']:.0f}ms 초과"
+            f" {s['deadline_miss']}회 ({s['deadline_miss'] / s['frames']:.1%})"
+        )
+
+    def dump_csv(self, path):
+        """프레임별 행: frame, start_ms, 단계별 ms, total_ms, deadline_miss"""
+        frames, start, stage, total = self.table()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(",".join(["frame", "start_ms"] + [f"{s}_ms" for s in self.stages] + ["total_ms", "deadline_miss"]))
+            f.write("\n")
+            for i in range(len(frames)):
+                cells = [str(frames[i]), f"{start[i]:.3f}"]
+                cells += ["" if np.isnan(v) else f"{v:.3f}" for v in stage[i]]
+                cells += [f"{total[i]:.3f}", str(int(total[i] > self.deadline_ms))]
+                f.write(",".join(cells) + "\n")
+        return path
+
+    def dump_chrome(self, path):
+        """
+        Chrome trace JSON (chrome://tracing, ui.perfetto.dev)
+        tid 0: 프레임 전체, tid 1: 단계별 구간, deadline miss는 instant 이벤트
+        """
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": 0, "tid": 0, "args": {"name": "frame"}},
+            {"name": "thread_name", "ph": "M", "pid": 0, "tid": 1, "args": {"name": "stages"}},
+        ]
+        records = self.records()
+        t0 = records[0][1] if records else 0
+        for frame, start, stamps in records:
+            prev = start
+            end = max(stamps)
+            events.append({"name": f"frame {frame}", "ph": "X", "pid": 0, "tid": 0,
+                           "ts": (start - t0) / 1e3, "dur": (end - start) / 1e3})
+            for s, t in zip(self.stages, stamps):
+                if not t:
+                    continue
+                events.append({"name": s, "ph": "X", "pid": 0, "tid": 1, "ts": (prev - t0) / 1e3,
+                               "dur": (t - prev) / 1e3, "args": {"frame": frame}})
+                prev = t
+            if (end - start) / 1e6 > self.deadline_ms:
+                events.append({"name": "deadline miss", "ph": "i", "s": "t", "pid": 0, "tid": 0,
+                               "ts": (end - t0) / 1e3, "args": {"frame": frame, "ms": (end - start) / 1e6}})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return path
+
+    def dump(self, prefix="trace"):
+        """prefix.csv, prefix.json 저장 후 요약 출력"""
+        if not self.count:
+            return
+        self.dump_csv(f"{prefix}.csv")
+        self.dump_chrome(f"{prefix}.json")
+        print(f"💾 추적 저장: {prefix}.csv, {prefix}.json (chrome://tracing)")
+        self.print_summary()
+
+    def dump_on_exit(self, prefix="trace"):
+        """프로세스 종료 시 dump (Ctrl+C, 예외 종료 포함)"""
+        atexit.register(self.dump, prefix)
+
+
+def _ffill(a):
+    """행마다 nan을 왼쪽 값으로 채움 (첫 열은 nan이 아님)"""
+    a = a.copy()
+    for k in range(1, a.shape[1]):
+        m = np.isnan(a[:, k])
+        a[m, k] = a[m, k - 1]
+    return a
@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+"""
+오프라인 파라미터 튜너 (트랙바 수동 조정 대체)
+
+- SearchSpace: 파라미터별 후보 값 목록 (랜덤 샘플링, 그리드 열거)
+- SimTask    : 시뮬레이터(simulator.py) 트랙 주행으로 평가, 예산 = 시뮬레이션 시간 (s)
+- ReplayTask : 녹화 프레임(ReplayCamera)으로 평가, 예산 = 프레임 수
+- Tuner      : 프로세스 풀로 평가를 병렬 실행하는 random / grid / successive halving 탐색
+- export_config: 최적 파라미터를 config.py 형식으로 저장
+
+비용(cost)은 낮을수록 좋고 같은 평가 대상(task) 안에서만 비교합니다.
+  sim   : 예상 랩 타임 (완주 시 주행 시간, 아니면 예산 / 진행률) x (1 + flip_weight x 판단 변경률)
+  replay: flip_weight x 판단 변경률 + lost_weight x 라인 유실률 (+ ref_weight x 기준 CSV 불일치율)
+"""
+
+import csv
+import itertools
+import math
+import multiprocessing
+import os
+import random
+import re
+import time
+
+import numpy as np
+
+from .pipelines import PIPELINES, make_params, parse_value
+from .simulator import DiffDriveModel, Simulator, make_camera, track_preset
+from .vision import ReplayCamera
+
+# 파이프라인별 기본 탐색 공간 ("lo:hi:step" 범위 또는 "a,b,c" 목록)
+SPACES = {
+    "autoplot": {
+        "detect_value": "80:150:10",
+        "r_weight": "0:100:10",
+        "g_weight": "0:100:10",
+        "b_weight": "0:100:10",
+        "roi_top": "500:900:50",
+        "roi_bottom": "700:1000:50",
+        "direction_threshold": "10000:200000:10000",
+        "up_threshold": "20000:400000:20000",  # 0이면 BLOCKED 판단이 꺼짐
+    },
+    "two_line": {
+        "r_weight": "0:100:10",
+        "g_weight": "0:100:10",
+        "b_weight": "0:100:10",
+        "roi_top_y": "100:500:50",
+        "roi_bottom_y": "600:1000:50",
+        "p_gain": "0.1:1.5:0.1",
+        "bias_threshold": "0:40:5",
+        "base_speed": "20:50:5",
+    },
+}
+
+# 라인을 찾지 못한 판단 (유실률 계산용)
+LOST = {"BLOCKED", "STOP"}
+
+# 함께 만족해야 하는 순서 조건 (작은 값, 큰 값)
+ORDERED = (("roi_top", "roi_bottom"), ("roi_top_y", "roi_bottom_y"), ("min_lane_width", "max_lane_width"))
+
+# 모두 0이면 그레이스케일이 검정이 되는 가중치 (하나 이상 0보다 커야 함)
+WEIGHTS = ("r_weight", "g_weight", "b_weight")
+
+GRID_LIMIT = 100000  # limit 없이 평가할 수 있는 최대 그리드 조합 수
+GRID_CHUNK = 1000  # 그리드를 한 번에 평가하는 조합 수 (전체 조합을 메모리에 올리지 않음)
+SAMPLE_TRIES = 1000  # 유효한 조합을 찾기 위한 최대 샘플링 횟수
+
+
+def parse_range(spec):
+    """"lo:hi:step" (hi 포함) 또는 "a,b,c" → 후보 값 목록"""
+    if ":" in spec:
+        lo, hi, step = (parse_value(v) for v in spec.split(":"))
+        n = int(math.floor((hi - lo) / step + 1e-9)) + 1
+        values = [lo + i * step for i in range(n)]
+        return [round(v, 6) if isinstance(v, float) else v for v in values]
+    return [parse_value(v) for v in spec.split(",")]
+
+
+def flip_rate(directions):
+    """연속 판단 중 방향이 바뀐 비율 (0 ~ 1)"""
+    if len(directions) < 2:
+        return 0.0
+    return sum(a != b for a, b in zip(directions, directions[1:])) / (len(directions) - 1)
+
+
+class SearchSpace:
+    """
+    파라미터 이름 → 후보 값 목록
+    """
+
+    def __init__(self, pipeline, specs=None):
+        self.dims = {k: parse_range(v) for k, v in SPACES[pipeline].items()}
+        items = specs.items() if isinstance(specs, dict) else (kv.split("=", 1) for kv in specs or ())
+        for k, v in items:
+            if k not in PIPELINES[pipeline].params:
+                raise KeyError(f"알 수 없는 파라미터: {k}")
+            if v:
+                self.dims[k] = parse_range(v)
+            else:  # "KEY=" : 탐색에서 제외 (기본값 고정)
+                self.dims.pop(k, None)
+
+    @property
+    def size(self):
+        return math.prod(len(v) for v in self.dims.values())
+
+    @staticmethod
+    def valid(params):
+        if all(params.get(k) == 0 for k in WEIGHTS):
+            return False
+        return all(params[a] < params[b] for a, b in ORDERED if a in params and b in params)
+
+    def check(self, base):
+        """base와 후보 값으로 모든 순서 조건을 만족할 수 있는지 확인 (불가능하면 ValueError)"""
+        for a, b in ORDERED:
+            if a in base and b in base:
+                lo, hi = self.dims.get(a, [base[a]]), self.dims.get(b, [base[b]])
+                if min(lo) >= max(hi):
+                    raise ValueError(f"{a} < {b}를 만족하는 조합이 없습니다: {a} {lo}, {b} {hi}")
+
+    def sample(self, rng, base):
+        """base params에 후보 값을 무작위로 적용한 유효한 params"""
+        for _ in range(SAMPLE_TRIES):
+            params = dict(base, **{k: rng.choice(v) for k, v in self.dims.items()})
+            if self.valid(params):
+                return params
+        raise ValueError(f"{SAMPLE_TRIES}회 샘플링에서 유효한 조합을 찾지 못했습니다: {self}")
+
+    def grid(self, base):
+        """모든 후보 조합을 순서대로 생성 (유효하지 않은 조합 제외)"""
+        keys = list(self.dims)
+        for values in itertools.product(*self.dims.values()):
+            params = dict(base, **dict(zip(keys, values)))
+            if self.valid(params):
+                yield params
+
+    def __repr__(self):
+        return ", ".join(f"{k}[{len(v)}]" for k, v in self.dims.items()) + f" = {self.size} 조합"
+
+
+class SimTask:
+    """
+    시뮬레이터 트랙 주행 평가, 트랙별 비용 합계
+    budget: 트랙당 최대 시뮬레이션 시간 (s)
+    """
+
+    def __init__(self, pipeline, tracks=("corners",), size=(640, 480), camera=None, track=None, car=None,
+                 fps=10.0, flip_weight=0.5):
+        self.pipeline_name = pipeline
+        self.tracks = tracks
+        self.size = size
+        self.camera_kwargs = camera or {}
+        self.track_kwargs = track or {}
+        self.car_kwargs = car or {}
+        self.fps = fps
+        self.flip_weight = flip_weight
+
+    def load(self):
+        """워커 프로세스에서 한 번 호출: 파이프라인과 트랙 준비"""
+        self.pipeline = PIPELINES[self.pipeline_name]()
+        self.maps = [track_preset(name, **self.track_kwargs) for name in self.tracks]
+        self.camera = make_camera(self.pipeline, self.size, **self.camera_kwargs)
+
+    def evaluate(self, params, budget):
+        cost, flips, laps, progress, cte = 0.0, [], [], [], []
+        for track in self.maps:
+            car = DiffDriveModel(*track.start_pose(), **self.car_kwargs)
+            sim = Simulator(track, self.pipeline, params, camera=self.camera, car=car, fps=self.fps)
+            steps, result = sim.run(max_time=budget)
+            done = result["status"] in ("lap", "finished")
+            ratio = min(max(result["progress"] / track.length, 0.0), 1.0)
+            flips.append(flip_rate([r["direction"] for r in steps]))
+            lap = result["time"] if done else budget / max(ratio, 1e-3)  # 미완주: 현재 진행 속도로 예상한 랩 타임
+            cost += lap * (1 + self.flip_weight * flips[-1])
+            laps.append(result["time"] if done else None)
+            progress.append(ratio)
+            cte.append(result["cte_rms"])
+        return {
+            "cost": cost,
+            "flips": float(np.mean(flips)),
+            "progress": float(np.mean(progress)),
+            "lap_time": sum(laps) if all(t is not None for t in laps) else None,
+            "cte_rms": float(np.mean(cte)),
+        }
+
+
+class ReplayTask:
+    """
+    녹화 프레임 평가 (판단 안정성)
+    budget: 앞에서부터 사용할 프레임 수
+    reference: 기준 판단 리플레이 CSV (autoplot_replay.py 출력, direction 열), 있으면 불일치율을 비용에 더함
+    """
+
+    def __init__(self, pipeline, source, size=None, reference=None, flip_weight=1.0, lost_weight=1.0,
+                 ref_weight=2.0):
+        self.pipeline_name = pipeline
+        self.source = source
+        self.size = size
+        self.reference = reference
+        self.flip_weight = flip_weight
+        self.lost_weight = lost_weight
+        self.ref_weight = ref_weight
+
+    def load(self):
+        """워커 프로세스에서 한 번 호출: 프레임 전체를 메모리로 디코딩 (spawn 방식에서도 전송 없음)"""
+        self.pipeline = PIPELINES[self.pipeline_name]()
+        camera = ReplayCamera(self.source, *(self.size or (None, None)))
+        self.frames = []
+        while True:
+            ret, frame = camera.read()
+            if not ret:
+                break
+            self.frames.append(frame)
+        camera.release()
+        self.expected = None
+        if self.reference:
+            with open(self.reference, newline="", encoding="utf-8") as f:
+                self.expected = [r["direction"] for r in csv.DictReader(f)]
+
+    def evaluate(self, params, budget):
+        frames = self.frames[: int(budget)] if budget else self.frames
+        directions = [self.pipeline.decide(self.pipeline.process(f, params), params)["direction"] for f in frames]
+        flips = flip_rate(directions)
+        lost = sum(d in LOST for d in directions) / max(len(directions), 1)
+        cost = self.flip_weight * flips + self.lost_weight * lost
+        metrics = {"flips": flips, "lost": lost}
+        if self.expected is not None:
+            pairs = list(zip(directions, self.expected))
+            metrics["mismatch"] = sum(a != b for a, b in pairs) / max(len(pairs), 1)
+            cost += self.ref_weight * metrics["mismatch"]
+        metrics["cost"] = cost
+        return metrics
+
+
+_task = None  # 워커 프로세스별 평가 대상
+
+
+def _init_worker(task):
+    global _task
+    _task = task
+    _task.load()
+
+
+def _evaluate(job):
+    i, params, budget = job
+    return i, _task.evaluate(params, budget)
+
+
+class Tuner:
+    """
+    프로세스 풀 기반 탐색, 모든 평가 결과를 self.results에 기록
+    base: 탐색하지 않는 파라미터 값 (기본: 파이프라인 params)
+    workers: 프로세스 수 (0: CPU 코어 수, 1: 현재 프로세스에서 실행)
+    """
+
+    def __init__(self, task, space, base=None, workers=0, seed=0, verbose=True):
+        self.task = task
+        self.space = space
+        self.base = make_params(PIPELINES[task.pipeline_name], base or {})
+        space.check(self.base)
+        self.workers = workers or os.cpu_count() or 1
+        self.rng = random.Random(seed)
+        self.verbose = verbose
+        self.results = []  # (params, metrics, budget)
+        self.pool = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            self.pool = multiprocessing.Pool(self.workers, _init_worker, (self.task,))
+        else:
+            _init_worker(self.task)
+        return self
+
+    def __exit__(self, *exc):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+
+    def evaluate(self, configs, budget, label=""):
+        """configs를 병렬 평가, configs 순서의 metrics 목록 반환"""
+        jobs = [(i, p, budget) for i, p in enumerate(configs)]
+        out = [None] * len(jobs)
+        if self.pool is not None:
+            chunk = max(1, min(8, len(jobs) // (self.workers * 4)))
+            results = self.pool.imap_unordered(_evaluate, jobs, chunk)
+        else:
+            results = map(_evaluate, jobs)
+
+        t0 = time.time()
+        for n, (i, metrics) in enumerate(results, 1):
+            out[i] = metrics
+            if self.verbose and (n == len(jobs) or n % max(1, len(jobs) // 10) == 0):
+                dt = time.time() - t0
+                best = min(m["cost"] for m in out if m is not None)
+                print(
+                    f"  {label} {n}/{len(jobs)} (예산 {budget}) 최소 비용 {best:.3f},"
+                    f" {n / dt:.1f} 조합/초, 남은 시간 {dt / n * (len(jobs) - n):.0f}s"
+                )
+        self.results.extend(zip(configs, out, [budget] * len(out)))
+        return out
+
+    def candidates(self, n):
+        """무작위 n개 조합, 첫 조합은 현재 설정(base)이라 결과가 현재보다 나빠지지 않음"""
+        return [dict(self.base)] + [self.space.sample(self.rng, self.base) for _ in range(n - 1)]
+
+    def random(self, n, budget):
+        configs = self.candidates(n)
+        return self.best(configs, self.evaluate(configs, budget, "random"))
+
+    def grid(self, budget, limit=0):
+        """
+        모든 조합 평가 (limit: 최대 조합 수), 첫 조합은 현재 설정(base)
+        GRID_CHUNK개씩 생성해 평가하므로 조합 목록 전체를 만들지 않음
+        """
+        if not limit and self.space.size > GRID_LIMIT:
+            raise ValueError(f"그리드 조합 {self.space.size}개 > {GRID_LIMIT}개, 조합 수를 제한하거나 탐색 공간을 줄이세요")
+        grid = (p for p in self.space.grid(self.base) if p != self.base)
+        configs = itertools.islice(itertools.chain([dict(self.base)], grid), limit or None)
+        best, done = None, 0
+        while True:
+            chunk = list(itertools.islice(configs, GRID_CHUNK))
+            if not chunk:
+                return best
+            found = self.best(chunk, self.evaluate(chunk, budget, f"grid {done}+"))
+            if best is None or found[1]["cost"] < best[1]["cost"]:
+                best = found
+            done += len(chunk)
+
+    def halving(self, n, min_budget, max_budget, eta=3):
+        """
+        successive halving: n개 조합을 작은 예산으로 평가하고 상위 1/eta만 eta배 예산으로 다시 평가
+        """
+        configs = self.candidates(n)
+        budget, rung = min_budget, 0
+        while True:
+            metrics = self.evaluate(configs, budget, f"rung {rung}")
+            order = np.argsort([m["cost"] for m in metrics], kind="stable")
+            if budget >= max_budget or len(configs) <= 1:
+                return self.best(configs, metrics)
+            keep = max(1, len(configs) // eta)
+            configs = [configs[i] for i in order[:keep]]
+            budget = min(budget * eta, max_budget)
+            if isinstance(min_budget, int):
+                budget = int(budget)
+            rung += 1
+
+    @staticmethod
+    def best(configs, metrics):
+        i = min(range(len(configs)), key=lambda k: metrics[k]["cost"])
+        return configs[i], metrics[i]
+
+    def top(self, k=5, budget=None):
+        """가장 큰 예산(또는 지정 예산)으로 평가한 결과 중 비용이 낮은 k개"""
+        budget = budget if budget is not None else max(b for _, _, b in self.results)
+        rows = [r for r in self.results if r[2] == budget]
+        return sorted(rows, key=lambda r: r[1]["cost"])[:k]
+
+    def save_csv(self, path):
+        """평가 결과 전체 저장: budget, metrics, 탐색한 파라미터"""
+        keys = list(self.space.dims)
+        metric_keys = list(dict.fromkeys(k for _, m, _ in self.results for k in m))
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["budget"] + metric_keys + keys)
+            for params, m, budget in self.results:
+                writer.writerow([budget] + [m.get(k) for k in metric_keys] + [params[k] for k in keys])
+
+
+def export_config(params, pipeline, path, template=None):
+    """
+    params를 config.py 형식으로 저장
+    template(기본: autoplot_modules/config.py)을 복사하고 해당 상수의 값만 바꿈 (주석 유지)
+    """
+    template = template or os.path.join(os.path.dirname(__file__), "config.py")
+    with open(template, encoding="utf-8") as f:
+        text = f.read()
+    names = PIPELINES[pipeline].config_names
+    for key, name in names.items():
+        if key in params:
+            text, n = re.subn(rf"^({name}\s*=\s*)[^#\n]*?(\s*(#.*)?)$", rf"\g<1>{params[key]!r}\g<2>", text,
+                              count=1, flags=re.M)
+            if not n:
+                text += f"{name} = {params[key]!r}\n"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
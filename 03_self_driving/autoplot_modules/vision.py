@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import os
+
 import cv2
 import numpy as np
 
@@ -39,6 +41,80 @@ class CameraSystem:
         self.cap.release()
 
 
+class ReplayCamera:
+    """
+    녹화 영상 파일 또는 이미지 폴더를 CameraSystem처럼 읽는 클래스 (하드웨어 없는 리플레이용)
+    """
+
+    IMAGE_EXTENSIONS = (".bmp", ".jpg", ".jpeg", ".png")
+
+    def __init__(self, path, width=None, height=None, loop=1, cache=False):
+        self.path = path
+        self.size = (width, height) if width and height else None  # 지정 시 모든 프레임을 이 크기로 변환
+        self.loop = loop  # 전체 프레임 반복 횟수
+        self.count = 0  # 읽은 프레임 수
+        self.name = ""  # 마지막 프레임 이름 (파일명 또는 영상 프레임 번호)
+        self.cache = {} if cache else None  # 프레임 번호: (이름, 프레임), 반복 시 디코딩 생략
+
+        if os.path.isdir(path):
+            self.files = sorted(
+                os.path.join(path, f)
+                for f in os.listdir(path)
+                if f.lower().endswith(self.IMAGE_EXTENSIONS)
+            )
+            self.cap = None
+            self.length = len(self.files)
+        else:
+            self.files = None
+            self.cap = cv2.VideoCapture(path)
+            self.length = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if not self.length:
+            raise FileNotFoundError(f"프레임을 찾을 수 없습니다: {path}")
+
+        self.width, self.height = self.size or (0, 0)
+        print(f"🎞️  리플레이: {path} ({self.length} 프레임 x {loop})")
+
+    def update_settings(self, brightness=None, contrast=None, saturation=None, gain=None):
+        """녹화 프레임에는 카메라 파라미터를 적용할 수 없음 (CameraSystem 호환용)"""
+        pass
+
+    def read(self):
+        if self.count >= self.length * self.loop:
+            return False, None
+        i = self.count % self.length
+
+        if self.cache is not None and i in self.cache:
+            self.count += 1
+            self.name, frame = self.cache[i]
+            self.height, self.width = frame.shape[:2]
+            return True, frame.copy()
+
+        if self.files is not None:
+            self.name = os.path.basename(self.files[i])
+            frame = cv2.imread(self.files[i])
+        else:
+            if i == 0 and self.count:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self.name = str(i)
+            ret, frame = self.cap.read()
+            if not ret:
+                return False, None
+
+        self.count += 1
+        if frame is None:
+            return False, None
+        if self.size and frame.shape[1::-1] != self.size:
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        self.height, self.width = frame.shape[:2]
+        if self.cache is not None:
+            self.cache[i] = self.name, frame.copy()
+        return True, frame
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+
+
 class ImageProcessor:
     """이미지 처리 및 라인 검출 클래스"""
 
@@ -131,3 +207,112 @@ class ImageProcessor:
             "gray": gray,
             "binary": binary,
         }
+
+
+class LaneImageProcessor(ImageProcessor):
+    """두 라인 검출용 이미지 처리 클래스 (two_line_lane_center.py process_frame, 화면 출력 없음)"""
+
+    def process(self, frame, params):
+        """
+        원근 변환 → 가중 그레이스케일 → 이진화(200) + Canny 엣지 합산
+        params: roi_top_y, roi_bottom_y (0~1000), r/g/b_weight
+        """
+        h, w = frame.shape[:2]
+
+        top_y = max(0, min(int(params.get("roi_top_y", 200) * h / 1000), h - 1))
+        bottom_y = max(0, min(int(params.get("roi_bottom_y", 800) * h / 1000), h - 1))
+        if top_y >= bottom_y:
+            top_y = max(0, bottom_y - 50)
+
+        margin = 10
+        pts_src = np.float32(
+            [[margin, bottom_y], [w - margin, bottom_y], [w - margin, top_y], [margin, top_y]]
+        )
+
+        # 640 이상이면 640x480 유지 (정확도 우선), 아니면 320x240
+        target_w, target_h = (640, 480) if w >= 640 else (320, 240)
+        pts_dst = np.float32(
+            [[0, target_h], [target_w, target_h], [target_w, 0], [0, 0]]
+        )
+
+        vis_frame = frame.copy()
+        pts = pts_src.reshape((-1, 1, 2)).astype(np.int32)
+        cv2.polylines(vis_frame, [pts], True, (0, 0, 255), 2)
+
+        matrix = cv2.getPerspectiveTransform(pts_src, pts_dst)
+        warped = cv2.warpPerspective(frame, matrix, (target_w, target_h))
+
+        gray = self.weighted_gray(
+            warped,
+            params.get("r_weight", 30),
+            params.get("g_weight", 40),
+            params.get("b_weight", 60),
+        )
+
+        return {
+            "vis_frame": vis_frame,
+            "warped": warped,
+            "gray": gray,
+            "binary": self.binarize(gray, params),
+        }
+
+    def binarize(self, gray, params):
+        """C++ 코드 방식: 밝은 영역(200~255) + Canny(900, 900) 엣지"""
+        _, thresh = cv2.threshold(gray, 200, 255, cv2.THRESH_BINARY)
+        edge = cv2.Canny(gray, 900, 900, apertureSize=3, L2gradient=False)
+        return cv2.add(thresh, edge)
+
+
+class EnhancedLaneImageProcessor(LaneImageProcessor):
+    """
+    선명도 개선 두 라인 검출 (two_line_auto_plot/enhanced_line_detection.py enhanced_process_frame)
+    params["enhancement_level"]: 0=기본, 1=CLAHE + 모폴로지, 2=+언샤프 마스킹, 3=+적응형 임계값
+    """
+
+    def __init__(self, width, height):
+        super().__init__(width, height)
+        self.clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        self.kernel_close = cv2.getStructuringElement(cv2.MORPH_RECT, (7, 7))
+        self.kernel_open = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+        self.kernel_dilate = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 1))
+
+    def binarize(self, gray, params):
+        level = params.get("enhancement_level", 1)
+        if level >= 1:  # 히스토그램 균등화
+            gray = self.clahe.apply(gray)
+        if level >= 2:  # 언샤프 마스킹
+            blurred = cv2.GaussianBlur(gray, (9, 9), 2.0)
+            gray = cv2.addWeighted(gray, 1.5, blurred, -0.5, 0)
+
+        if level >= 3:
+            binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+        else:
+            binary = super().binarize(gray, params)
+
+        if level >= 1:  # 닫힘(구멍 채우기) → 열림(노이즈 제거) → 수평 팽창
+            binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, self.kernel_close)
+            binary = cv2.morphologyEx(binary, cv2.MORPH_OPEN, self.kernel_open)
+            binary = cv2.dilate(binary, self.kernel_dilate, iterations=1)
+        return binary
+
+
+class ColorDetector:
+    """
+    HSV 빨간색 검출 (3_color_dection.py detect_red_and_buzz, 화면 출력/부저 없음)
+
+    원본은 Hue만 봐서 어두운 무채색 바닥(Hue 170 부근, 채도 50 이하)도 빨간색으로 검출하므로
+    채도 sat_low 이상만 셉니다 (0이면 원본과 동일)
+    """
+
+    def __init__(self, hue_low=160, hue_high=180, threshold=10, sat_low=100):
+        self.hue_low = hue_low
+        self.hue_high = hue_high
+        self.threshold = threshold  # 마스크 평균값 (0~255) 기준
+        self.sat_low = sat_low
+
+    def detect(self, frame):
+        """반환: (검출 여부, 빨간색 마스크 평균값)"""
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        mask = cv2.inRange(hsv, (self.hue_low, self.sat_low, 0), (self.hue_high, 255, 255))
+        mean_of_hue = cv2.mean(mask)[0]
+        return mean_of_hue > self.threshold, mean_of_hue
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Raspbot v2 리플레이 실행기 (하드웨어 없이 자율주행 파이프라인 실행)
+
+녹화 영상 파일 또는 이미지 폴더의 프레임을 autoplot_modules 파이프라인에 최대 속도로 통과시키고
+프레임별 판단 결과와 단계별 처리 시간을 CSV로 저장합니다.
+카메라, Raspbot(I2C), 화면 출력, 대기(sleep) 없이 동작하므로 파이프라인 FPS 측정과
+최적화 전후 판단 결과 비교(--compare)에 사용합니다.
+
+═══════════════════════════════════════════════════════════
+파이프라인:
+═══════════════════════════════════════════════════════════
+- autoplot : ImageProcessor.process → DrivingLogic.decide_direction (autoplot.py)
+- two_line : LaneImageProcessor.process → LaneCenterLogic.detect_lane_lines
+             → speeds_by_bias (two_line_lane_center.py)
+(autoplot_modules/pipelines.py)
+
+단계별 시간 (ms): read (프레임 읽기), process (이미지 처리), decide (판단), control (모터 명령)
+
+═══════════════════════════════════════════════════════════
+사용 방법:
+═══════════════════════════════════════════════════════════
+$ python autoplot_replay.py --source ../01_Movies/자율주행_테스트_화면_캡쳐 --size 320 240 --loop 20 --cache
+$ python autoplot_replay.py --source drive.mp4 --pipeline two_line --csv two_line.csv
+$ python autoplot_replay.py --source drive.mp4 --set detect_value=140 roi_bottom=500 --compare replay.csv
+$ python autoplot_replay.py --source drive.mp4 --robot fake-i2c --i2c-fail-rate 0.01 --i2c-log i2c.csv
+$ python autoplot_replay.py --source drive.mp4 --robot fake-i2c --trace replay_trace
+"""
+
+import argparse
+import csv
+import time
+from collections import Counter
+
+import numpy as np
+
+from autoplot_modules import fake_raspbot
+from autoplot_modules.hardware import RecordingRobot, RobotController
+from autoplot_modules.pipelines import PIPELINES, make_params
+from autoplot_modules.trace import FrameTracer
+from autoplot_modules.vision import ReplayCamera
+
+STAGES = ("read", "process", "decide", "control")
+
+
+def replay(camera, pipeline, robot, params, limit=0, tracer=None):
+    """
+    프레임을 모두 처리하고 프레임별 결과 행 목록 반환
+    행: frame, source, 판단 필드, left_speed, right_speed, 단계별 시간(ms)
+    tracer: FrameTracer (autoplot.py와 같은 단계 시각 기록)
+    """
+    tracer = tracer or FrameTracer(1, enabled=False)
+    rows = []
+    while not limit or len(rows) < limit:
+        tracer.begin()
+        t0 = time.perf_counter()
+        ret, frame = camera.read()
+        if not ret:
+            break
+        t1 = time.perf_counter()
+        tracer.stamp("capture")
+        binary = pipeline.process(frame, params)
+        t2 = time.perf_counter()
+        tracer.stamp("process")
+        decision = pipeline.decide(binary, params)
+        t3 = time.perf_counter()
+        tracer.stamp("decide")
+        robot.frame = len(rows)
+        speeds = pipeline.control(decision, robot, params, tracer)
+        tracer.stamp("i2c_done")
+        t4 = time.perf_counter()
+
+        row = {"frame": len(rows), "source": camera.name}
+        row.update((k, decision[k]) for k in pipeline.fields)
+        row["left_speed"], row["right_speed"] = speeds
+        for k, a, b in zip(STAGES, (t0, t1, t2, t3), (t1, t2, t3, t4)):
+            row[f"{k}_ms"] = round((b - a) * 1e3, 3)
+        rows.append(row)
+    return rows
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def compare_csv(path, rows):
+    """
+    이전 리플레이 CSV와 판단 결과(시간 열 제외) 비교, 다른 프레임 번호 목록 반환
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        old = list(csv.DictReader(f))
+    keys = [k for k in rows[0] if not k.endswith("_ms")]
+    diff = [
+        int(r["frame"])
+        for r, o in zip(rows, old)
+        if any(str("" if r[k] is None else r[k]) != o.get(k) for k in keys)
+    ]
+    if len(old) != len(rows):
+        print(f"⚠️  프레임 수가 다릅니다: {len(old)} → {len(rows)}")
+        diff.append(min(len(old), len(rows)))
+    return diff
+
+
+def summary(rows):
+    """단계별 시간 통계, FPS, 방향 분포 출력"""
+    ms = {k: np.array([r[f"{k}_ms"] for r in rows]) for k in STAGES}
+    pipeline_ms = ms["process"] + ms["decide"] + ms["control"]
+    total_ms = pipeline_ms + ms["read"]
+
+    print(f"\n{'stage':>10s}{'mean':>9s}{'p50':>9s}{'p95':>9s}{'max':>9s}  (ms)")
+    for k, v in list(ms.items()) + [("pipeline", pipeline_ms), ("total", total_ms)]:
+        p50, p95, mx = np.percentile(v, [50, 95, 100])
+        print(f"{k:>10s}{v.mean():9.2f}{p50:9.2f}{p95:9.2f}{mx:9.2f}")
+
+    print(
+        f"\n📊 {len(rows)} 프레임, 파이프라인 {1e3 / pipeline_ms.mean():.1f} FPS, "
+        f"읽기 포함 {1e3 / total_ms.mean():.1f} FPS"
+    )
+    counts = Counter(r["direction"] for r in rows)
+    print("🧭 방향: " + ", ".join(f"{k} {v}" for k, v in counts.most_common()))
+
+
+def main(opt):
+    pipeline = PIPELINES[opt.pipeline]()
+    params = make_params(pipeline, opt.set)
+
+    camera = ReplayCamera(opt.source, *(opt.size or (None, None)), loop=opt.loop, cache=opt.cache)
+    bus = None
+    if opt.robot == "fake-i2c":
+        # RobotController → FakeRaspbot → FakeSMBus: I2C 지연이 control 단계 시간에 포함됨
+        model = fake_raspbot.LatencyModel.fit(opt.i2c_model) if opt.i2c_model else fake_raspbot.LatencyModel()
+        model.failure_rate = opt.i2c_fail_rate if opt.i2c_fail_rate is not None else model.failure_rate
+        print(f"🔌 가짜 I2C: {model}")
+        bus = fake_raspbot.FakeSMBus(1, model)
+        robot = RobotController(fake_raspbot.FakeRaspbot(bus))
+    else:
+        robot = RecordingRobot(verbose=opt.verbose)
+    tracer = FrameTracer(opt.trace_capacity, opt.deadline) if opt.trace else None
+    try:
+        rows = replay(camera, pipeline, robot, params, opt.limit, tracer)
+    finally:
+        camera.release()
+    if not rows:
+        print("❌ 처리된 프레임이 없습니다")
+        return 1
+
+    write_csv(opt.csv, rows)
+    print(f"💾 {opt.csv} 저장 ({len(rows)} 행)")
+    summary(rows)
+    if bus is not None:
+        print(f"🔌 프레임당 I2C {bus.bus_time * 1e3 / len(rows):.2f}ms")
+        bus.print_stats()
+        if opt.i2c_log:
+            bus.save_log(opt.i2c_log)
+    if tracer is not None:
+        tracer.dump(opt.trace)
+
+    if opt.compare:
+        diff = compare_csv(opt.compare, rows)
+        if diff:
+            print(f"❌ 판단 결과가 다른 프레임 {len(diff)}개: {diff[:20]}")
+            return 1
+        print(f"✅ 판단 결과가 {opt.compare}와 동일합니다")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="하드웨어 없이 녹화 프레임으로 자율주행 파이프라인 실행")
+    parser.add_argument("--source", required=True, help="영상 파일 또는 이미지 폴더")
+    parser.add_argument("--pipeline", choices=list(PIPELINES), default="autoplot", help="실행할 파이프라인")
+    parser.add_argument("--size", type=int, nargs=2, metavar=("W", "H"), help="프레임 크기 변환 (예: 320 240)")
+    parser.add_argument("--loop", type=int, default=1, help="전체 프레임 반복 횟수")
+    parser.add_argument("--cache", action="store_true", help="디코딩한 프레임을 메모리에 보관 (반복 시 read 시간 제외)")
+    parser.add_argument("--limit", type=int, default=0, help="최대 프레임 수 (0: 전체)")
+    parser.add_argument("--set", nargs="*", default=[], metavar="KEY=VALUE", help="파라미터 변경")
+    parser.add_argument("--csv", default="replay.csv", help="프레임별 결과 CSV 경로")
+    parser.add_argument("--compare", help="판단 결과를 비교할 이전 리플레이 CSV")
+    parser.add_argument("--robot", choices=["record", "fake-i2c"], default="record",
+                        help="record: 호출 기록만, fake-i2c: RobotController + 가짜 I2C 버스 (지연 포함)")
+    parser.add_argument("--i2c-model", help="LatencyModel.fit에 사용할 실차 I2C 로그 CSV (BusRecorder)")
+    parser.add_argument("--i2c-fail-rate", type=float, help="I2C 트랜잭션 실패 확률")
+    parser.add_argument("--i2c-log", help="가짜 I2C 트랜잭션 로그 CSV 경로")
+    parser.add_argument("--trace", metavar="PREFIX", help="FrameTracer 저장 경로 (PREFIX.csv, PREFIX.json)")
+    parser.add_argument("--trace-capacity", type=int, default=2048, help="추적할 최근 프레임 수")
+    parser.add_argument("--deadline", type=float, default=100.0, help="프레임 마감 시간 (ms)")
+    parser.add_argument("--verbose", action="store_true", help="로봇 명령 출력")
+    raise SystemExit(main(parser.parse_args()))
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Raspbot v2 폐루프 트랙 시뮬레이터 (하드웨어 없이 파라미터 튜닝)
+
+합성 트랙 지도에서 카메라 프레임을 렌더링하고, 실제 autoplot_modules 파이프라인
+(ImageProcessor/DrivingLogic 또는 LaneImageProcessor/LaneCenterLogic)이 낸 모터 명령으로
+차동 구동 차량을 움직이는 과정을 화면 출력과 대기(sleep) 없이 반복합니다.
+실차에서 한 바퀴씩 돌려 보던 방향/전진 임계값, P 게인을 수백 스텝/초로 비교할 수 있습니다.
+
+═══════════════════════════════════════════════════════════
+트랙 (autoplot_modules/simulator.py track_preset):
+═══════════════════════════════════════════════════════════
+- oval     : 둥근 순환 트랙
+- corners  : 좌/우 90도 코너 순환 트랙 (코너는 --corner-radius 원호)
+- single   : corners와 같은 경로, 중심 라인 하나
+- dead_end : 직선 → 좌회전 → 막다른 길 (BLOCKED → 서보 탐색)
+
+결과: 종료 상태, 랩 타임, 횡방향 오차(CTE) RMS/최대, 서보 탐색 횟수, 루프 지연 p50/p95, 스텝/초
+시간은 시뮬레이션 시간 (fps 주기 + 탐색 정지 시간), 루프 지연은 실제 렌더링 + 처리 시간
+
+카메라 기본값: 기울기는 config.DEFAULT_SERVO_2 (서보 2 = 0이 바로 아래), 높이는 파이프라인별 설치값
+(autoplot: Raspbot 전면 120mm, two_line: 카메라 마스트 200mm). 이 값에서 config.py 기본 파라미터로
+autoplot/two_line 모두 corners, oval을 완주해야 하며 --check로 확인합니다.
+
+═══════════════════════════════════════════════════════════
+사용 방법:
+═══════════════════════════════════════════════════════════
+$ python autoplot_sim.py --check
+$ python autoplot_sim.py --track corners --save-map corners.png
+$ python autoplot_sim.py --track oval --pipeline two_line --set p_gain=0.8 --laps 2
+$ python autoplot_sim.py --track dead_end --csv sim.csv --verbose
+"""
+
+import argparse
+from collections import Counter
+
+from autoplot_modules.hardware import RecordingRobot
+from autoplot_modules.pipelines import PIPELINES, make_params
+from autoplot_modules.simulator import DiffDriveModel, Simulator, make_camera, track_preset
+from autoplot_replay import write_csv
+
+TRACKS = ("oval", "corners", "single", "dead_end")
+ACCEPTANCE = (("autoplot", "corners"), ("autoplot", "oval"), ("two_line", "corners"), ("two_line", "oval"))
+
+
+def print_result(result, steps):
+    """시뮬레이션 결과 출력"""
+    icon = "✅" if result["status"] in ("lap", "finished") else "❌"
+    print(
+        f"\n{icon} {result['status']}: {result['time']:.1f}s, 진행 {result['progress'] / 1e3:.2f}m"
+        f" / 트랙 {result['track_length'] / 1e3:.2f}m, {result['steps']} 스텝"
+    )
+    if result["laps"]:
+        print("🏁 랩 타임: " + ", ".join(f"{t:.2f}s" for t in result["laps"]))
+    print(f"📏 CTE RMS {result['cte_rms']:.1f}mm, 최대 {result['cte_max']:.1f}mm, 서보 탐색 {result['scans']}회")
+    print(
+        f"⏱️  루프 p50 {result['loop_p50_ms']:.2f}ms, p95 {result['loop_p95_ms']:.2f}ms,"
+        f" {result['steps_per_s']:.0f} 스텝/초"
+    )
+    counts = Counter(r["direction"] for r in steps)
+    print("🧭 방향: " + ", ".join(f"{k} {v}" for k, v in counts.most_common()))
+
+
+def simulator(opt, pipeline_name, track_name, overrides=(), robot=None):
+    """명령행 옵션으로 트랙, 카메라, 차량을 만든 Simulator"""
+    pipeline = PIPELINES[pipeline_name]()
+    params = make_params(pipeline, overrides)
+    track = track_preset(track_name, lane_width=opt.lane_width, seed=opt.seed, corner_radius=opt.corner_radius)
+    camera = make_camera(pipeline, opt.size, hfov=opt.hfov, cam_height=opt.cam_height, pitch=opt.pitch)
+    car = DiffDriveModel(*track.start_pose(), wheel_base=opt.wheel_base, mm_per_unit=opt.mm_per_unit)
+    return Simulator(track, pipeline, params, robot, camera, car, fps=opt.fps, scan_time=opt.scan_time)
+
+
+def check(opt):
+    """ACCEPTANCE 파이프라인/트랙을 config.py 기본 파라미터로 완주하는지 확인 (--set, --track 무시)"""
+    failed = 0
+    for pipeline_name, track_name in ACCEPTANCE:
+        _, result = simulator(opt, pipeline_name, track_name).run(opt.max_time, opt.laps)
+        ok = result["status"] in ("lap", "finished")
+        failed += not ok
+        print(
+            f"{'✅' if ok else '❌'} {pipeline_name} / {track_name}: {result['status']} {result['time']:.1f}s,"
+            f" 진행 {result['progress'] / result['track_length']:.0%}, 서보 탐색 {result['scans']}회"
+        )
+    return 1 if failed else 0
+
+
+def main(opt):
+    if opt.check:
+        return check(opt)
+    robot = RecordingRobot(verbose=True) if opt.verbose else None
+    sim = simulator(opt, opt.pipeline, opt.track, opt.set, robot)
+    track, params = sim.track, sim.params
+
+    print(f"🛣️  {opt.track} ({track.kind}), {opt.pipeline}, {opt.size[0]}x{opt.size[1]}, {params}")
+    steps, result = sim.run(opt.max_time, opt.laps)
+    if not steps:
+        print("❌ 실행된 스텝이 없습니다")
+        return 1
+
+    if opt.csv:
+        write_csv(opt.csv, steps)
+        print(f"💾 {opt.csv} 저장 ({len(steps)} 행)")
+    if opt.save_map:
+        import cv2
+
+        cv2.imwrite(opt.save_map, sim.draw(steps))
+        print(f"🗺️  {opt.save_map} 저장")
+    print_result(result, steps)
+    return 0 if result["status"] in ("lap", "finished") else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="합성 트랙에서 자율주행 파이프라인 폐루프 시뮬레이션")
+    parser.add_argument("--track", choices=TRACKS, default="corners", help="트랙 종류")
+    parser.add_argument("--pipeline", choices=list(PIPELINES), default="autoplot", help="실행할 파이프라인")
+    parser.add_argument("--set", nargs="*", default=[], metavar="KEY=VALUE", help="파라미터 변경")
+    parser.add_argument("--check", action="store_true", help="기본 파라미터로 ACCEPTANCE 트랙 완주 확인")
+    parser.add_argument("--max-time", type=float, default=300.0, help="최대 시뮬레이션 시간 (s)")
+    parser.add_argument("--laps", type=int, default=1, help="순환 트랙 목표 랩 수")
+    parser.add_argument("--fps", type=float, default=10.0, help="제어 루프 주기 (Hz)")
+    parser.add_argument("--scan-time", type=float, default=1.1, help="BLOCKED 서보 탐색 정지 시간 (s)")
+    parser.add_argument("--lane-width", type=float, default=300, help="라인 안쪽 간격 (mm)")
+    parser.add_argument("--corner-radius", type=float, default=300, help="corners/single 코너 중심선 반경 (mm, 0: 꺾인 코너)")
+    parser.add_argument("--seed", type=int, default=0, help="바닥 노이즈 시드")
+    parser.add_argument("--size", type=int, nargs=2, default=(640, 480), metavar=("W", "H"), help="카메라 프레임 크기")
+    parser.add_argument("--hfov", type=float, default=90.0, help="카메라 수평 화각 (도)")
+    parser.add_argument("--cam-height", type=float, help="카메라 높이 (mm, 기본: 파이프라인별 설치값)")
+    parser.add_argument("--pitch", type=float, help="카메라 아래 방향 각도 (도, 기본: config.DEFAULT_SERVO_2에서 계산)")
+    parser.add_argument("--wheel-base", type=float, default=150.0, help="좌우 바퀴 간격 (mm)")
+    parser.add_argument("--mm-per-unit", type=float, default=4.0, help="모터 명령 1당 바퀴 속도 (mm/s)")
+    parser.add_argument("--csv", help="스텝별 결과 CSV 경로")
+    parser.add_argument("--save-map", help="주행 궤적을 그린 지도 이미지 경로")
+    parser.add_argument("--verbose", action="store_true", help="로봇 명령 출력")
+    raise SystemExit(main(parser.parse_args()))
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Raspbot v2 파라미터 자동 튜너 (트랙바 수동 조정 대체)
+
+detect_value, RGB 가중치, ROI, 방향/전진 임계값, P 게인 조합을 시뮬레이터 트랙 주행(--sim) 또는
+녹화 프레임(--source)으로 평가하고, 모든 CPU 코어의 프로세스 풀로 병렬 탐색합니다.
+최적 조합은 autoplot_modules/config.py 형식 파일로 내보냅니다 (--export, 녹화 프레임 튜닝만).
+시뮬레이터 프레임은 조명/노이즈/렌즈 왜곡이 없어 detect_value, 가중치, 임계값이 실차로 옮겨지지 않으므로
+--sim 결과는 --allow-sim-export 없이 내보내지 않습니다.
+
+═══════════════════════════════════════════════════════════
+탐색 방법 (autoplot_modules/tuner.py):
+═══════════════════════════════════════════════════════════
+- random  : 무작위 n개 조합을 --max-budget으로 평가
+- grid    : 모든 조합 평가 (--n으로 개수 제한, 없으면 GRID_LIMIT 조합 이하만 가능)
+- halving : 무작위 n개 조합을 --min-budget으로 평가한 뒤 상위 1/eta만 eta배 예산으로 재평가 반복
+            (나쁜 조합을 짧은 평가로 일찍 버려 밤새 수천 개 조합 탐색 가능)
+
+예산(budget): --sim은 트랙당 시뮬레이션 시간 (s), --source는 사용할 프레임 수
+비용(cost): --sim은 예상 랩 타임 (미완주 시 예산 / 진행률) x (1 + 0.5 x 판단 변경률),
+            --source는 판단 변경률 + 라인 유실률 (+ --reference 불일치율), 낮을수록 좋음
+
+탐색 공간 변경: --space KEY=lo:hi:step 또는 KEY=a,b,c, KEY= 는 탐색 제외 (기본값 또는 --set 값 고정)
+
+═══════════════════════════════════════════════════════════
+사용 방법:
+═══════════════════════════════════════════════════════════
+$ python autoplot_tune.py --sim corners dead_end --space roi_top= roi_bottom=
+$ python autoplot_tune.py --sim oval corners --pipeline two_line --n 2000
+$ python autoplot_tune.py --source ../01_Movies/자율주행_테스트_화면_캡쳐 --size 320 240 --search grid \\
+      --space detect_value=100:140:10 direction_threshold=20000,35000,50000 --export tuned_config.py
+"""
+
+import argparse
+import time
+
+from autoplot_modules.pipelines import PIPELINES, make_params
+from autoplot_modules.tuner import GRID_LIMIT, ReplayTask, SearchSpace, SimTask, Tuner, export_config
+from autoplot_modules.vision import ReplayCamera
+
+
+def main(opt):
+    pipeline = PIPELINES[opt.pipeline]
+    if opt.sim and opt.export and not opt.allow_sim_export:
+        print("❌ 시뮬레이터 튜닝 값은 실차 config.py로 옮겨지지 않습니다: --source 녹화 프레임으로 튜닝하거나 "
+              "--allow-sim-export를 지정하세요")
+        return 1
+    space = SearchSpace(opt.pipeline, opt.space)
+    if opt.search == "grid" and not opt.n and space.size > GRID_LIMIT:
+        print(f"❌ 그리드 조합 {space.size}개 > {GRID_LIMIT}개: --n으로 개수를 제한하거나 --space로 탐색 공간을 줄이세요")
+        return 1
+    if opt.sim:
+        task = SimTask(
+            opt.pipeline, opt.sim, opt.size or (640, 480),
+            camera={"hfov": opt.hfov, "cam_height": opt.cam_height, "pitch": opt.pitch},
+            track={"lane_width": opt.lane_width, "corner_radius": opt.corner_radius}, fps=opt.fps,
+        )
+        min_budget, max_budget = opt.min_budget or 15.0, opt.max_budget or 300.0
+    else:
+        task = ReplayTask(opt.pipeline, opt.source, opt.size, opt.reference)
+        camera = ReplayCamera(opt.source)
+        camera.release()
+        min_budget, max_budget = int(opt.min_budget or 50), int(opt.max_budget or camera.length)
+
+    try:
+        tuner = Tuner(task, space, make_params(pipeline, opt.set), opt.workers, opt.seed)
+    except ValueError as e:  # 순서 조건 (roi_top < roi_bottom 등)을 만족하는 조합이 없음
+        print(f"❌ {e}")
+        return 1
+    print(f"🔍 {opt.search}, {tuner.workers} 프로세스, 탐색 공간: {space}")
+
+    t0 = time.time()
+    with tuner:
+        if opt.search == "random":
+            params, _ = tuner.random(opt.n or 243, max_budget)
+        elif opt.search == "grid":
+            params, _ = tuner.grid(max_budget, opt.n or 0)
+        else:
+            params, _ = tuner.halving(opt.n or 243, min(min_budget, max_budget), max_budget, opt.eta)
+    dt = time.time() - t0
+    print(f"\n⏱️  {len(tuner.results)}회 평가, {dt:.0f}s ({len(tuner.results) / dt:.1f} 평가/초)")
+
+    print(f"\n🏆 상위 {opt.top}개 (예산 {max_budget})")
+    for p, m, _ in tuner.top(opt.top, max_budget):
+        values = ", ".join(f"{k}={p[k]}" for k in space.dims)
+        scores = ", ".join(f"{k} {v:.3f}" for k, v in m.items() if isinstance(v, float))
+        print(f"  {scores} | {values}")
+
+    if opt.csv:
+        tuner.save_csv(opt.csv)
+        print(f"💾 {opt.csv} 저장 ({len(tuner.results)} 행)")
+    if opt.export:
+        export_config(params, opt.pipeline, opt.export)
+        print(f"💾 {opt.export} 저장 (config.py 형식)")
+        if opt.sim:
+            print("⚠️  시뮬레이터 튜닝 값: 실차에서 트랙바로 다시 확인하세요")
+    print("✅ 최적 파라미터: " + " ".join(f"{k}={params[k]}" for k in space.dims))
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="시뮬레이터 또는 녹화 프레임으로 자율주행 파라미터 병렬 탐색")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--sim", nargs="+", choices=["oval", "corners", "single", "dead_end"], help="평가 트랙")
+    target.add_argument("--source", help="평가용 영상 파일 또는 이미지 폴더")
+    parser.add_argument("--pipeline", choices=list(PIPELINES), default="autoplot", help="튜닝할 파이프라인")
+    parser.add_argument("--search", choices=["random", "grid", "halving"], default="halving", help="탐색 방법")
+    parser.add_argument("--n", type=int, help="조합 수 (random/halving 기본 243, grid: 최대 조합 수, 기본 전체)")
+    parser.add_argument("--eta", type=int, default=3, help="halving 단계별 유지 비율 1/eta, 예산 eta배")
+    parser.add_argument("--min-budget", type=float, help="halving 첫 단계 예산 (sim 15s, source 50프레임)")
+    parser.add_argument("--max-budget", type=float, help="최종 예산 (sim 300s, source 전체 프레임)")
+    parser.add_argument("--space", nargs="*", default=[], metavar="KEY=RANGE", help="탐색 공간 변경")
+    parser.add_argument("--set", nargs="*", default=[], metavar="KEY=VALUE", help="고정 파라미터 변경")
+    parser.add_argument("--workers", type=int, default=0, help="프로세스 수 (0: CPU 코어 수)")
+    parser.add_argument("--seed", type=int, default=0, help="무작위 탐색 시드")
+    parser.add_argument("--size", type=int, nargs=2, metavar=("W", "H"), help="프레임 크기 (sim 기본 640 480)")
+    parser.add_argument("--reference", help="--source 기준 판단 리플레이 CSV (direction 열)")
+    parser.add_argument("--fps", type=float, default=10.0, help="시뮬레이터 제어 루프 주기 (Hz)")
+    parser.add_argument("--lane-width", type=float, default=300, help="시뮬레이터 라인 안쪽 간격 (mm)")
+    parser.add_argument("--corner-radius", type=float, default=300, help="시뮬레이터 corners 코너 반경 (mm)")
+    parser.add_argument("--hfov", type=float, default=90.0, help="시뮬레이터 카메라 수평 화각 (도)")
+    parser.add_argument("--cam-height", type=float, help="시뮬레이터 카메라 높이 (mm, 기본: 파이프라인별 설치값)")
+    parser.add_argument("--pitch", type=float, help="시뮬레이터 카메라 아래 방향 각도 (도, 기본: DEFAULT_SERVO_2)")
+    parser.add_argument("--top", type=int, default=5, help="출력할 상위 조합 수")
+    parser.add_argument("--csv", help="전체 평가 결과 CSV 경로")
+    parser.add_argument("--export", help="최적 파라미터를 저장할 config.py 형식 파일 경로")
+    parser.add_argument("--allow-sim-export", action="store_true", help="--sim 튜닝 결과도 --export 허용")
+    raise SystemExit(main(parser.parse_args()))
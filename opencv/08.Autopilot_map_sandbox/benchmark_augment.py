@@ -0,0 +1,96 @@
+"""Training data pipeline throughput of LoadImagesAndLabels with mosaic augmentation, in images per second
+
+Times the augmentation stages of a training dataset in this process, then whole batches through a DataLoader with
+each --workers count, where worker processes assemble mosaics in parallel and return them in shared memory.
+
+Usage:
+    $ python benchmark_augment.py --data ../signs/images/train --img-size 320 --cache ram --workers 0 2 4
+"""
+
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+import torch
+
+sys.path.append('./')  # to run '$ python *.py' files in subdirectories
+
+from utils.datasets import LoadImagesAndLabels, augment_hsv, load_image, load_mosaic
+from utils.general import set_logging
+
+HYP = {'hsv_h': 0.015, 'hsv_s': 0.7, 'hsv_v': 0.4, 'degrees': 0.0, 'translate': 0.1, 'scale': 0.5, 'shear': 0.0,
+       'perspective': 0.0, 'flipud': 0.0, 'fliplr': 0.5, 'mosaic': 1.0, 'mixup': 0.0}  # hyp.scratch.yaml
+
+
+def throughput(f, n, seconds=5.0):
+    # Return images/s of f(i) for i in 0..n-1 cycled, after 5 warmup calls, for at least seconds
+    for i in range(5):
+        f(i % n)
+    i, t = 0, time.time()
+    while time.time() - t < seconds:
+        f(i % n)
+        i += 1
+    return i / (time.time() - t)
+
+
+def loader_throughput(dataset, batch_size, workers, batches):
+    # Return images/s of batches DataLoader batches after the first, i.e. excluding worker startup
+    loader = torch.utils.data.DataLoader(dataset, batch_size=batch_size, num_workers=workers, shuffle=True,
+                                         pin_memory=False, collate_fn=LoadImagesAndLabels.collate_fn,
+                                         persistent_workers=workers > 0)
+    it = iter(loader)
+    next(it)
+    t, n = time.time(), 0
+    for _ in range(batches):
+        try:
+            n += len(next(it)[0])
+        except StopIteration:
+            it = iter(loader)
+    return n / (time.time() - t)
+
+
+def benchmark(opt):
+    hyp = HYP
+    if opt.hyp:
+        import yaml
+        with open(opt.hyp) as f:
+            hyp = {**HYP, **yaml.safe_load(f)}
+    dataset = LoadImagesAndLabels(opt.data, opt.img_size, opt.batch_size, augment=True, hyp=hyp,
+                                  cache_images=opt.cache if opt.cache != 'none' else False)
+    n, s = len(dataset), opt.img_size
+    random.seed(0)
+    np.random.seed(0)
+    print(f'{n} images at {s}, torch {torch.__version__}, {torch.get_num_threads()} threads, cache {opt.cache}')
+
+    img = load_mosaic(dataset, 0)[0].copy()
+    stages = {'load_image': lambda i: load_image(dataset, i),
+              'augment_hsv': lambda i: augment_hsv(img, hyp['hsv_h'], hyp['hsv_s'], hyp['hsv_v']),
+              'load_mosaic': lambda i: load_mosaic(dataset, i),
+              'dataset[i]': lambda i: dataset[i]}
+    print(f"\n{'stage':>24s}{'images/s':>12s}{'ms/image':>12s}")
+    for k, f in stages.items():
+        r = throughput(f, n, opt.seconds)
+        print(f'{k:>24s}{r:12.1f}{1E3 / r:12.2f}')
+
+    for w in opt.workers:
+        r = loader_throughput(dataset, opt.batch_size, w, opt.batches)
+        print(f'{f"DataLoader {w} workers":>24s}{r:12.1f}{1E3 / r:12.2f}')
+    print('augment_hsv on one mosaic, load_mosaic includes 4 load_image and random_perspective')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--data', type=str, default='../signs/images/train', help='images dir or *.txt list')
+    parser.add_argument('--hyp', type=str, default='', help='hyperparameters *.yaml, default hyp.scratch.yaml values')
+    parser.add_argument('--img-size', type=int, default=320, help='train size (pixels)')
+    parser.add_argument('--batch-size', type=int, default=16, help='DataLoader batch size')
+    parser.add_argument('--cache', type=str, default='none', choices=['none', 'ram', 'disk'], help='image cache')
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 2, 4], help='DataLoader worker counts')
+    parser.add_argument('--batches', type=int, default=20, help='timed DataLoader batches')
+    parser.add_argument('--seconds', type=float, default=5.0, help='timed seconds per stage')
+    opt = parser.parse_args()
+    set_logging()
+    print(opt)
+    benchmark(opt)
@@ -0,0 +1,179 @@
+"""CPU latency benchmark of YOLOv5-Lite building blocks at the layer configurations of a trained model
+
+Records the input/output shape of every block of --weights at --img-size, instantiates the alternative
+models/common.py blocks with the same channels, stride and resolution, fuses them like Model.fuse() and
+reports params, GFLOPS, activation memory and p50/p95 CPU latency per thread count and memory format. With --rect the
+whole model is also timed at the rectangular stream shape against square --img-size input (torch_utils.profile_rect).
+
+Usage:
+    $ python benchmark_blocks.py --weights weights/best1.pt --img-size 320 --threads 1 2 4 --channels-last
+    $ python benchmark_blocks.py --weights weights/best1.pt --img-size 320 --threads 1 --rect 256 320  # 640x480 camera
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+from copy import deepcopy
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+sys.path.append('./')  # to run '$ python *.py' files in subdirectories
+
+from models.common import ADD, C3, C3_GC, Concat, Conv, DWConvblock, ES_Bottleneck, GhostConv, LC_Block, MBConvBlock, \
+    RepVGGBlock, Shuffle_Block, mobilev3_bneck
+from models.experimental import attempt_load
+from models.yolo import Detect, Model
+from utils.torch_utils import profile_rect, time_synchronized
+
+try:
+    import thop  # for FLOPS computation
+except ImportError:
+    thop = None
+
+
+def candidates(c1, c2, s):
+    # Alternative blocks mapping (b, c1, h, w) to (b, c2, h / s, w / s), [(name, module), ...]
+    if s not in (1, 2):  # i.e. the stride 4 conv_bn_relu_maxpool stem
+        return []
+    m = [('Shuffle_Block', Shuffle_Block(c1, c2, s)) if s > 1 or c1 == c2 else None,
+         ('ES_Bottleneck', ES_Bottleneck(c1, c2, s)) if s > 1 or c1 == c2 else None,
+         ('LC_Block', LC_Block(c1, c2, s, 3)),
+         ('LC_Block-se-k5', LC_Block(c1, c2, s, 5, True)),
+         ('RepVGGBlock', RepVGGBlock(c1, c2, 3, s)),
+         ('mobilev3_bneck', mobilev3_bneck(c1, c2, c2 * 2, 3, s, 0, 1)),  # expansion 2, hswish
+         ('GhostConv', GhostConv(c1, c2, 3, s)) if s == 1 else None,  # strides both convs
+         ('DWConvblock', DWConvblock(c1, c2, 3, s)),
+         ('MBConvBlock', MBConvBlock(c1, c2, 3, s)) if c1 == c2 else None,
+         ('Conv', Conv(c1, c2, 3, s)),
+         ('C3', C3(c1, c2, 1, False)) if s == 1 else None,
+         ('C3_GC', C3_GC(c1, c2, 1, False)) if s == 1 else None]
+    return [x for x in m if x is not None]
+
+
+def fuse_block(m):
+    # Apply the Model.fuse() Conv2d() + BatchNorm2d() fusion and RepVGG reparameterization to a standalone block
+    holder = nn.Module()
+    holder.model = m
+    holder.info = lambda *args, **kwargs: None
+    with contextlib.redirect_stdout(io.StringIO()):
+        Model.fuse(holder)
+    return m.eval()
+
+
+def model_slots(model, img_size):
+    # Return {(c1, c2, s, h, w): [block name, layer indices]} of the single-input blocks of model at img_size
+    slots, hooks = {}, []
+
+    def record(i):
+        def hook(m, x, y):
+            (_, c1, h, w), c2 = x[0].shape, y.shape[1]
+            k = c1, c2, h // y.shape[2], h, w
+            slots.setdefault(k, [type(m).__name__, []])[1].append(i)
+        return hook
+
+    for i, layer in enumerate(model.model):
+        if isinstance(layer, (ADD, Concat, Detect, nn.Upsample)):
+            continue
+        for m in (layer if type(layer) is nn.Sequential else [layer]):  # repeated blocks, n > 1
+            hooks.append(m.register_forward_hook(record(i)))
+    with torch.no_grad():
+        model(torch.zeros(1, 3, img_size, img_size))
+    for h in hooks:
+        h.remove()
+    return slots
+
+
+def block_stats(m, x):
+    # Return params, GFLOPS and activation MB (sum of leaf module outputs, float32) of m for input x
+    p = sum(v.numel() for v in m.parameters())
+    try:
+        flops = thop.profile(deepcopy(m), inputs=(x,), verbose=False)[0] / 1E9 * 2  # GFLOPS
+    except:
+        flops = float('nan')
+    act, hooks = [0], []
+    for leaf in m.modules():
+        if not list(leaf.children()):
+            hooks.append(leaf.register_forward_hook(lambda _, __, y: act.__setitem__(0, act[0] + y.numel())))
+    with torch.no_grad():
+        m(x)
+    for h in hooks:
+        h.remove()
+    return p, flops, act[0] * 4 / 1E6
+
+
+def latency(m, x, n=100):
+    # Return p50, p95 CPU latency (ms) of m(x) after a warmup
+    with torch.no_grad():
+        for _ in range(10):
+            m(x)
+        dt = []
+        for _ in range(n):
+            t = time_synchronized()
+            m(x)
+            dt.append(time_synchronized() - t)
+    return np.percentile(np.array(dt) * 1E3, [50, 95])
+
+
+def benchmark(opt):
+    torch.manual_seed(0)
+    model = attempt_load(opt.weights, map_location='cpu')  # fused
+    slots = model_slots(model, opt.img_size)
+    formats = [torch.contiguous_format] + ([torch.channels_last] if opt.channels_last else [])
+    runs = [(t, f) for t in opt.threads for f in formats]
+    fmt = {torch.contiguous_format: 'nchw', torch.channels_last: 'nhwc'}
+
+    print(f'{len(slots)} block configurations of {opt.weights} at {opt.img_size}, torch {torch.__version__}, '
+          f'{torch.get_num_threads()} threads default')
+    head = ''.join(f'{f"{t}t {fmt[f]} p50/p95":>20s}' for t, f in runs)
+    summary = {r: [0.0, 0.0] for r in runs}  # model blocks, fastest candidates; ms x layer count
+    for (c1, c2, s, h, w), (name, layers) in slots.items():
+        n = len(layers)
+        print(f'\n{name} {c1}->{c2} s{s} {h}x{w} x{n} (layers {sorted(set(layers))})')
+        print(f"{'block':>16s}{'params':>10s}{'GFLOPS':>9s}{'act MB':>8s}{head}")
+        current = next(m for i, m in enumerate(model.model) if i == layers[0])
+        current = current[0] if type(current) is nn.Sequential else current
+        blocks = [(name + '*', deepcopy(current))] + [(k, fuse_block(m)) for k, m in candidates(c1, c2, s) if k != name]
+        best = {r: float('inf') for r in runs}
+        for k, m in blocks:
+            x = torch.rand(1, c1, h, w)
+            try:
+                p, flops, act = block_stats(m, x)
+            except Exception as e:
+                print(f'{k:>16s} failed: {e}')
+                continue
+            row = f'{k:>16s}{p:10d}{flops:9.3f}{act:8.2f}'
+            for t, f in runs:
+                torch.set_num_threads(t)
+                mf, xf = deepcopy(m).to(memory_format=f), x.contiguous(memory_format=f)
+                p50, p95 = latency(mf, xf, opt.n)
+                row += f'{f"{p50:.2f}/{p95:.2f}":>20s}'
+                if k.endswith('*'):
+                    summary[t, f][0] += p50 * n
+                best[t, f] = min(best[t, f], p50)
+            print(row)
+        for r in runs:
+            summary[r][1] += best[r] * n
+    print(f"\n{'run':>12s}{'model (ms)':>12s}{'fastest (ms)':>14s}{'saving':>9s}")
+    for (t, f), (t0, t1) in summary.items():
+        print(f'{f"{t}t {fmt[f]}":>12s}{t0:12.2f}{t1:14.2f}{1 - t1 / t0:9.1%}')
+    print('* block of the model, blocks timed per layer and summed x layer count, excluding ADD, Concat, Upsample, Detect')
+
+    if opt.rect:  # whole model, rectangular stream input vs square
+        torch.set_num_threads(opt.threads[0])
+        profile_rect(model, opt.rect, opt.img_size, opt.n)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--weights', type=str, default='weights/best1.pt', help='model.pt path')
+    parser.add_argument('--img-size', type=int, default=320, help='inference size (pixels)')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4], help='CPU thread counts')
+    parser.add_argument('--channels-last', action='store_true', help='also time channels_last (NHWC) tensors')
+    parser.add_argument('--n', type=int, default=100, help='timed iterations per block')
+    parser.add_argument('--rect', type=int, nargs=2, metavar=('H', 'W'), help='also time the model at this rect shape')
+    opt = parser.parse_args()
+    print(opt)
+    benchmark(opt)
@@ -0,0 +1,90 @@
+"""Cold start import time of the sandbox inference path, from python -X importtime
+
+Imports --modules in a fresh interpreter --runs times and reports the median total, the self time per top-level
+package and which module first imported each of the --heavy training and plotting dependencies.
+
+Usage:
+    $ python benchmark_imports.py --runs 5 --check
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+INFERENCE = ['models.experimental', 'utils.bus', 'utils.datasets', 'utils.general', 'utils.maneuver', 'utils.motion',
+             'utils.pipeline', 'utils.plots', 'utils.torch_utils', 'utils.tracker']  # 08_Autopilot_map_sandbox.ipynb
+HEAVY = ['matplotlib', 'pandas', 'PIL', 'requests', 'scipy', 'seaborn', 'thop', 'torchvision', 'yaml']
+
+
+def importtime(modules):
+    # Return [(self_us, cumulative_us, depth, module), ...] of one cold import of modules, in -X importtime order
+    cmd = [sys.executable, '-X', 'importtime', '-c', f'import {", ".join(modules)}']
+    p = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    assert p.returncode == 0, f'import failed:\n{p.stderr[-2000:]}'
+    rows = []
+    for line in p.stderr.splitlines():
+        m = re.match(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)', line)
+        if m:
+            rows.append((int(m[1]), int(m[2]), (len(m[3]) - 1) // 2, m[4]))
+    return rows
+
+
+def parents(rows):
+    # Return {module: importing module}, children are listed before their parent at depth - 1
+    parent, stack = {}, []  # stack of (depth, module) awaiting their parent
+    for _, _, depth, name in rows:
+        while stack and stack[-1][0] > depth:
+            parent[stack.pop()[1]] = name
+        stack.append((depth, name))
+    return parent
+
+
+def chain(module, parent, project=('models', 'utils')):
+    # Return 'module <- ... <- first project module' import chain
+    c = [module]
+    while c[-1] in parent and c[-1].split('.')[0] not in project:
+        c.append(parent[c[-1]])
+    return ' <- '.join(c)
+
+
+def benchmark(opt):
+    baseline = statistics.median(sum(r[0] for r in importtime(['sys'])) for _ in range(opt.runs))  # interpreter, site
+    runs = [importtime(opt.modules) for _ in range(opt.runs)]
+    total = statistics.median(sum(r[0] for r in rows) for rows in runs) - baseline
+    rows = runs[len(runs) // 2]
+
+    packages = {}  # top-level package: self us
+    for us, _, _, name in rows:
+        packages[name.split('.')[0]] = packages.get(name.split('.')[0], 0) + us
+    print(f'import {", ".join(opt.modules)}\n{total / 1E3:.0f} ms median of {opt.runs} runs, excluding interpreter startup')
+    print(f"\n{'package':>20s}{'self (ms)':>12s}")
+    for k, us in sorted(packages.items(), key=lambda x: -x[1])[:opt.top]:
+        print(f'{k:>20s}{us / 1E3:12.1f}')
+
+    print(f"\n{'module':>20s}{'cumulative (ms)':>18s}")
+    for us, cum, depth, name in rows:
+        if name.split('.')[0] in ('models', 'utils') and name in opt.modules:
+            print(f'{name:>20s}{cum / 1E3:18.1f}')
+
+    parent = parents(rows)
+    found = [k for k in opt.heavy if k in packages]
+    print(f'\nheavy modules imported: {", ".join(found) or "none"}')
+    for k in found:
+        print(f'  {packages[k] / 1E3:6.1f} ms {chain(k, parent)}')
+    return found
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--modules', nargs='+', default=INFERENCE, help='modules to import')
+    parser.add_argument('--heavy', nargs='+', default=HEAVY, help='packages the modules should not import')
+    parser.add_argument('--runs', type=int, default=5, help='cold imports, median reported')
+    parser.add_argument('--top', type=int, default=15, help='packages listed')
+    parser.add_argument('--check', action='store_true', help='exit 1 if any --heavy package is imported')
+    opt = parser.parse_args()
+    found = benchmark(opt)
+    sys.exit(1 if opt.check and found else 0)
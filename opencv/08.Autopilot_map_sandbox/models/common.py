@@ -6,19 +6,21 @@ from copy import copy
 from pathlib import Path
 
 import numpy as np
-import pandas as pd
-import requests
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
-from PIL import Image
 from torch.cuda import amp
 
 from utils.datasets import letterbox
-from utils.general import non_max_suppression, make_divisible, scale_coords, increment_path, xyxy2xywh
+from utils.general import LazyModule, non_max_suppression, make_divisible, scale_coords, increment_path, xyxy2xywh
 from utils.plots import color_list, plot_one_box
 from utils.torch_utils import time_synchronized
 
+# autoShape() and Detections() input and output types, slow imports off the inference path
+pd = LazyModule('pandas', lambda m: setattr(m.options.display, 'max_columns', 10))
+requests = LazyModule('requests')
+Image = LazyModule('PIL.Image')
+
 
 def autopad(k, p=None):  # kernel, padding
     # Pad to 'same'
@@ -694,6 +696,9 @@ class DWConvblock(nn.Module):
         x = F.relu(x)
         return x
 
+    def fuseforward(self, x):
+        return F.relu(self.conv2(F.relu(self.conv1(x))))
+
 # DWConvblock end
 # -------------------------------------------------------------------------
 
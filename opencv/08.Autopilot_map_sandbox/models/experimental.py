@@ -1,5 +1,8 @@
 # YOLOv5 experimental modules
 
+import hashlib
+from pathlib import Path
+
 import numpy as np
 import torch
 import torch.nn as nn
@@ -133,3 +136,18 @@ def attempt_load(weights, map_location=None):
         for k in ['names', 'stride']:
             setattr(model, k, getattr(model[-1], k))
         return model  # return ensemble
+
+
+def attempt_load_deploy(weights, map_location=None):
+    # Loads a single model compiled for deploy: fused and training state stripped. The artifact is cached next to
+    # weights keyed by weight path, size, mtime and torch version, so later starts skip the checkpoint unpickle and fuse
+    attempt_download(weights)
+    st = Path(weights).stat()
+    key = f'{Path(weights).resolve()} {st.st_size} {st.st_mtime_ns} {torch.__version__}'
+    f = Path(weights).with_name(f'{Path(weights).stem}-deploy-{hashlib.sha256(key.encode()).hexdigest()[:12]}.pt')
+
+    if not f.exists():
+        model = attempt_load(weights, map_location='cpu').requires_grad_(False)  # fused FP32 model
+        torch.save(model, f)
+        print(f'Deploy model compiled, saved as {f}')
+    return torch.load(f, map_location=map_location, weights_only=False)
@@ -15,15 +15,12 @@ from utils.general import make_divisible, check_file, set_logging, xywh2xyxy
 from utils.torch_utils import time_synchronized, fuse_conv_and_bn, model_info, scale_img, initialize_weights, \
     select_device, copy_attr
 
-try:
-    import thop  # for FLOPS computation
-except ImportError:
-    thop = None
-
 
 class Detect(nn.Module):
     stride = None  # strides computed during build
     export = False  # onnx export
+    decode_buffer = False  # inference decode into a reused output buffer, see decode_forward(). Opt-in, callers clone
+    decode = None  # (key, out, xy_gain, xy_offset, wh_gain) for the last input shape
 
     def __init__(self, nc=80, anchors=(), ch=()):  # detection layer
         super(Detect, self).__init__()
@@ -41,6 +38,9 @@ class Detect(nn.Module):
         # x = x.copy()  # for profiling
         z = []  # inference output
         self.training |= self.export
+        if not self.training and self.decode_buffer and not torch.jit.is_tracing() and \
+                not (torch.is_grad_enabled() and self.m[0].weight.requires_grad):
+            return self.decode_forward(x)
         for i in range(self.nl):
             x[i] = self.m[i](x[i])  # conv
             bs, _, ny, nx = x[i].shape  # x(bs,255,20,20) to x(bs,3,20,20,85)
@@ -57,6 +57,45 @@ class Detect(nn.Module):
 
         return x if self.training else (torch.cat(z, 1), x)
 
+    def decode_forward(self, x):
+        # Inference decode of all levels in one in-place pass. The returned output tensor is a buffer that is
+        # overwritten by the next call of the same input shape, x are the raw permuted (non-contiguous) level outputs
+        for i in range(self.nl):
+            x[i] = self.m[i](x[i])  # conv
+        key = (x[0].shape[0], x[0].dtype, x[0].device) + tuple(xi.shape[2:4] for xi in x)
+        if self.decode is None or self.decode[0] != key:
+            self.decode = (key,) + self._make_decode(x)
+        _, out, xy_gain, xy_offset, wh_gain = self.decode
+
+        j = 0
+        for i in range(self.nl):
+            bs, _, ny, nx = x[i].shape  # x(bs,255,20,20) to x(bs,3,20,20,85)
+            x[i] = x[i].view(bs, self.na, self.no, ny, nx).permute(0, 1, 3, 4, 2)
+            n = self.na * ny * nx
+            out[:, j:j + n].view(bs, self.na, ny, nx, self.no).copy_(x[i])
+            j += n
+
+        out.sigmoid_()
+        xy, wh = out[..., 0:2], out[..., 2:4]
+        xy.mul_(xy_gain).add_(xy_offset)  # xy = (y * 2 - 0.5 + grid) * stride
+        wh.mul_(wh).mul_(wh_gain)  # wh = (y * 2) ** 2 * anchor_grid
+        return out, x
+
+    def _make_decode(self, x):
+        # Output buffer and concatenated (1, n, 2) xy gain, xy offset and wh gain tensors for level outputs x
+        xy_gain, xy_offset, wh_gain = [], [], []
+        for i in range(self.nl):
+            ny, nx = x[i].shape[2:4]
+            if self.grid[i].shape[2:4] != (ny, nx):
+                self.grid[i] = self._make_grid(nx, ny).to(x[i].device)
+            grid = self.grid[i].expand(1, self.na, ny, nx, 2)
+            xy_gain.append(torch.full_like(grid, 2. * self.stride[i]).reshape(1, -1, 2))
+            xy_offset.append(((grid - 0.5) * self.stride[i]).reshape(1, -1, 2))
+            wh_gain.append((self.anchor_grid[i] * 4.).expand(1, self.na, ny, nx, 2).reshape(1, -1, 2))
+        xy_gain, xy_offset, wh_gain = (torch.cat(t, 1).to(x[0].dtype) for t in (xy_gain, xy_offset, wh_gain))
+        out = torch.empty(x[0].shape[0], xy_gain.shape[1], self.no, dtype=x[0].dtype, device=x[0].device)
+        return out, xy_gain, xy_offset, wh_gain
+
     def cat_forward(self, x):
         z = []  # inference output
         for i in range(self.nl):
@@ -229,7 +268,11 @@ class Model(nn.Module):
                 x = y[m.f] if isinstance(m.f, int) else [x if j == -1 else y[j] for j in m.f]  # from earlier layers
 
             if profile:
-                o = thop.profile(m, inputs=(x,))[0] / 1E9 * 2 if thop else 0  # FLOPS
+                try:
+                    import thop  # for FLOPS computation, slow import
+                    o = thop.profile(m, inputs=(x,))[0] / 1E9 * 2  # FLOPS
+                except ImportError:
+                    o = 0
                 t = time_synchronized()
                 for _ in range(10):
                     _ = m(x)
@@ -343,6 +386,16 @@ class Model(nn.Module):
                     # pdb.set_trace()
                     m.branch2 = re_branch2
                     # print(m.branch2)
+
+            if type(m) is DWConvblock and hasattr(m, 'bn1'):
+                m.conv1 = fuse_conv_and_bn(m.conv1, m.bn1)  # depthwise
+                m.conv2 = fuse_conv_and_bn(m.conv2, m.bn2)  # pointwise
+                delattr(m, 'bn1')
+                delattr(m, 'bn2')
+                m.forward = m.fuseforward  # update forward
+
+            if type(m) in [conv_bn_relu_maxpool, stem] and type(m.conv[1]) is nn.BatchNorm2d:
+                m.conv = nn.Sequential(fuse_conv_and_bn(m.conv[0], m.conv[1]), m.conv[2])  # conv, act
         self.info()
         return self
 
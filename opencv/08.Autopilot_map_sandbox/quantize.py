@@ -0,0 +1,204 @@
+"""Post-training INT8 quantization of a YOLOv5-Lite model for CPU inference
+
+Exports the fused FP32 model to ONNX, calibrates ONNX Runtime static quantization on a sample of
+LoadImagesAndLabels images and reports per-class mAP drift and CPU latency of INT8 versus FP32.
+
+Usage:
+    $ python quantize.py --weights weights/best1.pt --data ../signs/images/val --img-size 320
+"""
+
+import argparse
+import inspect
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+sys.path.append('./')  # to run '$ python *.py' files in subdirectories
+
+from models.experimental import attempt_load
+from models.yolo import Detect
+from utils.datasets import LoadImagesAndLabels
+from utils.general import check_img_size, check_requirements, colorstr, non_max_suppression, scale_coords, \
+    set_logging, xywh2xyxy
+from utils.metrics import ap_per_class, match_predictions
+from utils.torch_utils import select_device, time_synchronized
+
+
+def export_onnx(model, img_size, f):
+    # Export the fused FP32 model with a fixed (1, 3, img_size, img_size) input, decode included
+    img = torch.zeros(1, 3, img_size, img_size)
+    model.model[-1].export = False  # keep the decoded (1, n, no) output
+    y = model(img)  # dry run, builds Detect grids for img_size
+    kwargs = {'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}  # torch>=2.5
+    torch.onnx.export(model, img, f, verbose=False, opset_version=13, input_names=['images'], output_names=['output'],
+                      do_constant_folding=True, **kwargs)
+    return y[0].shape
+
+
+class CalibrationReader:
+    # onnxruntime.quantization.CalibrationDataReader interface over a fixed-seed sample of dataset images
+    def __init__(self, dataset, n=100, input_name='images', seed=0):
+        self.dataset = dataset
+        self.input_name = input_name
+        self.indices = np.random.RandomState(seed).permutation(len(dataset))[:n].tolist()
+        self.iter = iter(self.indices)
+
+    def get_next(self):
+        i = next(self.iter, None)
+        if i is None:
+            return None
+        img = self.dataset[i][0].float().div_(255.0)[None]  # uint8 to 0.0 - 1.0, add batch dim
+        return {self.input_name: img.numpy()}
+
+    def rewind(self):
+        self.iter = iter(self.indices)
+
+
+def quantize_onnx(f, f_int8, reader, detect_index, method='percentile'):
+    # Static QDQ quantization of every node except the Detect() decode, which stays FP32
+    import onnx
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+
+    graph = onnx.load(f).graph
+    scope = f'/model.{detect_index}/'
+    exclude = [n.name for n in graph.node if n.name.startswith(scope) and not n.name.startswith(scope + 'm.')]
+    methods = {'minmax': CalibrationMethod.MinMax, 'entropy': CalibrationMethod.Entropy,
+               'percentile': CalibrationMethod.Percentile}
+    kwargs = {'nodes_to_exclude': exclude} if exclude else {'op_types_to_quantize': ['Conv']}  # unscoped names
+    quantize_static(f, f_int8, reader, quant_format=QuantFormat.QDQ, per_channel=True,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+                    calibrate_method=methods[method], **kwargs)
+
+
+def evaluate(forward, dataset, nc, conf_thres=0.001, iou_thres=0.6):
+    # Run forward(img) -> (1, n, no) predictions over dataset, return per-class AP50, AP50-95 and ms/img
+    iouv = torch.linspace(0.5, 0.95, 10)  # iou vector for mAP@0.5:0.95
+    stats, dt = [], []
+    for i in range(len(dataset)):
+        img, targets, _, shapes = dataset[i]
+        img = img.float().div_(255.0)[None]
+        t = time_synchronized()
+        pred = forward(img)
+        dt.append(time_synchronized() - t)
+        det = non_max_suppression(pred, conf_thres, iou_thres)[0]
+
+        labels = targets[:, 1:]  # class, xywh normalized
+        tcls = labels[:, 0].tolist()
+        if not len(det):
+            if len(labels):
+                stats.append((torch.zeros(0, iouv.numel(), dtype=torch.bool), torch.Tensor(), torch.Tensor(), tcls))
+            continue
+
+        # Native-space predictions and labels
+        h, w = img.shape[2:]
+        predn = det.clone()
+        scale_coords(img.shape[2:], predn[:, :4], shapes[0], shapes[1])
+        correct = torch.zeros(det.shape[0], iouv.numel(), dtype=torch.bool)
+        if len(labels):
+            tbox = xywh2xyxy(labels[:, 1:5] * torch.Tensor([w, h, w, h]))
+            scale_coords(img.shape[2:], tbox, shapes[0], shapes[1])
+            correct = match_predictions(predn, torch.cat((labels[:, 0:1], tbox), 1), iouv)
+        stats.append((correct, det[:, 4], det[:, 5], tcls))
+
+    stats = [np.concatenate(x, 0) for x in zip(*stats)]  # to numpy
+    ap50, ap = np.zeros(nc), np.zeros(nc)
+    if len(stats) and stats[0].any():
+        _, _, ap_, _, ap_class = ap_per_class(*stats)
+        ap50[ap_class], ap[ap_class] = ap_[:, 0], ap_.mean(1)
+    return ap50, ap, np.array(dt) * 1E3
+
+
+def benchmark(forward, img, n=100):
+    # Return p50, p95 CPU latency (ms) of forward(img) after a warmup
+    for _ in range(10):
+        forward(img)
+    dt = []
+    for _ in range(n):
+        t = time_synchronized()
+        forward(img)
+        dt.append(time_synchronized() - t)
+    return np.percentile(np.array(dt) * 1E3, [50, 95])
+
+
+def quantize(opt):
+    check_requirements(('onnx', 'onnxruntime'))
+    import onnxruntime
+
+    set_logging()
+    device = select_device('cpu')
+    prefix = colorstr('quantize: ')
+    model = attempt_load(opt.weights, map_location=device)  # fused FP32 model
+    stride = int(model.stride.max())
+    imgsz = check_img_size(opt.img_size, s=stride)
+    names = model.module.names if hasattr(model, 'module') else model.names
+    detect_index = next(i for i, m in enumerate(model.model) if isinstance(m, Detect))
+
+    # Datasets: letterboxed to the fixed export shape
+    val = LoadImagesAndLabels(opt.data, imgsz, 1, stride=stride, prefix=prefix)
+    calib = LoadImagesAndLabels(opt.calib_data, imgsz, 1, stride=stride, prefix=prefix) if opt.calib_data else val
+
+    # Export and quantize
+    f = Path(opt.weights).with_suffix('.onnx')
+    f_int8 = f.with_name(f.stem + '-int8.onnx')
+    with torch.no_grad():
+        export_onnx(model, imgsz, str(f))
+    print(f'{prefix}FP32 ONNX export success, saved as {f}')
+    quantize_onnx(str(f), str(f_int8), CalibrationReader(calib, n=opt.calib), detect_index, opt.method)
+    print(f'{prefix}INT8 {opt.method} calibration on {min(opt.calib, len(calib))} images success, saved as {f_int8}')
+
+    # Runners
+    so = onnxruntime.SessionOptions()
+    so.intra_op_num_threads = opt.threads or so.intra_op_num_threads
+    sessions = {k: onnxruntime.InferenceSession(str(x), so, providers=['CPUExecutionProvider'])
+                for k, x in (('onnx', f), ('int8', f_int8))}
+
+    def ort(session):
+        return lambda x: torch.from_numpy(session.run(None, {'images': x.numpy()})[0])
+
+    if opt.threads:
+        torch.set_num_threads(opt.threads)
+    runners = {'torch': lambda x: model(x)[0], 'onnx': ort(sessions['onnx']), 'int8': ort(sessions['int8'])}
+
+    # Accuracy
+    results = {}
+    with torch.no_grad():
+        for k in ('torch', 'int8'):
+            results[k] = evaluate(runners[k], val, len(names))
+    (ap50, ap, _), (ap50q, apq, _) = results['torch'], results['int8']
+    nt = np.bincount(np.concatenate([l[:, 0] for l in val.labels], 0).astype(np.int64), minlength=len(names))
+    print(f"\n{'Class':>12s}{'Labels':>8s}{'FP32 AP50':>11s}{'INT8 AP50':>11s}{'drift':>9s}"
+          f"{'FP32 AP':>10s}{'INT8 AP':>10s}{'drift':>9s}")
+    for i, name in enumerate(names):
+        if nt[i]:
+            print(f'{name:>12s}{nt[i]:8d}{ap50[i]:11.3f}{ap50q[i]:11.3f}{ap50q[i] - ap50[i]:+9.3f}'
+                  f'{ap[i]:10.3f}{apq[i]:10.3f}{apq[i] - ap[i]:+9.3f}')
+    c = nt > 0  # classes with labels
+    print(f"{'all':>12s}{nt.sum():8d}{ap50[c].mean():11.3f}{ap50q[c].mean():11.3f}{ap50q[c].mean() - ap50[c].mean():+9.3f}"
+          f'{ap[c].mean():10.3f}{apq[c].mean():10.3f}{apq[c].mean() - ap[c].mean():+9.3f}')
+
+    # Latency
+    img = torch.zeros(1, 3, imgsz, imgsz)
+    print(f"\n{'Runtime':>12s}{'p50 (ms)':>10s}{'p95 (ms)':>10s}{'speedup':>9s}")
+    with torch.no_grad():
+        t = {k: benchmark(r, img) for k, r in runners.items()}
+    for k, name in (('torch', 'FP32 torch'), ('onnx', 'FP32 ORT'), ('int8', 'INT8 ORT')):
+        print(f"{name:>12s}{t[k][0]:10.1f}{t[k][1]:10.1f}{t['torch'][0] / t[k][0]:8.2f}x")
+    return f_int8
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--weights', type=str, default='weights/best1.pt', help='model.pt path')
+    parser.add_argument('--data', type=str, required=True, help='validation images dir or *.txt list, YOLO labels')
+    parser.add_argument('--calib-data', type=str, default='', help='calibration images, default --data')
+    parser.add_argument('--calib', type=int, default=100, help='number of calibration images')
+    parser.add_argument('--method', type=str, default='percentile', choices=('minmax', 'entropy', 'percentile'),
+                        help='activation range calibration, percentile clips SiLU/Hardswish outliers')
+    parser.add_argument('--img-size', type=int, default=320, help='inference size (pixels)')
+    parser.add_argument('--threads', type=int, default=0, help='CPU threads for torch and ORT, 0 for default')
+    opt = parser.parse_args()
+    print(opt)
+    quantize(opt)
@@ -2,8 +2,6 @@
 
 import numpy as np
 import torch
-import yaml
-from scipy.cluster.vq import kmeans
 from tqdm import tqdm
 
 from utils.general import colorstr
@@ -20,8 +18,9 @@ def check_anchor_order(m):
         m.anchor_grid[:] = m.anchor_grid.flip(0)
 
 
-def check_anchors(dataset, model, thr=4.0, imgsz=640):
-    # Check anchor fit to data, recompute if necessary
+def check_anchors(dataset, model, thr=4.0, imgsz=640, pop=1, patience=0, sample=0):
+    # Check anchor fit to data, recompute if necessary. pop, patience and sample are passed to kmean_anchors, i.e.
+    # pop=16, patience=50, sample=10000 for a faster but different evolution on large datasets
     prefix = colorstr('autoanchor: ')
     print(f'\n{prefix}Analyzing anchors... ', end='')
     m = model.module.model[-1] if hasattr(model, 'module') else model.model[-1]  # Detect()
@@ -44,7 +43,8 @@ def check_anchors(dataset, model, thr=4.0, imgsz=640):
         print('. Attempting to improve anchors, please wait...')
         na = m.anchor_grid.numel() // 2  # number of anchors
         try:
-            anchors = kmean_anchors(dataset, n=na, img_size=imgsz, thr=thr, gen=1000, verbose=False)
+            anchors = kmean_anchors(dataset, n=na, img_size=imgsz, thr=thr, gen=1000, verbose=False, pop=pop,
+                                    patience=patience, sample=sample)
         except Exception as e:
             print(f'{prefix}ERROR: {e}')
         new_bpr = metric(anchors)[0]
@@ -59,7 +59,8 @@ def check_anchors(dataset, model, thr=4.0, imgsz=640):
     print('')  # newline
 
 
-def kmean_anchors(path='./data/coco128.yaml', n=9, img_size=640, thr=4.0, gen=1000, verbose=True):
+def kmean_anchors(path='./data/coco128.yaml', n=9, img_size=640, thr=4.0, gen=1000, verbose=True, pop=1, patience=0,
+                  sample=0, seed=0):
     """ Creates kmeans-evolved anchors from training dataset
 
         Arguments:
@@ -69,6 +70,10 @@ def kmean_anchors(path='./data/coco128.yaml', n=9, img_size=640, thr=4.0, gen=10
             thr: anchor-label wh ratio threshold hyperparameter hyp['anchor_t'] used for training, default=4.0
             gen: generations to evolve anchors using genetic algorithm
             verbose: print all results
+            pop: mutations evaluated together per generation, > 1 for batched evolution seeded by seed
+            patience: stop after this many generations without a fitness gain > 1e-4, 0 to run all generations
+            sample: evolve on a seeded random sample of at most this many labels, 0 for all labels
+            seed: random seed of sample and of batched evolution
 
         Return:
             k: kmeans evolved anchors
@@ -89,6 +94,14 @@ def kmean_anchors(path='./data/coco128.yaml', n=9, img_size=640, thr=4.0, gen=10
         _, best = metric(torch.tensor(k, dtype=torch.float32), wh)
         return (best * (best > thr).float()).mean()  # fitness
 
+    def population_fitness(k):  # anchor_fitness() of each of a (pop, n, 2) population of anchor sets
+        k, f = torch.tensor(k, dtype=torch.float32).log(), torch.zeros(len(k))
+        for w in lwh.split(max(2 ** 20 // k.numel(), 1)):  # chunks of labels, (pop, labels, n, 2) <= 4 MB
+            d = (w[None, :, None] - k[:, None]).abs_().amax(3).amin(2)  # min over anchors of max |log(wh / k)|
+            best = d.neg_().exp_()  # (pop, labels) best_x, ratio metric
+            f += (best * (best > thr).float()).sum(1)
+        return f / len(wh)
+
     def print_results(k):
         k = k[np.argsort(k.prod(1))]  # sort small to large
         x, best = metric(k, wh0)
@@ -100,6 +113,9 @@ def kmean_anchors(path='./data/coco128.yaml', n=9, img_size=640, thr=4.0, gen=10
             print('%i,%i' % (round(x[0]), round(x[1])), end=',  ' if i < len(k) - 1 else '\n')  # use in *.cfg
         return k
 
+    from scipy.cluster.vq import kmeans  # slow imports, training only
+    import yaml
+
     if isinstance(path, str):  # *.yaml file
         with open(path) as f:
             data_dict = yaml.load(f, Loader=yaml.SafeLoader)  # model dict
@@ -118,6 +134,9 @@ def kmean_anchors(path='./data/coco128.yaml', n=9, img_size=640, thr=4.0, gen=10
         print(f'{prefix}WARNING: Extremely small objects found. {i} of {len(wh0)} labels are < 3 pixels in size.')
     wh = wh0[(wh0 >= 2.0).any(1)]  # filter > 2 pixels
     # wh = wh * (np.random.rand(wh.shape[0], 1) * 0.9 + 0.1)  # multiply by random scale 0-1
+    if 0 < sample < len(wh):
+        print(f'{prefix}Sampling {sample} of {len(wh)} labels')
+        wh = wh[np.random.RandomState(seed).choice(len(wh), sample, replace=False)]
 
     # Kmeans calculation
     print(f'{prefix}Running kmeans for {n} anchors on {len(wh)} points...')
@@ -142,19 +161,35 @@ def kmean_anchors(path='./data/coco128.yaml', n=9, img_size=640, thr=4.0, gen=10
     # fig.savefig('wh.png', dpi=200)
 
     # Evolve
-    npr = np.random
+    npr = np.random if pop == 1 else np.random.RandomState(seed)
     f, sh, mp, s = anchor_fitness(k), k.shape, 0.9, 0.1  # fitness, generations, mutation prob, sigma
+    f0, stall = f, 0  # fitness at the last gain > 1e-4, generations since
+    lwh = wh.log()  # for population_fitness()
     pbar = tqdm(range(gen), desc=f'{prefix}Evolving anchors with Genetic Algorithm:')  # progress bar
     for _ in pbar:
-        v = np.ones(sh)
-        while (v == 1).all():  # mutate until a change occurs (prevent duplicates)
-            v = ((npr.random(sh) < mp) * npr.random() * npr.randn(*sh) * s + 1).clip(0.3, 3.0)
-        kg = (k.copy() * v).clip(min=2.0)
-        fg = anchor_fitness(kg)
+        if pop == 1:
+            v = np.ones(sh)
+            while (v == 1).all():  # mutate until a change occurs (prevent duplicates)
+                v = ((npr.random(sh) < mp) * npr.random() * npr.randn(*sh) * s + 1).clip(0.3, 3.0)
+            kg = (k.copy() * v).clip(min=2.0)
+            fg = anchor_fitness(kg)
+        else:  # pop mutations of k, one sigma scale each, evaluated together
+            v = ((npr.random((pop, *sh)) < mp) * npr.random((pop, 1, 1)) * npr.randn(pop, *sh) * s + 1).clip(0.3, 3.0)
+            kp = (k * v).clip(min=2.0)
+            fp = population_fitness(kp)
+            i = int(fp.argmax())
+            kg, fg = kp[i], fp[i]
         if fg > f:
             f, k = fg, kg.copy()
             pbar.desc = f'{prefix}Evolving anchors with Genetic Algorithm: fitness = {f:.4f}'
             if verbose:
                 print_results(k)
+        stall += 1
+        if f - f0 > 1e-4:
+            f0, stall = f, 0
+        if patience and stall >= patience:
+            pbar.close()
+            print(f'{prefix}Stopping, fitness {f:.4f} did not improve by > 1e-4 in the last {patience} generations')
+            break
 
     return print_results(k)
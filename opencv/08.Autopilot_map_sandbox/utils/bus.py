@@ -0,0 +1,75 @@
+# Detection bus: thread-safe, timestamped hand-off of detections from the detector to control threads
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class Detection:
+    seq: int  # camera frame sequence number
+    stamp: float  # frame capture time.time()
+    cls: str  # class name
+    conf: float  # confidence
+    box: tuple  # (x1, y1, x2, y2) pixels in the camera frame
+    id: int = 0  # track id, 0 if untracked
+
+    @property
+    def age(self):
+        # Seconds since capture
+        return time.time() - self.stamp
+
+
+class DetectionBus:
+    # Latest detections published per frame by one thread and read atomically by others. Ages are measured from frame
+    # capture to publish and to the first read of each frame
+    def __init__(self, window=300):
+        self.lock = threading.Lock()
+        self.seq, self.stamp = 0, 0.0  # last published frame
+        self.frame = ()  # detections of the last published frame, highest conf first
+        self.best = None  # highest conf detection of the last frame with any
+        self.last = {}  # class name: highest conf detection of the last frame with that class
+        self.read_seq = 0  # last frame returned by latest()
+        self.publish_age = deque(maxlen=window)  # seconds
+        self.read_age = deque(maxlen=window)  # seconds
+
+    def publish(self, seq, stamp, detections):
+        # Replace the current frame with detections (iterable of Detection) of frame seq captured at stamp
+        frame = tuple(sorted(detections, key=lambda x: -x.conf))
+        with self.lock:
+            self.seq, self.stamp, self.frame = seq, stamp, frame
+            if frame:
+                self.best = frame[0]
+            for d in reversed(frame):  # highest conf wins
+                self.last[d.cls] = d
+            self.publish_age.append(time.time() - stamp)
+
+    def snapshot(self):
+        # Return (seq, stamp, detections) of the last published frame
+        with self.lock:
+            return self.seq, self.stamp, self.frame
+
+    def latest(self, max_age_ms=None, cls=None):
+        # Return the newest highest conf Detection, of class cls if given, captured less than max_age_ms ago, else None
+        with self.lock:
+            d = self.best if cls is None else self.last.get(cls)
+            if d is None or (max_age_ms is not None and d.age * 1E3 > max_age_ms):
+                return None
+            if d.seq > self.read_seq:  # first read of this frame
+                self.read_seq = d.seq
+                self.read_age.append(d.age)
+            return d
+
+    def stats(self):
+        # Capture-to-publish and capture-to-read age percentiles
+        with self.lock:
+            ages = ('publish', list(self.publish_age)), ('read', list(self.read_age))
+        s = []
+        for k, v in ages:
+            if len(v):
+                p50, p95, mx = np.percentile(np.array(v) * 1E3, [50, 95, 100])
+                s.append(f'{k} age p50 {p50:.0f} p95 {p95:.0f} max {mx:.0f}ms')
+        return ', '.join(s) if s else 'no detections'
@@ -8,16 +8,16 @@ import random
 import shutil
 import time
 from itertools import repeat
-from multiprocessing.pool import ThreadPool
+from multiprocessing.pool import Pool, ThreadPool
 from pathlib import Path
-from threading import Thread
+from threading import Condition, Thread
 
 import cv2
 import numpy as np
 import torch
 import torch.nn.functional as F
-from PIL import Image, ExifTags
 from torch.utils.data import Dataset
+from torch.utils.data._utils.collate import default_collate
 from tqdm import tqdm
 
 from utils.general import check_requirements, xyxy2xywh, xywh2xyxy, xywhn2xyxy, xyn2xy, segment2box, segments2boxes, \
@@ -28,17 +28,19 @@ from utils.torch_utils import torch_distributed_zero_first
 help_url = 'https://github.com/ultralytics/yolov5/wiki/Train-Custom-Data'
 img_formats = ['bmp', 'jpg', 'jpeg', 'png', 'tif', 'tiff', 'dng', 'webp', 'mpo']  # acceptable image suffixes
 vid_formats = ['mov', 'avi', 'mp4', 'mpg', 'mpeg', 'm4v', 'wmv', 'mkv']  # acceptable video suffixes
+num_threads = min(8, os.cpu_count())  # number of label verification processes
 logger = logging.getLogger(__name__)
 
-# Get orientation exif tag
-for orientation in ExifTags.TAGS.keys():
-    if ExifTags.TAGS[orientation] == 'Orientation':
-        break
+orientation = 274  # PIL.ExifTags 'Orientation' tag
 
 
-def get_hash(files):
-    # Returns a single hash value of a list of files
-    return sum(os.path.getsize(f) for f in files if os.path.isfile(f))
+def file_stat(f):
+    # Returns (mtime_ns, size) of file f, None if missing
+    try:
+        s = os.stat(f)
+        return s.st_mtime_ns, s.st_size
+    except OSError:
+        return None
 
 
 def exif_size(img):
@@ -258,7 +260,7 @@ class LoadWebcam:  # for inference
 
 
 class LoadStreams:  # multiple IP or RTSP cameras
-    def __init__(self, sources='streams.txt', img_size=640, stride=32):
+    def __init__(self, sources='streams.txt', img_size=640, stride=32, rect=True, blob=False):
         self.mode = 'stream'
         self.img_size = img_size
         self.stride = stride
@@ -271,6 +273,10 @@ class LoadStreams:  # multiple IP or RTSP cameras
 
         n = len(sources)
         self.imgs = [None] * n
+        self.seq, self.stamp = [0] * n, [0.0] * n  # frame sequence number and time.time() per stream
+        self.last = [0] * n  # seq of the frames last returned by __next__()
+        self.demand = [True] * n  # consumer wants a new frame
+        self.cond = Condition()
         self.sources = [clean_str(x) for x in sources]  # clean source names for later
         for i, s in enumerate(sources):
             # Start the thread to read frames from the video stream
@@ -287,6 +293,7 @@ class LoadStreams:  # multiple IP or RTSP cameras
             self.fps = cap.get(cv2.CAP_PROP_FPS) % 100
 
             _, self.imgs[i] = cap.read()  # guarantee first frame
+            self.seq[i], self.stamp[i] = 1, time.time()
             thread = Thread(target=self.update, args=([i, cap]), daemon=True)
             print(f' success ({w}x{h} at {self.fps:.2f} FPS).')
             thread.start()
@@ -294,22 +301,41 @@ class LoadStreams:  # multiple IP or RTSP cameras
 
         # check for common shapes
         s = np.stack([letterbox(x, self.img_size, stride=self.stride)[0].shape for x in self.imgs], 0)  # shapes
-        self.rect = np.unique(s, axis=0).shape[0] == 1  # rect inference if all shapes equal
-        if not self.rect:
+        self.rect = rect and np.unique(s, axis=0).shape[0] == 1  # rect inference if all shapes equal
+        if rect and not self.rect:
             print('WARNING: Different stream shapes detected. For optimal performance supply similarly-shaped streams.')
+        self.shape = tuple(int(x) for x in s[0, :2]) if self.rect else (self.img_size, self.img_size)  # inference (h, w)
+        if blob:  # float32 0.0 - 1.0 RGB output, reused every frame
+            self.blob = LetterboxBlob(self.shape)
+            self.blobs = np.empty((n, 3, *self.shape), dtype=np.float32)
+        else:
+            self.blob = None
 
     def update(self, index, cap):
-        # Read next stream frame in a daemon thread
-        n = 0
+        # Grab every frame as the driver delivers it in a daemon thread, decode only when a consumer wants a new one
         while cap.isOpened():
-            n += 1
-            # _, self.imgs[index] = cap.read()
-            cap.grab()
-            if n == 4:  # read every 4th frame
+            if not cap.grab():  # no frame, i.e. end of file or camera reconnecting
+                time.sleep(0.01)
+                continue
+            if self.demand[index]:
                 success, im = cap.retrieve()
-                self.imgs[index] = im if success else self.imgs[index] * 0
-                n = 0
-            time.sleep(1 / self.fps)  # wait time
+                with self.cond:
+                    self.imgs[index] = im if success else self.imgs[index] * 0
+                    self.seq[index] += 1
+                    self.stamp[index] = time.time()
+                    self.demand[index] = False
+                    self.cond.notify_all()
+
+    def latest(self, seen=None, timeout=None):
+        # Return (seq, stamp, imgs) lists once any stream has a frame newer than seq list seen, or None after timeout
+        seen = seen or [0] * len(self.imgs)
+        with self.cond:
+            for i, (s, k) in enumerate(zip(self.seq, seen)):
+                if s <= k:  # ask for a frame newer than the one already seen
+                    self.demand[i] = True
+            if not self.cond.wait_for(lambda: any(s > k for s, k in zip(self.seq, seen)), timeout):
+                return None
+            return self.seq.copy(), self.stamp.copy(), self.imgs.copy()
 
     def __iter__(self):
         self.count = -1
@@ -317,13 +343,21 @@ class LoadStreams:  # multiple IP or RTSP cameras
 
     def __next__(self):
         self.count += 1
-        img0 = self.imgs.copy()
-        if cv2.waitKey(1) == ord('q'):  # q to quit
-            cv2.destroyAllWindows()
-            raise StopIteration
+        frames = None
+        while frames is None:  # skip inference on frames already returned
+            if cv2.waitKey(1) == ord('q'):  # q to quit
+                cv2.destroyAllWindows()
+                raise StopIteration
+            frames = self.latest(self.last, timeout=0.1)
+        self.last, _, img0 = frames
+
+        if self.blob:  # letterbox into the persistent blob, torch.from_numpy(img) shares its memory
+            for i, x in enumerate(img0):
+                self.blob(x, self.blobs[i])
+            return self.sources, self.blobs, img0, None
 
         # Letterbox
-        img = [letterbox(x, self.img_size, auto=self.rect, stride=self.stride)[0] for x in img0]
+        img = [letterbox(x, self.shape, auto=False, stride=self.stride)[0] for x in img0]
 
         # Stack
         img = np.stack(img, 0)
@@ -344,7 +378,52 @@ def img2label_paths(img_paths):
     return ['txt'.join(x.replace(sa, sb, 1).rsplit(x.split('.')[-1], 1)) for x in img_paths]
 
 
+def verify_image_label(args):
+    # Verify one image-label pair, returns im_file, labels, shape, segments, nm, nf, ne, nc (0 or 1 each), message
+    im_file, lb_file, prefix = args
+    from PIL import Image  # slow import, label checks only
+
+    nm, nf, ne, nc = 0, 0, 0, 0  # number missing, found, empty, corrupt
+    try:
+        # verify images
+        im = Image.open(im_file)
+        im.verify()  # PIL verify
+        shape = exif_size(im)  # image size
+        segments = []  # instance segments
+        assert (shape[0] > 9) & (shape[1] > 9), f'image size {shape} <10 pixels'
+        assert im.format.lower() in img_formats, f'invalid image format {im.format}'
+
+        # verify labels
+        if os.path.isfile(lb_file):
+            nf = 1  # label found
+            with open(lb_file, 'r') as f:
+                l = [x.split() for x in f.read().strip().splitlines()]
+                if any([len(x) > 8 for x in l]):  # is segment
+                    classes = np.array([x[0] for x in l], dtype=np.float32)
+                    segments = [np.array(x[1:], dtype=np.float32).reshape(-1, 2) for x in l]  # (cls, xy1...)
+                    l = np.concatenate((classes.reshape(-1, 1), segments2boxes(segments)), 1)  # (cls, xywh)
+                l = np.array(l, dtype=np.float32)
+            if len(l):
+                assert l.shape[1] == 5, 'labels require 5 columns each'
+                assert (l >= 0).all(), 'negative labels'
+                assert (l[:, 1:] <= 1).all(), 'non-normalized or out of bounds coordinate labels'
+                assert np.unique(l, axis=0).shape[0] == l.shape[0], 'duplicate labels'
+            else:
+                ne = 1  # label empty
+                l = np.zeros((0, 5), dtype=np.float32)
+        else:
+            nm = 1  # label missing
+            l = np.zeros((0, 5), dtype=np.float32)
+        return im_file, l, shape, segments, nm, nf, ne, nc, ''
+    except Exception as e:
+        nc = 1
+        return im_file, None, None, None, nm, nf, ne, nc, \
+            f'{prefix}WARNING: Ignoring corrupted image and/or label {im_file}: {e}'
+
+
 class LoadImagesAndLabels(Dataset):  # for training/testing
+    cache_version = 0.2  # label cache version, 0.2 adds per-file stats for incremental rescans
+
     def __init__(self, path, img_size=640, batch_size=16, augment=False, hyp=None, rect=False, image_weights=False,
                  cache_images=False, single_cls=False, stride=32, pad=0.0, prefix=''):
         self.img_size = img_size
@@ -381,12 +460,10 @@ class LoadImagesAndLabels(Dataset):  # for training/testing
         # Check cache
         self.label_files = img2label_paths(self.img_files)  # labels
         cache_path = (p if p.is_file() else Path(self.label_files[0]).parent).with_suffix('.cache')  # cached labels
-        if cache_path.is_file():
-            cache, exists = torch.load(cache_path), True  # load
-            if cache['hash'] != get_hash(self.label_files + self.img_files) or 'version' not in cache:  # changed
-                cache, exists = self.cache_labels(cache_path, prefix), False  # re-cache
-        else:
-            cache, exists = self.cache_labels(cache_path, prefix), False  # cache
+        old = torch.load(cache_path, weights_only=False) if cache_path.is_file() else {}  # load
+        if old.get('version') != self.cache_version:
+            old = {}  # rescan all
+        cache, exists = self.cache_labels(cache_path, prefix, old)  # verify new and changed files only
 
         # Display cache
         nf, nm, ne, nc, n = cache.pop('results')  # found, missing, empty, corrupted, total
@@ -396,7 +473,7 @@ class LoadImagesAndLabels(Dataset):  # for training/testing
         assert nf > 0 or not augment, f'{prefix}No labels in {cache_path}. Can not train without labels. See {help_url}'
 
         # Read cache
-        cache.pop('hash')  # remove hash
+        cache.pop('stats')  # remove file stats
         cache.pop('version')  # remove version
         labels, shapes, self.segments = zip(*cache.values())
         self.labels = list(labels)
@@ -440,7 +517,12 @@ class LoadImagesAndLabels(Dataset):  # for training/testing
 
         # Cache images into memory for faster training (WARNING: large datasets may exceed system RAM)
         self.imgs = [None] * n
-        if cache_images:
+        self.img_cache = None  # DiskImageCache
+        if cache_images == 'disk':  # resized images in one memory-mapped file next to the label cache
+            self.img_cache = DiskImageCache(cache_path.with_name(f'{cache_path.stem}_{img_size}{"_aug" * augment}.imgs'))
+            if not self.img_cache.load(self.img_files, img_size, augment):
+                self.img_cache.build(self, prefix)
+        elif cache_images:
             gb = 0  # Gigabytes of cached images
             self.img_hw0, self.img_hw = [None] * n, [None] * n
             results = ThreadPool(8).imap(lambda x: load_image(*x), zip(repeat(self), range(n)))  # 8 threads
@@ -451,60 +533,58 @@ class LoadImagesAndLabels(Dataset):  # for training/testing
                 pbar.desc = f'{prefix}Caching images ({gb / 1E9:.1f}GB)'
             pbar.close()
 
-    def cache_labels(self, path=Path('./labels.cache'), prefix=''):
-        # Cache dataset labels, check images and read shapes
-        x = {}  # dict
-        nm, nf, ne, nc = 0, 0, 0, 0  # number missing, found, empty, duplicate
-        pbar = tqdm(zip(self.img_files, self.label_files), desc='Scanning images', total=len(self.img_files))
-        for i, (im_file, lb_file) in enumerate(pbar):
-            try:
-                # verify images
-                im = Image.open(im_file)
-                im.verify()  # PIL verify
-                shape = exif_size(im)  # image size
-                segments = []  # instance segments
-                assert (shape[0] > 9) & (shape[1] > 9), f'image size {shape} <10 pixels'
-                assert im.format.lower() in img_formats, f'invalid image format {im.format}'
-
-                # verify labels
-                if os.path.isfile(lb_file):
-                    nf += 1  # label found
-                    with open(lb_file, 'r') as f:
-                        l = [x.split() for x in f.read().strip().splitlines()]
-                        if any([len(x) > 8 for x in l]):  # is segment
-                            classes = np.array([x[0] for x in l], dtype=np.float32)
-                            segments = [np.array(x[1:], dtype=np.float32).reshape(-1, 2) for x in l]  # (cls, xy1...)
-                            l = np.concatenate((classes.reshape(-1, 1), segments2boxes(segments)), 1)  # (cls, xywh)
-                        l = np.array(l, dtype=np.float32)
-                    if len(l):
-                        assert l.shape[1] == 5, 'labels require 5 columns each'
-                        assert (l >= 0).all(), 'negative labels'
-                        assert (l[:, 1:] <= 1).all(), 'non-normalized or out of bounds coordinate labels'
-                        assert np.unique(l, axis=0).shape[0] == l.shape[0], 'duplicate labels'
-                    else:
-                        ne += 1  # label empty
-                        l = np.zeros((0, 5), dtype=np.float32)
-                else:
-                    nm += 1  # label missing
-                    l = np.zeros((0, 5), dtype=np.float32)
-                x[im_file] = [l, shape, segments]
-            except Exception as e:
-                nc += 1
-                print(f'{prefix}WARNING: Ignoring corrupted image and/or label {im_file}: {e}')
-
-            pbar.desc = f"{prefix}Scanning '{path.parent / path.stem}' images and labels... " \
-                        f"{nf} found, {nm} missing, {ne} empty, {nc} corrupted"
-        pbar.close()
+    def cache_labels(self, path=Path('./labels.cache'), prefix='', old=None):
+        # Cache dataset labels, check images and read shapes. Files whose image and label (mtime, size) match the old
+        # cache are reused, new and changed files are verified by a process pool. Returns cache, True if unchanged
+        old = old or {}
+        old_stats = old.get('stats', {})
+        x, stats = {}, {}  # cache, {im_file: (image stat, label stat, (nm, nf, ne, nc))}
+        todo = []  # (im_file, lb_file, stats) to verify
+        for im_file, lb_file in zip(self.img_files, self.label_files):
+            st = file_stat(im_file), file_stat(lb_file)
+            s = old_stats.get(im_file)
+            if s is not None and s[:2] == st:  # unchanged
+                stats[im_file] = s
+                if im_file in old:  # not corrupted
+                    x[im_file] = old[im_file]
+            else:
+                todo.append((im_file, lb_file, st))
+
+        n = len(self.img_files)
+        counts = np.array([s[2] for s in stats.values()], dtype=int).reshape(-1, 4)
+        nm, nf, ne, nc = counts.sum(0)  # number missing, found, empty, corrupt
+        t = time.time()
+        if todo:
+            nw = min(num_threads, len(todo))  # number of processes
+            with Pool(nw) as pool:
+                pbar = tqdm(pool.imap(verify_image_label, ((f, l, prefix) for f, l, _ in todo)),
+                            desc='Scanning images', total=len(todo))
+                for (im_file, l, shape, segments, *counts, msg), (_, _, st) in zip(pbar, todo):
+                    if not counts[3]:
+                        x[im_file] = [l, shape, segments]
+                    stats[im_file] = (*st, tuple(counts))
+                    nm, nf, ne, nc = nm + counts[0], nf + counts[1], ne + counts[2], nc + counts[3]
+                    if msg:
+                        print(msg)
+                    pbar.desc = f"{prefix}Scanning '{path.parent / path.stem}' images and labels... " \
+                                f"{nf} found, {nm} missing, {ne} empty, {nc} corrupted"
+                pbar.close()
+            dt = time.time() - t
+            logging.info(f'{prefix}Verified {len(todo)} new or changed of {n} files in {dt:.1f}s '
+                         f'({len(todo) / dt:.0f} files/s, {nw} processes), {n - len(todo)} cached')
 
         if nf == 0:
             print(f'{prefix}WARNING: No labels found in {path}. See {help_url}')
 
-        x['hash'] = get_hash(self.label_files + self.img_files)
-        x['results'] = nf, nm, ne, nc, i + 1
-        x['version'] = 0.1  # cache version
-        torch.save(x, path)  # save for next time
-        logging.info(f'{prefix}New cache created: {path}')
-        return x
+        x = {f: x[f] for f in self.img_files if f in x}  # file order
+        x['stats'] = stats
+        x['results'] = int(nf), int(nm), int(ne), int(nc), n
+        x['version'] = self.cache_version
+        exists = not todo and stats.keys() == old_stats.keys()
+        if not exists:
+            torch.save(x, path)  # save for next time
+            logging.info(f'{prefix}New cache created: {path}')
+        return x, exists
 
     def __len__(self):
         return len(self.img_files)
@@ -596,7 +676,7 @@ class LoadImagesAndLabels(Dataset):  # for training/testing
         img, label, path, shapes = zip(*batch)  # transposed
         for i, l in enumerate(label):
             l[:, 0] = i  # add target image index for build_targets()
-        return torch.stack(img, 0), torch.cat(label, 0), path, shapes
+        return default_collate(img), torch.cat(label, 0), path, shapes  # stacked in shared memory by workers
 
     @staticmethod
     def collate_fn4(batch):
@@ -622,12 +702,71 @@ class LoadImagesAndLabels(Dataset):  # for training/testing
         for i, l in enumerate(label4):
             l[:, 0] = i  # add target image index for build_targets()
 
-        return torch.stack(img4, 0), torch.cat(label4, 0), path4, shapes4
+        return default_collate(img4), torch.cat(label4, 0), path4, shapes4
+
+
+class DiskImageCache:
+    # Resized uint8 BGR images of a LoadImagesAndLabels stored back to back in one file, the index of byte offsets and
+    # shapes in path.idx. Images are returned as zero-copy read-only np.memmap views, the OS page cache bounds RAM
+    version = 0.1
+
+    def __init__(self, path):
+        self.path = Path(path)  # data file
+        self.index = {}  # im_file: (offset, hw_original, hw_resized)
+        self.ready = False
+        self.mm = None  # np.memmap, opened on first access in each process
+
+    def load(self, files, img_size, augment):
+        # Load the index, returns True if it covers files with unchanged (mtime, size) at img_size and augment
+        idx = Path(str(self.path) + '.idx')
+        if not (self.path.is_file() and idx.is_file()):
+            return False
+        x = torch.load(idx, weights_only=False)
+        if x.get('version') != self.version or (x['img_size'], x['augment']) != (img_size, bool(augment)) or \
+                any(x['stats'].get(f) != file_stat(f) for f in files):
+            return False
+        self.index, self.ready = x['index'], True
+        return True
+
+    def build(self, dataset, prefix=''):
+        # Write the images of dataset resized by load_image() once, then serve them from the file
+        t, offset, stats = time.time(), 0, {}
+        files = dataset.img_files
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'wb') as f:
+            results = ThreadPool(8).imap(lambda x: load_image(*x), zip(repeat(dataset), range(len(files))))  # 8 threads
+            pbar = tqdm(zip(files, results), total=len(files))
+            for im_file, (img, hw0, hw) in pbar:
+                f.write(np.ascontiguousarray(img).data)
+                self.index[im_file] = offset, hw0, hw
+                stats[im_file] = file_stat(im_file)
+                offset += img.nbytes
+                pbar.desc = f'{prefix}Caching images to disk ({offset / 1E9:.1f}GB)'
+            pbar.close()
+        os.replace(tmp, self.path)
+        torch.save({'index': self.index, 'stats': stats, 'img_size': dataset.img_size, 'augment': bool(dataset.augment),
+                    'version': self.version}, str(self.path) + '.idx')
+        dt = time.time() - t
+        logging.info(f'{prefix}Image cache created: {self.path} ({offset / 1E9:.2f}GB, {len(files) / dt:.0f} images/s)')
+        self.ready = True
+
+    def __getitem__(self, im_file):
+        # Returns img, hw_original, hw_resized of im_file
+        if self.mm is None:
+            self.mm = np.memmap(self.path, dtype=np.uint8, mode='r')
+        offset, hw0, (h, w) = self.index[im_file]
+        return self.mm[offset:offset + h * w * 3].reshape(h, w, 3), hw0, (h, w)
+
+    def __getstate__(self):
+        # DataLoader workers map the file themselves
+        return {**self.__dict__, 'mm': None}
 
 
 # Ancillary functions --------------------------------------------------------------------------------------------------
 def load_image(self, index):
     # loads 1 image from dataset, returns img, original hw, resized hw
+    if getattr(self, 'img_cache', None) is not None and self.img_cache.ready:
+        return self.img_cache[self.img_files[index]]  # read-only view
     img = self.imgs[index]
     if img is None:  # not cached
         path = self.img_files[index]
@@ -815,6 +954,39 @@ def replicate(img, labels):
     return img, labels
 
 
+class LetterboxBlob:
+    # Letterbox BGR uint8 images to shape=(h, w) straight into preallocated float32 RGB 0.0 - 1.0 CHW arrays. The resize
+    # and channel split write into persistent buffers, cast and scale are one np.divide per plane into out
+    def __init__(self, shape, color=(114, 114, 114)):
+        self.shape = tuple(shape)  # (h, w)
+        self.color = np.array(color, dtype=np.float32)[::-1, None, None] / 255  # RGB padding
+        self.resized = {}  # (h, w): resize buffer
+        self.planes = {}  # (h, w): B, G, R plane buffers
+
+    def __call__(self, img, out=None):
+        # Letterbox img(h0,w0,3) into out(3,h,w), a new array if None, i.e. out=tensor.numpy() fills a torch tensor
+        h, w = self.shape
+        out = np.empty((3, h, w), dtype=np.float32) if out is None else out
+        h0, w0 = img.shape[:2]
+        r = min(h / h0, w / w0)
+        nw, nh = int(round(w0 * r)), int(round(h0 * r))
+        top, left = int(round((h - nh) / 2 - 0.1)), int(round((w - nw) / 2 - 0.1))
+        if (nh, nw) != (h0, w0):  # resize
+            if (nh, nw) not in self.resized:
+                self.resized[nh, nw] = np.empty((nh, nw, 3), dtype=np.uint8)
+            img = cv2.resize(img, (nw, nh), dst=self.resized[nh, nw], interpolation=cv2.INTER_LINEAR)
+
+        # Padding, then the image
+        out[:, :top], out[:, top + nh:] = self.color, self.color
+        out[:, top:top + nh, :left], out[:, top:top + nh, left + nw:] = self.color, self.color
+        if (nh, nw) not in self.planes:
+            self.planes[nh, nw] = [np.empty((nh, nw), dtype=np.uint8) for _ in range(3)]
+        b, g, r = cv2.split(img, self.planes[nh, nw])  # HWC to CHW
+        for i, x in enumerate((r, g, b)):  # BGR to RGB
+            np.divide(x, np.float32(255), out=out[i, top:top + nh, left:left + nw], casting='unsafe')
+        return out
+
+
 def letterbox(img, new_shape=(640, 640), color=(114, 114, 114), auto=True, scaleFill=False, scaleup=True, stride=32):
     # Resize and pad image while meeting stride-multiple constraints
     shape = img.shape[:2]  # current shape [height, width]
@@ -1,6 +1,7 @@
 # YOLOv5 general utils
 
 import glob
+import importlib
 import logging
 import math
 import os
@@ -13,23 +14,33 @@ from pathlib import Path
 
 import cv2
 import numpy as np
-import pandas as pd
 import torch
-import torchvision
-import yaml
 
-from utils.google_utils import gsutil_getsize
-from utils.metrics import fitness
 from utils.torch_utils import init_torch_seeds
 
 # Settings
 torch.set_printoptions(linewidth=320, precision=5, profile='long')
 np.set_printoptions(linewidth=320, formatter={'float_kind': '{:11.5g}'.format})  # format short g, %precision=5
-pd.options.display.max_columns = 10
 cv2.setNumThreads(0)  # prevent OpenCV from multithreading (incompatible with PyTorch DataLoader)
 os.environ['NUMEXPR_MAX_THREADS'] = str(min(os.cpu_count(), 8))  # NumExpr max threads
 
 
+class LazyModule:
+    # Module imported on first attribute access, for slow imports only needed off the inference path (plotting,
+    # training), i.e. plt = LazyModule('matplotlib.pyplot'). before() runs once before the import, setup(module) after
+    def __init__(self, name, setup=None, before=None):
+        self._name, self._setup, self._before, self._module = name, setup, before, None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            if self._before:
+                self._before()
+            self._module = importlib.import_module(self._name)
+            if self._setup:
+                self._setup(self._module)
+        return getattr(self._module, attr)
+
+
 def set_logging(rank=-1):
     logging.basicConfig(
         format="%(message)s",
@@ -425,6 +436,7 @@ def non_max_suppression(prediction, conf_thres=0.25, iou_thres=0.45, classes=Non
     Returns:
          list of detections, on (n,6) tensor per image [xyxy, conf, cls]
     """
+    import torchvision  # slow import, only needed here
 
     nc = prediction.shape[2] - 5  # number of classes
     xc = prediction[..., 4] > conf_thres  # candidates
@@ -509,6 +521,66 @@ def non_max_suppression(prediction, conf_thres=0.25, iou_thres=0.45, classes=Non
     return output
 
 
+_class_masks = {}  # (nc, classes): bool class mask, see non_max_suppression_lean()
+
+
+def non_max_suppression_lean(prediction, conf_thres=0.25, iou_thres=0.45, classes=None, agnostic=False, max_nms=100,
+                             max_det=100):
+    """Single-label NMS for small candidate counts, same detections as non_max_suppression() when at most max_nms
+    boxes per image pass conf_thres. Candidates are filtered on objectness in torch, then class-of-interest, top-k,
+    box conversion and a greedy pass over the IoU matrix run in NumPy, without autolabelling, multi-label, merge or
+    time limit
+
+    Returns:
+         list of detections, on (n,6) tensor per image [xyxy, conf, cls]
+    """
+
+    nc = prediction.shape[2] - 5  # number of classes
+    xc = prediction[..., 4] > conf_thres  # candidates
+    max_wh = 4096  # (pixels) maximum box width and height
+    mask = None
+    if classes is not None:  # cached class mask
+        key = (nc, tuple(classes))
+        if key not in _class_masks:
+            _class_masks[key] = np.isin(np.arange(nc), classes)
+        mask = _class_masks[key]
+
+    output = [torch.zeros((0, 6), device=prediction.device)] * prediction.shape[0]
+    for xi, x in enumerate(prediction):  # image index, image inference
+        x = x[xc[xi]].cpu().numpy()  # confidence
+        if not x.shape[0]:
+            continue
+
+        # Best class conf = obj_conf * cls_conf, classes of interest, top-k
+        scores = x[:, 5:] * x[:, 4:5]
+        j = scores.argmax(1)
+        conf = scores[np.arange(len(j)), j]
+        i = conf > conf_thres
+        if mask is not None:
+            i &= mask[j]
+        if not i.any():
+            continue
+        conf, j, x = conf[i], j[i], x[i]
+        i = np.argsort(-conf, kind='stable')[:max_nms]  # sort by confidence
+        x = np.concatenate((xywh2xyxy(x[i, :4]), conf[i, None], j[i, None].astype(np.float32)), 1)
+
+        # Greedy NMS over the (n,n) IoU matrix of boxes offset by class
+        n = len(x)
+        if n > 1:
+            b = x[:, :4] + x[:, 5:6] * (0 if agnostic else max_wh)
+            area = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+            inter = (np.minimum(b[:, None, 2:], b[:, 2:]) - np.maximum(b[:, None, :2], b[:, :2])).clip(0).prod(2)
+            suppress = inter / (area[:, None] + area - inter) > iou_thres
+            keep = np.ones(n, dtype=bool)
+            for k in range(n - 1):
+                if keep[k]:
+                    keep[k + 1:] &= ~suppress[k, k + 1:]
+            x = x[keep]
+        output[xi] = torch.from_numpy(x[:max_det]).to(prediction.device)
+
+    return output
+
+
 def strip_optimizer(f='best.pt', s=''):  # from utils.general import *; strip_optimizer()
     # Strip optimizer from 'f' to finalize training, optionally save as 's'
     x = torch.load(f, map_location=torch.device('cpu'))
@@ -527,6 +599,10 @@ def strip_optimizer(f='best.pt', s=''):  # from utils.general import *; strip_op
 
 def print_mutation(hyp, results, yaml_file='hyp_evolved.yaml', bucket=''):
     # Print mutation results to evolve.txt (for use with train.py --evolve)
+    import yaml
+    from utils.google_utils import gsutil_getsize
+    from utils.metrics import fitness
+
     a = '%10s' * len(hyp) % tuple(hyp.keys())  # hyperparam keys
     b = '%10.3g' * len(hyp) % tuple(hyp.values())  # hyperparam values
     c = '%10.4g' * len(results) % results  # results (P, R, mAP@0.5, mAP@0.5:0.95, val_losses x 3)
@@ -6,7 +6,6 @@ import subprocess
 import time
 from pathlib import Path
 
-import requests
 import torch
 
 
@@ -22,6 +21,8 @@ def attempt_download(file, repo='ultralytics/yolov5'):
 
     if not file.exists():
         try:
+            import requests  # slow import, only needed to download
+
             response = requests.get(f'https://api.github.com/repos/{repo}/releases/latest').json()  # github api
             assets = [x['name'] for x in response['assets']]  # release assets, i.e. ['yolov5s.pt', 'yolov5m.pt', ...]
             tag = response['tag_name']  # i.e. 'v1.0'
@@ -0,0 +1,82 @@
+# Maneuver scheduler: sign reactions as keyframe timelines executed by a non-blocking tick()
+
+import time
+
+
+class Maneuver:
+    # Named timeline of keyframes (action, args, hold), action is a key of the scheduler actions, hold is the seconds to
+    # wait after calling it before the next keyframe
+    def __init__(self, name, steps):
+        self.name = name
+        self.steps = [(a, tuple(args), float(hold)) for a, args, hold in steps]
+        self.at = []  # planned start of each step, seconds from maneuver start
+        t = 0.0
+        for _, _, hold in self.steps:
+            self.at.append(t)
+            t += hold
+        self.duration = t
+
+    def __repr__(self):
+        return f'Maneuver({self.name}, {len(self.steps)} steps, {self.duration:.2f}s)'
+
+
+class ManeuverScheduler:
+    # Runs one Maneuver at a time. Call tick() from the control loop: it fires every keyframe that is due and returns True
+    # while a maneuver is in progress, so sensing and detections keep being processed between keyframes
+    def __init__(self, actions, verbose=True):
+        self.actions = actions  # action name: callable, i.e. {'forward': move_forward, 'servo': bot.Ctrl_Servo}
+        self.verbose = verbose
+        self.current = None  # running Maneuver
+        self.t0 = 0.0  # current maneuver start, time.perf_counter()
+        self.i = 0  # next step of current
+        self.log = []  # (step, action, planned_s, actual_s) of the current maneuver
+        self.history = []  # (name, status, planned_s, actual_s, max_late_ms) of finished or pre-empted maneuvers
+
+    @property
+    def busy(self):
+        return self.current is not None
+
+    @property
+    def name(self):
+        return self.current.name if self.current else None
+
+    def start(self, maneuver, preempt=True):
+        # Start maneuver, pre-empting the running one if preempt, returns False if busy and not preempt
+        if self.current is not None:
+            if not preempt:
+                return False
+            self._finish('pre-empted')
+        self.current, self.t0, self.i, self.log = maneuver, time.perf_counter(), 0, []
+        self.tick()  # first keyframe now
+        return True
+
+    def cancel(self):
+        if self.current is not None:
+            self._finish('cancelled')
+
+    def tick(self):
+        # Fire due keyframes, return True while a maneuver is running
+        m = self.current
+        if m is None:
+            return False
+        t = time.perf_counter() - self.t0
+        while self.i < len(m.steps) and m.at[self.i] <= t:
+            action, args, _ = m.steps[self.i]
+            self.actions[action](*args)
+            self.log.append((self.i, action, m.at[self.i], time.perf_counter() - self.t0))
+            self.i += 1
+        if self.i == len(m.steps) and t >= m.duration:
+            self._finish('done')
+            return False
+        return True
+
+    def _finish(self, status):
+        m = self.current
+        actual = time.perf_counter() - self.t0
+        late = max([(a - p) * 1E3 for _, _, p, a in self.log], default=0.0)
+        self.history.append((m.name, status, m.duration, actual, late))
+        if self.verbose:
+            steps = ', '.join(f'{action} {p:.2f}/{a:.2f}' for _, action, p, a in self.log)
+            print(f'Maneuver {m.name} {status}: planned {m.duration:.2f}s, actual {actual:.2f}s, '
+                  f'max late {late:.0f}ms ({steps})')
+        self.current = None
@@ -2,12 +2,14 @@
 
 from pathlib import Path
 
-import matplotlib.pyplot as plt
 import numpy as np
 import torch
 
 from . import general
 
+plt = general.LazyModule('matplotlib.pyplot')  # slow import, plotting only
+trapz = getattr(np, 'trapezoid', None) or np.trapz  # numpy>=2.0 renamed trapz
+
 
 def fitness(x):
     # Model fitness as a weighted combination of metrics
@@ -34,37 +36,40 @@ def ap_per_class(tp, conf, pred_cls, target_cls, plot=False, save_dir='.', names
     tp, conf, pred_cls = tp[i], conf[i], pred_cls[i]
 
     # Find unique classes
-    unique_classes = np.unique(target_cls)
+    unique_classes, n_l = np.unique(target_cls, return_counts=True)  # number of labels per class
     nc = unique_classes.shape[0]  # number of classes, number of detections
 
-    # Create Precision-Recall curve and compute AP for each class
+    # Group the predictions of labelled classes by class, keeping the objectness order within each class
+    i = np.flatnonzero(np.isin(pred_cls, unique_classes))
+    ci = np.searchsorted(unique_classes, pred_cls[i])  # class index
+    j = np.argsort(ci, kind='stable')
+    i, ci = i[j], ci[j]
+    tp, conf = np.ascontiguousarray(tp[i].T), conf[i]  # tp (thresholds, predictions)
+    n_p = np.bincount(ci, minlength=nc)  # number of predictions per class
+    first = np.cumsum(n_p) - n_p  # index of the first prediction of each class
+
+    # Accumulate TPs and FPs within each class
+    tpc = tp.cumsum(1)
+    tpc -= np.repeat(np.pad(tpc, ((0, 0), (1, 0)))[:, first], n_p, 1)  # subtract the previous classes
+    npc = np.arange(1, len(ci) + 1) - np.repeat(first, n_p)  # predictions so far, tpc + fpc
+
+    # Recall and precision curves of all classes
+    recall = tpc / (n_l[ci] + 1e-16)
+    precision = tpc / npc
+
+    # Interpolate the curves and compute AP for each class with predictions
     px, py = np.linspace(0, 1, 1000), []  # for plotting
-    ap, p, r = np.zeros((nc, tp.shape[1])), np.zeros((nc, 1000)), np.zeros((nc, 1000))
-    for ci, c in enumerate(unique_classes):
-        i = pred_cls == c
-        n_l = (target_cls == c).sum()  # number of labels
-        n_p = i.sum()  # number of predictions
-
-        if n_p == 0 or n_l == 0:
-            continue
-        else:
-            # Accumulate FPs and TPs
-            fpc = (1 - tp[i]).cumsum(0)
-            tpc = tp[i].cumsum(0)
-
-            # Recall
-            recall = tpc / (n_l + 1e-16)  # recall curve
-            r[ci] = np.interp(-px, -conf[i], recall[:, 0], left=0)  # negative x, xp because xp decreases
-
-            # Precision
-            precision = tpc / (tpc + fpc)  # precision curve
-            p[ci] = np.interp(-px, -conf[i], precision[:, 0], left=1)  # p at pr_score
-
-            # AP from recall-precision curve
-            for j in range(tp.shape[1]):
-                ap[ci, j], mpre, mrec = compute_ap(recall[:, j], precision[:, j])
-                if plot and j == 0:
-                    py.append(np.interp(px, mrec, mpre))  # precision at mAP@0.5
+    ap, p, r = np.zeros((nc, tp.shape[0])), np.zeros((nc, 1000)), np.zeros((nc, 1000))
+    for ci in np.flatnonzero(n_p):
+        i = slice(first[ci], first[ci] + n_p[ci])  # predictions of this class
+        r[ci] = np.interp(-px, -conf[i], recall[0, i], left=0)  # negative x, xp because xp decreases
+        p[ci] = np.interp(-px, -conf[i], precision[0, i], left=1)  # p at pr_score
+
+        # AP from recall-precision curve
+        for j in range(tp.shape[0]):
+            ap[ci, j], mpre, mrec = compute_ap(recall[j, i], precision[j, i])
+            if plot and j == 0:
+                py.append(np.interp(px, mrec, mpre))  # precision at mAP@0.5
 
     # Compute F1 (harmonic mean of precision and recall)
     f1 = 2 * p * r / (p + r + 1e-16)
@@ -98,7 +103,7 @@ def compute_ap(recall, precision):
     method = 'interp'  # methods: 'continuous', 'interp'
     if method == 'interp':
         x = np.linspace(0, 1, 101)  # 101-point interp (COCO)
-        ap = np.trapz(np.interp(x, mrec, mpre), x)  # integrate
+        ap = trapz(np.interp(x, mrec, mpre), x)  # integrate
     else:  # 'continuous'
         i = np.where(mrec[1:] != mrec[:-1])[0]  # points where x axis (recall) changes
         ap = np.sum((mrec[i + 1] - mrec[i]) * mpre[i + 1])  # area under curve
@@ -106,6 +111,29 @@ def compute_ap(recall, precision):
     return ap, mpre, mrec
 
 
+def match_predictions(detections, labels, iouv):
+    """
+    Return the correct predictions at each IoU threshold. A prediction is correct if its best same-class IoU label
+    exceeds the threshold and no earlier prediction (higher conf after NMS) matched that label
+    Arguments:
+        detections (Array[N, 6]), x1, y1, x2, y2, conf, class
+        labels (Array[M, 5]), class, x1, y1, x2, y2
+        iouv (Array[K]), IoU thresholds
+    Returns:
+        correct (Array[N, K]), bool
+    """
+    correct = torch.zeros(detections.shape[0], iouv.numel(), dtype=torch.bool)
+    if not detections.shape[0] or not labels.shape[0]:
+        return correct
+    iou = general.box_iou(detections[:, :4], labels[:, 1:])
+    iou = torch.where(detections[:, 5:6] == labels[:, 0], iou, torch.zeros_like(iou))  # same class only
+    ious, i = iou.max(1)  # best label of each prediction
+    p = (ious > iouv[0]).nonzero(as_tuple=False).view(-1)
+    p = p[np.unique(i[p].cpu().numpy(), return_index=True)[1]]  # first prediction of each label
+    correct[p] = ious[p, None].cpu() > iouv.cpu()
+    return correct
+
+
 class ConfusionMatrix:
     # Updated version of https://github.com/kaanakan/object_detection_confusion_matrix
     def __init__(self, nc, conf=0.25, iou_thres=0.45):
@@ -141,18 +169,13 @@ class ConfusionMatrix:
             matches = np.zeros((0, 3))
 
         n = matches.shape[0] > 0
-        m0, m1, _ = matches.transpose().astype(np.int16)
-        for i, gc in enumerate(gt_classes):
-            j = m0 == i
-            if n and sum(j) == 1:
-                self.matrix[gc, detection_classes[m1[j]]] += 1  # correct
-            else:
-                self.matrix[self.nc, gc] += 1  # background FP
+        m0, m1, _ = matches.transpose().astype(int)  # labels and detections matched at most once
+        gc, dc = gt_classes.cpu().numpy(), detection_classes.cpu().numpy()
+        np.add.at(self.matrix, (gc[m0], dc[m1]), 1)  # correct
+        self.matrix[self.nc] += np.bincount(np.delete(gc, m0), minlength=self.nc + 1)  # background FP
 
         if n:
-            for i, dc in enumerate(detection_classes):
-                if not any(m1 == i):
-                    self.matrix[dc, self.nc] += 1  # background FN
+            self.matrix[:, self.nc] += np.bincount(np.delete(dc, m1), minlength=self.nc + 1)  # background FN
 
     def matrix(self):
         return self.matrix
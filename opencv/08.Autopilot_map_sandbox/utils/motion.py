@@ -0,0 +1,44 @@
+# Motion gate: skip detector runs on frames that barely differ from the last inferred one
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    # Compares a downscaled grayscale copy of each frame with the last frame the detector ran on. Returns True (run the
+    # detector) if the mean absolute difference exceeds threshold (0 - 255 gray levels) or refresh frames were skipped.
+    # Call it on every captured frame so the difference and skip ratio cover frames dropped by cadence as well
+    def __init__(self, threshold=4.0, size=(32, 24), refresh=15):
+        self.threshold = threshold
+        self.size = size  # (w, h) of the compared thumbnails
+        self.refresh = refresh  # force a run after this many skipped frames
+        self.ref = None  # thumbnail of the last inferred frame
+        self.gray = np.empty(size[::-1], dtype=np.uint8)
+        self.skipped = 0  # consecutive skipped frames
+        self.n, self.nskip = 0, 0  # frames seen, frames skipped
+        self.diff = 0.0  # last mean absolute difference
+
+    def __call__(self, img, force=False, hold=False):
+        # img is a BGR uint8 frame. force runs the detector regardless of motion (i.e. the tracker needs a detection),
+        # hold skips it (i.e. an off-cadence frame), force wins. The reference only moves to frames the detector runs on
+        small = cv2.resize(img, self.size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        self.n += 1
+        run = self.ref is None or self.skipped >= self.refresh
+        if self.ref is not None:
+            self.diff = cv2.absdiff(gray, self.ref, dst=self.gray).mean()
+            run = run or self.diff > self.threshold
+        if force or (run and not hold):
+            self.ref = gray
+            self.skipped = 0
+            return True
+        self.skipped += 1
+        self.nskip += 1
+        return False
+
+    @property
+    def skip_ratio(self):
+        return self.nskip / max(self.n, 1)
+
+    def stats(self):
+        return f'gate skipped {self.nskip}/{self.n} ({self.skip_ratio:.0%}), diff {self.diff:.1f}'
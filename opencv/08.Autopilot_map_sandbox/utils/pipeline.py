@@ -0,0 +1,139 @@
+# Staged inference pipeline: stage threads connected by bounded latest-wins queues
+
+import threading
+import time
+from collections import deque
+
+import torch
+
+
+class LatestQueue:
+    # Bounded queue where put() on a full queue drops the oldest item (latest wins)
+    def __init__(self, maxsize=1, on_drop=None):
+        self.items = deque()
+        self.maxsize = maxsize
+        self.on_drop = on_drop  # called with each dropped item, i.e. to release its buffer
+        self.dropped = 0
+        self.cond = threading.Condition()
+
+    def put(self, item):
+        with self.cond:
+            if len(self.items) >= self.maxsize:
+                dropped = self.items.popleft()
+                self.dropped += 1
+                if self.on_drop:
+                    self.on_drop(dropped)
+            self.items.append(item)
+            self.cond.notify()
+
+    def get(self, timeout=None):
+        # Return the oldest item, or None after timeout seconds
+        with self.cond:
+            if not self.items and not self.cond.wait_for(lambda: self.items, timeout):
+                return None
+            return self.items.popleft()
+
+    def qsize(self):
+        return len(self.items)
+
+
+class BufferPool:
+    # Preallocated tensors handed out by acquire() to one stage and returned by release() in a later one
+    def __init__(self, n, shape, dtype=torch.float32, device='cpu'):
+        self.buffers = [torch.empty(shape, dtype=dtype, device=device) for _ in range(n)]
+        self.free = deque(range(n))
+        self.cond = threading.Condition()
+
+    def acquire(self, timeout=None):
+        # Return (index, tensor) of a free buffer, or None after timeout seconds
+        with self.cond:
+            if not self.free and not self.cond.wait_for(lambda: self.free, timeout):
+                return None
+            i = self.free.popleft()
+            return i, self.buffers[i]
+
+    def release(self, i):
+        with self.cond:
+            self.free.append(i)
+            self.cond.notify()
+
+
+class Stage(threading.Thread):
+    # Daemon thread calling fn(item) for items of src and putting non-None results on dst. A stage without src is a
+    # source and calls fn() in a loop, returning None when it has nothing new
+    def __init__(self, name, fn, src=None, dst=None, window=300):
+        super(Stage, self).__init__(name=name, daemon=True)
+        self.fn, self.src, self.dst = fn, src, dst
+        self.stopped = threading.Event()
+        self.dt = deque(maxlen=window)  # seconds per item
+        self.depth = deque(maxlen=window)  # src queue depth seen at each get
+        self.n = 0  # items processed
+        self.error = None
+
+    def run(self):
+        try:
+            while not self.stopped.is_set():
+                if self.src is None:
+                    t = time.perf_counter()
+                    y = self.fn()
+                    if y is None:  # nothing produced
+                        continue
+                else:
+                    self.depth.append(self.src.qsize())
+                    x = self.src.get(timeout=0.1)
+                    if x is None:
+                        continue
+                    t = time.perf_counter()
+                    y = self.fn(x)
+                self.dt.append(time.perf_counter() - t)
+                self.n += 1
+                if y is not None and self.dst is not None:
+                    self.dst.put(y)
+        except Exception as e:
+            self.error = e
+            print(f'WARNING: pipeline stage {self.name} stopped: {e}')
+            raise
+
+    def stop(self):
+        self.stopped.set()
+
+
+class Pipeline:
+    # Chain of named stages [(name, fn), ...], the first one a source, connected by LatestQueue(maxsize)
+    def __init__(self, stages, maxsize=1, on_drop=None):
+        self.queues = [LatestQueue(maxsize, on_drop) for _ in stages[1:]]
+        q = [None] + self.queues + [None]
+        self.stages = [Stage(name, fn, q[i], q[i + 1]) for i, (name, fn) in enumerate(stages)]
+        self.t0 = None
+
+    def start(self):
+        self.t0 = time.perf_counter()
+        for s in reversed(self.stages):  # consumers first
+            s.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        for s in self.stages:
+            s.stop()
+        for s in self.stages:
+            s.join(timeout)
+
+    def join(self, interval=5.0, verbose=False, info=None):
+        # Block while all stages run, printing stats() and optional info() string every interval seconds if verbose
+        while all(s.is_alive() for s in self.stages):
+            time.sleep(interval)
+            if verbose:
+                print(self.stats() + (f', {info()}' if info else ''))
+
+    def stats(self):
+        # Per-stage items/s, mean and max ms per item, mean input queue depth and items dropped from its output queue
+        t = time.perf_counter() - self.t0 if self.t0 else float('nan')
+        s = []
+        for stage in self.stages:
+            dt, depth = list(stage.dt), list(stage.depth)
+            ms = sum(dt) / len(dt) * 1E3 if dt else float('nan')
+            mx = max(dt) * 1E3 if dt else float('nan')
+            qd = sum(depth) / len(depth) if depth else 0.0
+            drop = stage.dst.dropped if stage.dst is not None else 0
+            s.append(f'{stage.name} {stage.n / t:.1f}/s {ms:.1f}ms (max {mx:.1f}) q{qd:.1f} drop {drop}')
+        return ', '.join(s)
@@ -8,22 +8,25 @@ from copy import copy
 from pathlib import Path
 
 import cv2
-import matplotlib
-import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
-import seaborn as sns
 import torch
-import yaml
-from PIL import Image, ImageDraw, ImageFont
-from scipy.signal import butter, filtfilt
 
-from utils.general import xywh2xyxy, xyxy2xywh
+from utils.general import LazyModule, xywh2xyxy, xyxy2xywh
 from utils.metrics import fitness
 
-# Settings
-matplotlib.rc('font', **{'size': 11})
-matplotlib.use('Agg')  # for writing to files only
+
+def matplotlib_settings(m):
+    m.rc('font', **{'size': 11})
+    m.use('Agg')  # for writing to files only
+
+
+# Plotting and analysis imports are slow, load them on first use
+matplotlib = LazyModule('matplotlib', matplotlib_settings)
+plt = LazyModule('matplotlib.pyplot', before=lambda: matplotlib.rcParams)  # Agg backend before pyplot loads
+pd = LazyModule('pandas')
+sns = LazyModule('seaborn')
+yaml = LazyModule('yaml')
+Image, ImageDraw, ImageFont = LazyModule('PIL.Image'), LazyModule('PIL.ImageDraw'), LazyModule('PIL.ImageFont')
 
 
 def color_list():
@@ -45,6 +48,8 @@ def hist2d(x, y, n=100):
 
 def butter_lowpass_filtfilt(data, cutoff=1500, fs=50000, order=5):
     # https://stackoverflow.com/questions/28536191/how-to-filter-smooth-with-scipy-numpy
+    from scipy.signal import butter, filtfilt
+
     def butter_lowpass(cutoff, fs, order):
         nyq = 0.5 * fs
         normal_cutoff = cutoff / nyq
@@ -15,12 +15,7 @@ import torch
 import torch.backends.cudnn as cudnn
 import torch.nn as nn
 import torch.nn.functional as F
-import torchvision
 
-try:
-    import thop  # for FLOPS computation
-except ImportError:
-    thop = None
 logger = logging.getLogger(__name__)
 
 
@@ -110,6 +105,7 @@ def profile(x, ops, n=100, device=None):
         m = m.half() if hasattr(m, 'half') and isinstance(x, torch.Tensor) and x.dtype is torch.float16 else m  # type
         dtf, dtb, t = 0., 0., [0., 0., 0.]  # dt forward, backward
         try:
+            import thop  # for FLOPS computation, slow import
             flops = thop.profile(m, inputs=(x,), verbose=False)[0] / 1E9 * 2  # GFLOPS
         except:
             flops = 0
@@ -132,6 +128,34 @@ def profile(x, ops, n=100, device=None):
         print(f'{p:12}{flops:12.4g}{dtf:16.4g}{dtb:16.4g}{str(s_in):>24s}{str(s_out):>24s}')
 
 
+def profile_rect(model, shape, img_size=640, n=100):
+    # Compare GFLOPS and CPU latency of model at rectangular inference shape=(h, w) against img_size x img_size
+    shapes = {'square': (img_size, img_size), 'rect': tuple(shape)}
+    device = next(model.parameters()).device
+    results = {}
+    print(f"\n{'input':>12s}{'shape':>12s}{'GFLOPS':>10s}{'p50 (ms)':>10s}{'p95 (ms)':>10s}")
+    for k, (h, w) in shapes.items():
+        img = torch.zeros(1, 3, h, w, device=device)
+        try:
+            import thop  # for FLOPS computation, slow import
+            flops = thop.profile(deepcopy(model), inputs=(img,), verbose=False)[0] / 1E9 * 2  # GFLOPS
+        except:
+            flops = float('nan')
+        with torch.no_grad():
+            for _ in range(10):
+                model(img)  # warmup, builds Detect() grids
+            dt = []
+            for _ in range(n):
+                t = time_synchronized()
+                model(img)
+                dt.append((time_synchronized() - t) * 1000)
+        results[k] = flops, *torch.tensor(dt).quantile(torch.tensor([0.5, 0.95])).tolist()
+        print(f'{k:>12s}{f"{h}x{w}":>12s}{results[k][0]:10.3f}{results[k][1]:10.2f}{results[k][2]:10.2f}')
+    (f0, t0, _), (f1, t1, _) = results['square'], results['rect']
+    print(f'rect saves {1 - f1 / f0:.1%} GFLOPS, {1 - t1 / t0:.1%} p50 latency')
+    return results
+
+
 def is_parallel(model):
     return type(model) in (nn.parallel.DataParallel, nn.parallel.DistributedDataParallel)
 
@@ -227,6 +251,8 @@ def model_info(model, verbose=False, img_size=640):
 
 def load_classifier(name='resnet101', n=2):
     # Loads a pretrained model reshaped to n-class output
+    import torchvision
+
     model = torchvision.models.__dict__[name](pretrained=True)
 
     # ResNet model properties
@@ -0,0 +1,97 @@
+# Lightweight multi-object tracker: IoU association with constant-velocity prediction (SORT without Kalman filter)
+
+import numpy as np
+
+
+def iou_matrix(box1, box2):
+    # Return (n,m) IoU of xyxy boxes box1(n,4) and box2(m,4), numpy
+    area1 = (box1[:, 2] - box1[:, 0]) * (box1[:, 3] - box1[:, 1])
+    area2 = (box2[:, 2] - box2[:, 0]) * (box2[:, 3] - box2[:, 1])
+    inter = (np.minimum(box1[:, None, 2:], box2[:, 2:]) - np.maximum(box1[:, None, :2], box2[:, :2])).clip(0).prod(2)
+    return inter / (area1[:, None] + area2 - inter + 1E-9)
+
+
+class Track:
+    # Single tracked object, xyxy box moving at a constant per-frame velocity
+    def __init__(self, det, id):
+        self.box = np.array(det[:4], dtype=np.float32)
+        self.vel = np.zeros(4, dtype=np.float32)  # xyxy change per frame
+        self.conf, self.cls = float(det[4]), int(det[5])
+        self.id = id
+        self.age = 1  # frames since creation
+        self.hits = 1  # detector matches
+        self.streak = 1  # consecutive detector matches
+        self.since = 0  # frames since the last detector match
+        self.lost = 0  # consecutive detector frames without a match
+
+    def predict(self):
+        # Advance one frame
+        self.box += self.vel
+        self.age += 1
+        self.since += 1
+
+    def update(self, det, alpha=0.5):
+        # Correct with a matched detection, blending the observed velocity since the last match into vel
+        box = np.array(det[:4], dtype=np.float32)
+        if self.since:
+            observed = (box - (self.box - self.vel * self.since)) / self.since  # last matched box + since * vel
+            self.vel = alpha * observed + (1 - alpha) * self.vel
+        self.box = box
+        self.conf = float(det[4])
+        self.hits += 1
+        self.streak += 1
+        self.since = 0
+        self.lost = 0
+
+    def miss(self):
+        self.streak = 0
+        self.lost += 1
+
+
+class Tracker:
+    # Associates per-frame detections (n,6) [xyxy, conf, cls] greedily by IoU within each class. update(det) on detector
+    # frames, update(None) on frames where the detector is skipped, which only extrapolates
+    def __init__(self, iou_thres=0.3, max_lost=3, max_since=30, min_hits=2):
+        self.iou_thres = iou_thres
+        self.max_lost = max_lost  # drop tracks unmatched on this many consecutive detector frames
+        self.max_since = max_since  # drop tracks not matched for this many frames
+        self.min_hits = min_hits  # report tracks after this many detector matches
+        self.tracks = []
+        self.next_id = 1
+
+    @property
+    def pending(self):
+        # True while a track awaits confirmation, the detector should run on the next frame
+        return any(t.hits < self.min_hits for t in self.tracks)
+
+    def update(self, det=None):
+        # Return confirmed tracks as (n,8) numpy array [xyxy, conf, cls, id, age], highest conf first
+        for t in self.tracks:
+            t.predict()
+
+        if det is not None:
+            det = det.cpu().numpy() if hasattr(det, 'cpu') else np.asarray(det)
+            matched = set()
+            if len(self.tracks) and len(det):
+                boxes = np.stack([t.box for t in self.tracks], 0)
+                iou = iou_matrix(boxes, det[:, :4])
+                iou[np.array([t.cls for t in self.tracks])[:, None] != det[:, 5].astype(int)] = 0  # same class only
+                for k in np.argsort(-iou, axis=None):  # greedy, best IoU first
+                    i, j = divmod(int(k), iou.shape[1])
+                    if iou[i, j] < self.iou_thres:
+                        break
+                    if self.tracks[i].since and j not in matched:  # since is 0 once matched this frame
+                        self.tracks[i].update(det[j])
+                        matched.add(j)
+            for t in self.tracks:
+                if t.since:
+                    t.miss()
+            for j in range(len(det)):
+                if j not in matched:
+                    self.tracks.append(Track(det[j], self.next_id))
+                    self.next_id += 1
+
+        self.tracks = [t for t in self.tracks if t.lost <= self.max_lost and t.since <= self.max_since]
+        out = [(*t.box, t.conf, t.cls, t.id, t.age) for t in self.tracks if t.hits >= self.min_hits]
+        out = np.array(out, dtype=np.float32).reshape(-1, 8)
+        return out[np.argsort(-out[:, 4], kind='stable')]